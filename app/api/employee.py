@@ -1,33 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
 from sqlalchemy.exc import IntegrityError
 from app.database import get_db
 from app.models.employee import Employee
-from app.models.schemas import EmployeeCreate, EmployeeOut, EmployeeUpdate
-import openpyxl
-import io
-from datetime import datetime
+from app.models.schemas import EmployeeCreate, EmployeeOut, EmployeeSearchOut, EmployeeUpdate
 from typing import List, Optional
-from app.utils.date_utils import parse_date
+from app.services.employee_resolver import employee_resolver
+from app.services.pagination import count_cache, paginate, set_page_headers
+from app.services.bulk_import import (
+    ImportSpec, Source, detect_format, import_file,
+    to_bool, to_int, to_str,
+)
+from app.utils.date_utils import to_date
+from app.services.exports import EXPORT_FORMAT_PATTERN, TEMPLATE_FORMAT_PATTERN, stream_export, template_response
+from app.api.jobs import enqueue_upload
+from starlette.concurrency import run_in_threadpool
 
 # Konstanten
-BATCH_SIZE = 1000
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
 
-# Hilfsfunktion zum Parsen von Datumsstrings
-def parse_date(date_str: Optional[str]) -> Optional[datetime.date]:
-    if not date_str:
-        return None
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y"):
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    raise ValueError(f"Unbekanntes Datumsformat: {date_str}")
-
 # ============================================================
 #                MITARBEITER ANLEGEN
 # ============================================================
@@ -38,6 +33,8 @@ def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
     db.add(db_employee)
     try:
         db.commit()
+        employee_resolver.invalidate()
+        count_cache.invalidate(Employee.__tablename__)
         db.refresh(db_employee)
         return db_employee
     except IntegrityError:
@@ -50,17 +47,91 @@ def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[EmployeeOut])
 def list_employees(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    include_total: bool = False,
+    skip: int = Query(0, ge=0, deprecated=True),
     db: Session = Depends(get_db)
 ):
-    return db.query(Employee).filter(Employee.is_active == True).offset(skip).limit(limit).all()
+    # Nächste Seite über den Cursor aus X-Next-Cursor; skip nur noch für Altclients
+    # (ohne Cursor) und entfällt, sobald alle Clients den Cursor verwenden
+    query = db.query(Employee).filter(Employee.is_active == True)
+    page = paginate(query, [Employee.id], cursor, limit, offset=skip)
+
+    total = None
+    if include_total:
+        total = count_cache.get(
+            (Employee.__tablename__, "active"),
+            lambda: db.query(func.count(Employee.id)).filter(Employee.is_active == True).scalar(),
+        )
+    set_page_headers(response, page, total)
+    return page.items
+
+# ============================================================
+#                SUCHE / TYPEAHEAD
+# ============================================================
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@router.get("/search", response_model=List[EmployeeSearchOut])
+def search_employees(
+    response: Response,
+    q: Optional[str] = Query(None, max_length=100),
+    match: str = Query("prefix", pattern="^(prefix|contains)$"),
+    federal_state: Optional[str] = None,
+    vehicle: Optional[str] = None,
+    mentor: Optional[str] = None,
+    is_flexible: Optional[bool] = None,
+    include_inactive: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """
+    Serverseitige Suche für Typeahead und Filter. `q` sucht im Namen
+    (Präfix oder Teilstring, ohne Groß-/Kleinschreibung) und als Präfix der
+    Transporter-ID. Sortiert nach Name; weitere Seiten über X-Next-Cursor.
+    """
+    name_key = func.lower(Employee.name).label("name_key")
+    query = db.query(
+        Employee.id, Employee.name, Employee.transporter_id, Employee.federal_state,
+        Employee.vehicle, Employee.is_flexible, Employee.is_active, name_key
+    )
+    if not include_inactive:
+        query = query.filter(Employee.is_active == True)
+
+    term = (q or "").strip()
+    if term:
+        escaped = _like_escape(term.lower())
+        pattern = f"{escaped}%" if match == "prefix" else f"%{escaped}%"
+        query = query.filter(or_(
+            func.lower(Employee.name).like(pattern, escape="\\"),
+            Employee.transporter_id.like(f"{_like_escape(term.upper())}%", escape="\\"),
+        ))
+    if federal_state:
+        query = query.filter(Employee.federal_state == federal_state.upper())
+    if vehicle:
+        query = query.filter(Employee.vehicle == vehicle)
+    if mentor:
+        mentor_pattern = f"{_like_escape(mentor.strip().lower())}%"
+        query = query.filter(or_(
+            func.lower(Employee.mentor_first_name).like(mentor_pattern, escape="\\"),
+            func.lower(Employee.mentor_last_name).like(mentor_pattern, escape="\\"),
+        ))
+    if is_flexible is not None:
+        query = query.filter(Employee.is_flexible == is_flexible)
+
+    page = paginate(query, [name_key, Employee.id], cursor, limit)
+    set_page_headers(response, page)
+    return page.items
 
 # ============================================================
 #                EINZELNEN MITARBEITER ABFRAGEN
 # ============================================================
 
-@router.get("/{employee_id}", response_model=EmployeeOut)
+@router.get("/{employee_id:int}", response_model=EmployeeOut)
 def get_employee(employee_id: int, db: Session = Depends(get_db)):
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not employee:
@@ -82,6 +153,8 @@ def update_employee(employee_id: int, updated_employee: EmployeeUpdate, db: Sess
 
     try:
         db.commit()
+        employee_resolver.invalidate()
+        count_cache.invalidate(Employee.__tablename__)
         db.refresh(employee)
         return employee
     except IntegrityError:
@@ -100,148 +173,127 @@ def delete_employee(employee_id: int, db: Session = Depends(get_db)):
 
     employee.is_active = False
     db.commit()
+    employee_resolver.invalidate()
+    count_cache.invalidate(Employee.__tablename__)
     return
 
 # ============================================================
 #                EXCEL UPLOAD: MITARBEITER IMPORT
 # ============================================================
 
+WEEKDAYS = {"mo": 0, "di": 1, "mi": 2, "do": 3, "fr": 4, "sa": 5, "so": 6}
+
+def to_weekdays(value) -> List[int]:
+    # "Mo, Di, Fr" oder "0,1,4" → [0, 1, 4]
+    days = set()
+    for part in str(value).replace(";", ",").split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part[:2] in WEEKDAYS:
+            days.add(WEEKDAYS[part[:2]])
+        elif part.isdigit() and 0 <= int(part) <= 6:
+            days.add(int(part))
+        else:
+            raise ValueError(f"Unbekannter Wochentag '{part}'")
+    return sorted(days)
+
+EMPLOYEE_IMPORT = ImportSpec(
+    model=Employee,
+    fields={
+        "name": to_str,
+        "email": to_str,
+        "phone": to_str,
+        "telegram_username": to_str,
+        "transporter_id": to_str,
+        "mentor_first_name": to_str,
+        "mentor_last_name": to_str,
+        "start_date": to_date,
+        "end_date": to_date,
+        "days_per_week": to_int,
+        "is_flexible": to_bool,
+        "prefers_six_days": to_bool,
+        "preferred_days": to_weekdays,
+        "vehicle": to_str,
+        "address": to_str,
+        "federal_state": to_str,
+    },
+    required=["name", "transporter_id", "start_date"],
+    key="transporter_id",
+    defaults={"is_active": True},
+)
+
+def import_employees_file(
+    db: Session, source: Source, fmt: str = "xlsx", dry_run: bool = False, with_stats: bool = False
+) -> dict:
+    """
+    Importiert bzw. aktualisiert Mitarbeiter (Upsert über transporter_id)
+    aus Excel, CSV oder Parquet; mit `dry_run` nur Prüfung.
+    """
+    result = import_file(db, EMPLOYEE_IMPORT, source, fmt, dry_run)
+    if not dry_run:
+        employee_resolver.invalidate()
+    return result.to_dict("Mitarbeiter", with_stats)
+
+@router.post("/upload")
 @router.post("/upload_excel")
-async def upload_employees_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Nur Excel-Dateien sind erlaubt")
-    
+async def upload_employees_file(
+    file: UploadFile = File(...),
+    background: bool = False,
+    dry_run: bool = False,
+    stats: bool = False,
+    db: Session = Depends(get_db)
+):
+    fmt = detect_format(file.filename)
+
     if file.size > MAX_FILE_SIZE:
         raise HTTPException(status_code=400, detail="Datei zu groß")
-    
-    contents = await file.read()
-    workbook = openpyxl.load_workbook(io.BytesIO(contents))
-    sheet = workbook.active
-    
-    headers = [cell.value for cell in sheet[1]]
-    required_fields = ["name", "transporter_id", "start_date"]
-    
-    # Validierung der Header
-    for field in required_fields:
-        if field not in headers:
-            raise HTTPException(status_code=400, detail=f"Erforderliches Feld '{field}' fehlt in der Excel-Datei")
-    
-    employees = []
-    inserted_count = 0
-    error_rows = []
-    
-    for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        try:
-            employee_data = dict(zip(headers, row))
-            
-            # Validierung der Pflichtfelder
-            if not all(employee_data.get(field) for field in required_fields):
-                error_rows.append(f"Zeile {row_idx}: Pflichtfelder fehlen")
-                continue
-                
-            start_date = parse_date(employee_data.get("start_date"))
-            end_date = parse_date(employee_data.get("end_date"))
-            
-            new_employee = Employee(
-                name=employee_data.get("name"),
-                email=employee_data.get("email"),
-                phone=employee_data.get("phone"),
-                telegram_username=employee_data.get("telegram_username"),
-                transporter_id=employee_data.get("transporter_id"),
-                mentor_first_name=employee_data.get("mentor_first_name"),
-                mentor_last_name=employee_data.get("mentor_last_name"),
-                start_date=start_date,
-                end_date=end_date,
-                days_per_week=employee_data.get("days_per_week"),
-                is_flexible=employee_data.get("is_flexible"),
-                prefers_six_days=employee_data.get("prefers_six_days"),
-                vehicle=employee_data.get("vehicle"),
-                address=employee_data.get("address"),
-                federal_state=employee_data.get("federal_state"),
-                is_active=True
-            )
-            employees.append(new_employee)
-            inserted_count += 1
-            
-            if len(employees) >= BATCH_SIZE:
-                db.bulk_save_objects(employees)
-                db.commit()
-                employees = []
-                
-        except Exception as e:
-            error_rows.append(f"Zeile {row_idx}: {str(e)}")
-    
-    if employees:
-        db.bulk_save_objects(employees)
-        db.commit()
-    
-    return {
-        "message": f"{inserted_count} Mitarbeiter erfolgreich importiert.",
-        "errors": error_rows if error_rows else None
-    }
+
+    # Hintergrund-Import: sofort mit Job-ID antworten, Status über /jobs/{id}
+    if background:
+        return await enqueue_upload("employees_import", import_employees_file, file, fmt, dry_run, stats)
+
+    # Datei wird direkt aus dem Upload gestreamt, ohne sie komplett einzulesen
+    return await run_in_threadpool(import_employees_file, db, file.file, fmt, dry_run, stats)
 
 # ============================================================
-#                EXCEL EXPORT: ALLE MITARBEITER
+#                EXPORT: ALLE MITARBEITER
 # ============================================================
 
+EXPORT_COLUMNS = [
+    "name", "email", "phone", "telegram_username", "transporter_id",
+    "mentor_first_name", "mentor_last_name", "start_date", "end_date",
+    "days_per_week", "is_flexible", "prefers_six_days", "preferred_days", "vehicle", "address",
+    "federal_state"
+]
+
 @router.get("/export")
 def export_all_employees(
     skip: int = 0,
-    limit: int = 1000,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = None,
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN)
 ):
-    employees = db.query(Employee).filter(Employee.is_active == True).offset(skip).limit(limit).all()
-
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.append([
-        "name", "email", "phone", "telegram_username", "transporter_id",
-        "mentor_first_name", "mentor_last_name", "start_date", "end_date",
-        "days_per_week", "is_flexible", "prefers_six_days", "vehicle", "address",
-        "federal_state"
-    ])
-
-    for emp in employees:
-        sheet.append([
-            emp.name, emp.email, emp.phone, emp.telegram_username, emp.transporter_id,
-            emp.mentor_first_name, emp.mentor_last_name,
-            emp.start_date.strftime("%d.%m.%Y") if emp.start_date else "",
-            emp.end_date.strftime("%d.%m.%Y") if emp.end_date else "",
-            emp.days_per_week, emp.is_flexible, emp.prefers_six_days,
-            emp.vehicle, emp.address, emp.federal_state
-        ])
-
-    buffer = io.BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
-
-    return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=employees_export.xlsx"}
-    )
+    """
+    Exportiert die aktiven Mitarbeiter. csv/ndjson/parquet werden blockweise
+    gestreamt; xlsx wird erst vollständig (temporäre Datei) erzeugt, für den
+    ganzen Bestand daher besser csv oder ndjson.
+    """
+    # Ohne limit wird die ganze Tabelle gestreamt
+    def build_query(db: Session):
+        query = (
+            db.query(*(getattr(Employee, name) for name in EXPORT_COLUMNS))
+            .filter(Employee.is_active == True)
+            .order_by(Employee.id)
+            .offset(skip)
+        )
+        return query.limit(limit) if limit is not None else query
+
+    return stream_export(build_query, format, "employees_export")
 
 # ============================================================
-#                EXCEL EXPORT: LEERE VORLAGE
+#                EXPORT: LEERE VORLAGE
 # ============================================================
 
 @router.get("/export_template")
-def export_employee_template():
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.append([
-        "name", "email", "phone", "telegram_username", "transporter_id",
-        "mentor_first_name", "mentor_last_name", "start_date", "end_date",
-        "days_per_week", "is_flexible", "prefers_six_days", "vehicle", "address",
-        "federal_state"
-    ])
-
-    buffer = io.BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
-
-    return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=employee_template.xlsx"}
-    )
+def export_employee_template(format: str = Query("xlsx", pattern=TEMPLATE_FORMAT_PATTERN)):
+    return template_response(Employee, EXPORT_COLUMNS, format, "employee_template")
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from app.database import get_db
-from app.models.fleet import FleetVehicle
+from app.models.fleet import FleetVehicle, VehicleStatus
 from app.models.schemas import FleetVehicleCreate, FleetVehicleOut, FleetVehicleUpdate
-from typing import List
-import openpyxl
-import io
-from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.services.bulk_import import (
+    ImportSpec, Source, detect_format, import_file,
+    to_enum, to_float, to_int, to_str,
+)
+from app.services.pagination import count_cache, paginate, set_page_headers
+from app.services.exports import EXPORT_FORMAT_PATTERN, TEMPLATE_FORMAT_PATTERN, stream_export, template_response
+from app.api.jobs import enqueue_upload
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/fleet", tags=["Fleet"])
 
@@ -17,6 +23,7 @@ def create_vehicle(vehicle: FleetVehicleCreate, db: Session = Depends(get_db)):
     db.add(db_vehicle)
     try:
         db.commit()
+        count_cache.invalidate(FleetVehicle.__tablename__)
         db.refresh(db_vehicle)
         return db_vehicle
     except IntegrityError:
@@ -24,10 +31,26 @@ def create_vehicle(vehicle: FleetVehicleCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Kennzeichen bereits vergeben.")
 
 @router.get("/", response_model=List[FleetVehicleOut])
-def list_active_vehicles(db: Session = Depends(get_db)):
-    return db.query(FleetVehicle).filter(FleetVehicle.is_active == True).all()
+def list_active_vehicles(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    include_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    query = db.query(FleetVehicle).filter(FleetVehicle.is_active == True)
+    page = paginate(query, [FleetVehicle.id], cursor, limit)
+
+    total = None
+    if include_total:
+        total = count_cache.get(
+            (FleetVehicle.__tablename__, "active"),
+            lambda: db.query(func.count(FleetVehicle.id)).filter(FleetVehicle.is_active == True).scalar(),
+        )
+    set_page_headers(response, page, total)
+    return page.items
 
-@router.get("/{vehicle_id}", response_model=FleetVehicleOut)
+@router.get("/{vehicle_id:int}", response_model=FleetVehicleOut)
 def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
     vehicle = db.query(FleetVehicle).filter(FleetVehicle.id == vehicle_id).first()
     if not vehicle:
@@ -44,6 +67,7 @@ def update_vehicle(vehicle_id: int, updated: FleetVehicleUpdate, db: Session = D
         setattr(vehicle, field, value)
 
     db.commit()
+    count_cache.invalidate(FleetVehicle.__tablename__)
     db.refresh(vehicle)
     return vehicle
 
@@ -54,48 +78,67 @@ def delete_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Fahrzeug nicht gefunden")
     vehicle.is_active = False
     db.commit()
+    count_cache.invalidate(FleetVehicle.__tablename__)
     return
 
+VEHICLE_IMPORT = ImportSpec(
+    model=FleetVehicle,
+    fields={
+        "license_plate": to_str,
+        "manufacturer": to_str,
+        "model": to_str,
+        "year": to_int,
+        "mileage": to_float,
+        "status": to_enum(VehicleStatus),
+    },
+    required=["license_plate"],
+    key="license_plate",
+    defaults={"status": VehicleStatus.active, "is_active": True},
+)
+
+def import_vehicles_file(
+    db: Session, source: Source, fmt: str = "xlsx", dry_run: bool = False, with_stats: bool = False
+) -> dict:
+    """
+    Importiert bzw. aktualisiert Fahrzeuge (Upsert über license_plate)
+    aus Excel, CSV oder Parquet.
+    """
+    return import_file(db, VEHICLE_IMPORT, source, fmt, dry_run).to_dict("Fahrzeuge", with_stats)
+
+@router.post("/upload")
 @router.post("/upload_excel")
-async def upload_vehicles_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    contents = await file.read()
-    workbook = openpyxl.load_workbook(io.BytesIO(contents))
-    sheet = workbook.active
-
-    headers = [cell.value for cell in sheet[1]]
-    rows = list(sheet.iter_rows(min_row=2, values_only=True))
-    inserted_count = 0
-
-    for row in rows:
-        vehicle_data = dict(zip(headers, row))
-
-        new_vehicle = FleetVehicle(
-            license_plate=vehicle_data.get("license_plate"),
-            manufacturer=vehicle_data.get("manufacturer"),
-            model=vehicle_data.get("model"),
-            year=vehicle_data.get("year"),
-            mileage=vehicle_data.get("mileage"),
-            status=vehicle_data.get("status") or "active",
-            is_active=True
+async def upload_vehicles_file(
+    file: UploadFile = File(...),
+    background: bool = False,
+    dry_run: bool = False,
+    stats: bool = False,
+    db: Session = Depends(get_db)
+):
+    fmt = detect_format(file.filename)
+
+    # Hintergrund-Import: sofort mit Job-ID antworten, Status über /jobs/{id}
+    if background:
+        return await enqueue_upload("vehicles_import", import_vehicles_file, file, fmt, dry_run, stats)
+
+    return await run_in_threadpool(import_vehicles_file, db, file.file, fmt, dry_run, stats)
+
+EXPORT_COLUMNS = ["license_plate", "manufacturer", "model", "year", "mileage", "status"]
+
+@router.get("/export")
+def export_vehicles(format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN)):
+    """
+    Exportiert die aktiven Fahrzeuge; xlsx wird vor dem Senden gepuffert
+    (bei der Flottengröße unkritisch), die übrigen Formate werden gestreamt.
+    """
+    def build_query(db: Session):
+        return (
+            db.query(*(getattr(FleetVehicle, name) for name in EXPORT_COLUMNS))
+            .filter(FleetVehicle.is_active == True)
+            .order_by(FleetVehicle.id)
         )
-        db.add(new_vehicle)
-        inserted_count += 1
 
-    db.commit()
-    return {"message": f"{inserted_count} Fahrzeuge erfolgreich importiert."}
+    return stream_export(build_query, format, "vehicles_export")
 
 @router.get("/export_template")
-def export_vehicle_template():
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.append(["license_plate", "manufacturer", "model", "year", "mileage", "status"])
-
-    buffer = io.BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
-
-    return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=vehicle_template.xlsx"}
-    )
+def export_vehicle_template(format: str = Query("xlsx", pattern=TEMPLATE_FORMAT_PATTERN)):
+    return template_response(FleetVehicle, EXPORT_COLUMNS, format, "vehicle_template")
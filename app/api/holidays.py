@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+import datetime
+
+from app.services.holiday_calendar import holiday_calendar, normalize_state
+
+router = APIRouter()
+
+
+def _state(state: Optional[str]) -> Optional[str]:
+    try:
+        return normalize_state(state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/check")
+def check_day(day: datetime.date, state: Optional[str] = None):
+    """
+    Feiertag bzw. Arbeitstag (Mo–Sa ohne Feiertage) für einen Tag und ein Bundesland.
+    """
+    state = _state(state)
+    name = holiday_calendar.holiday_name(state, day)
+    return {
+        "date": day,
+        "state": state,
+        "is_holiday": name is not None,
+        "name": name,
+        "is_working_day": holiday_calendar.is_working_day(state, day),
+    }
+
+
+@router.get("/{year:int}")
+def get_holidays(year: int, state: Optional[str] = None):
+    """
+    Alle Feiertage eines Jahres; ohne `state` nur die bundesweiten.
+    """
+    if not 1950 <= year <= 2100:
+        raise HTTPException(status_code=400, detail="Jahr außerhalb des unterstützten Bereichs")
+    state = _state(state)
+    days = holiday_calendar.holidays_for(state, year)
+    return {
+        "state": state,
+        "year": year,
+        "holidays": [{"date": day, "name": name} for day, name in sorted(days.items())],
+    }
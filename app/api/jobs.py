@@ -0,0 +1,42 @@
+import os
+from fastapi import APIRouter, HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from typing import Any, Callable
+
+from app.services.bulk_import import import_spooled_job, spool_upload
+from app.services.jobs import job_queue, JobFunc, JobQueueFull
+
+router = APIRouter()
+
+
+def enqueue(kind: str, func: JobFunc, *args: Any) -> JSONResponse:
+    """
+    Reiht einen Import als Hintergrund-Job ein und antwortet mit 202 und der Job-ID.
+    """
+    try:
+        job = job_queue.submit(kind, func, *args)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return JSONResponse(status_code=202, content={"job_id": job.id, "status": job.status.value})
+
+
+async def enqueue_upload(kind: str, importer: Callable[..., dict], file: UploadFile, *args: Any) -> JSONResponse:
+    """
+    Schreibt den Upload in eine temporäre Datei und importiert ihn als Hintergrund-Job
+    (`importer(db, path, *args)`).
+    """
+    path = await spool_upload(file)
+    try:
+        return enqueue(kind, import_spooled_job, importer, path, *args)
+    except HTTPException:
+        os.remove(path)
+        raise
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    return job.to_dict()
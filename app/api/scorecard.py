@@ -1,150 +1,154 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-import pdfplumber
-import re
-import io
-from sqlalchemy import Column, Integer, Float
 
-from app.database import get_db, Base
-from app.models.scorecard_driver import ScorecardDriver
+from app.database import get_db
 from app.models.employee import Employee
-# from app.models.firm_scorecard import FirmScorecard, ScorecardFirm
+from app.models.scorecard_driver import ScorecardDriver
+from app.models.schemas import ScorecardDriverOut, ScorecardTrendOut
+from app.services.driver_scoring import leaderboard
+from app.services.exports import EXPORT_FORMAT_PATTERN, stream_export
+from app.services.import_stats import ImportStats
+from app.services.pdf_engine import PdfEngineTimeout
+from app.services.scorecard_cache import parse_scorecard_cached
+from app.services.scorecard_parser import extract_week_from_filename
+from app.services.scorecard_trends import check_week, get_trends, refresh_trends
+from app.services.scorecard_service import (
+    save_scorecard, scorecard_response, delete_week, import_scorecard_job
+)
+from app.api.jobs import enqueue
 
 router = APIRouter()
 
-def extract_week_from_filename(filename: str) -> int:
-    match = re.search(r'Week(\d{1,2})', filename)
-    if match:
-        return int(match.group(1))
-    raise ValueError("Keine gültige KW im Dateinamen gefunden.")
-
-def parse_int(value):
-    if isinstance(value, (int, float)):
-        return int(value)
-    if isinstance(value, str):
-        value = value.strip()
-        if value == '-' or value == '':
-            return None
-        return int(float(value))
-    return None
-
-def parse_float(value):
-    if isinstance(value, (int, float)):
-        return float(value)
-    if isinstance(value, str):
-        value = value.strip().replace('%', '').replace(',', '.')
-        if value == '-' or value == '':
-            return None
-        return float(value)
-    return None
-
-def normalize_transporter_id(tid: str) -> str:
-    if not tid.startswith("A") and len(tid) == 13:
-        return "A" + tid
-    return tid
-
 @router.post("/scorecard/upload_driver_scorecard/")
-async def upload_driver_scorecard(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_driver_scorecard(
+    file: UploadFile = File(...),
+    background: bool = False,
+    stats: bool = False,
+    db: Session = Depends(get_db)
+):
     try:
-        contents = await file.read()
-        pdf = pdfplumber.open(io.BytesIO(contents))
+        import_stats = ImportStats()
+        with import_stats.stage("read"):
+            contents = await file.read()
+        import_stats.count("bytes", len(contents))
 
         week = extract_week_from_filename(file.filename)
         year = 2025
+        check_week(year, week)
 
-        employees = db.query(Employee).all()
-        transporter_id_map = {emp.transporter_id: emp.name for emp in employees if emp.transporter_id}
-
-        text = ""
-        if len(pdf.pages) >= 3:
-            text += pdf.pages[2].extract_text()
-        if len(pdf.pages) >= 4:
-            text += "\n" + pdf.pages[3].extract_text()
-
-        pattern_with_lor = r'([A-Z0-9]{13,14})[\s\n]+(\d+)[\s\n]+([\d.,%-]+)[\s\n]+(\d+)[\s\n]+(\d+)[\s\n]+([\d.,%-]+)[\s\n]+([\d.,%-]+)[\s\n]+(\d+)[\s\n]+([\d.,%-]+)'
-        pattern_without_lor = r'([A-Z0-9]{13,14})[\s\n]+(\d+)[\s\n]+([\d.,%-]+)[\s\n]+(\d+)[\s\n]+([\d.,%-]+)[\s\n]+([\d.,%-]+)[\s\n]+(\d+)[\s\n]+([\d.,%-]+)'
-
-        matches = re.findall(pattern_with_lor, text)
-        pattern_used = "with_lor"
+        # Hintergrund-Import: sofort mit Job-ID antworten, Status über /jobs/{id}
+        if background:
+            return enqueue("driver_scorecard", import_scorecard_job, contents, week, year, True, stats)
 
-        if not matches:
-            matches = re.findall(pattern_without_lor, text)
-            pattern_used = "without_lor"
+        # PDF-Auswertung im Prozesspool (oder aus dem Parse-Cache), der Event-Loop bleibt frei
+        with import_stats.stage("parse"):
+            result = await parse_scorecard_cached(contents)
 
-        if not matches:
+        if not result.drivers:
             raise HTTPException(status_code=400, detail="Keine Fahrer-Daten in der Scorecard gefunden.")
 
-        for match in matches:
-            if pattern_used == "with_lor":
-                transporter_id, delivered, dcr, dnr_dpmo, lor_dpmo, pod, cc, ce, dex = match
-            else:
-                transporter_id, delivered, dcr, dnr_dpmo, pod, cc, ce, dex = match
-                lor_dpmo = None
-
-            transporter_id = normalize_transporter_id(transporter_id)
-            name = transporter_id_map.get(transporter_id, transporter_id)
-
-            driver = ScorecardDriver(
-                week=week,
-                year=year,
-                name=name,
-                delivered=parse_int(delivered),
-                dcr=parse_float(dcr),
-                dnr_dpmo=parse_int(dnr_dpmo),
-                lor_dpmo=parse_int(lor_dpmo) if lor_dpmo is not None else None,
-                pod=parse_float(pod),
-                cc=parse_float(cc),
-                ce=parse_int(ce),
-                dex=parse_float(dex),
-            )
-            db.add(driver)
-
-        firm_text = ""
-        if len(pdf.pages) >= 2:
-            firm_text = pdf.pages[1].extract_text()
-
-        kpi_patterns = {
-            "dcr": r"Delivery Completion Rate\(DCR\)[\s:]*([\d.,]+)%",
-            "dnr_dpmo": r"Delivered Not Received\(DNR DPMO\)[\s:]*([\d.,]+)",
-            "lor_dpmo": r"Lost on Road \(LoR\) DPMO[\s:]*([\d.,]+)",
-        }
-
-        firm_kpis = {}
-        for key, pat in kpi_patterns.items():
-            match = re.search(pat, firm_text)
-            if match:
-                firm_kpis[key] = parse_float(match.group(1))
-            else:
-                firm_kpis[key] = None
-
-        firm_scorecard = FirmScorecard(
-            week=week,
-            year=year,
-            dcr=firm_kpis["dcr"],
-            dnr_dpmo=parse_int(firm_kpis["dnr_dpmo"]) if firm_kpis["dnr_dpmo"] is not None else None,
-            lor_dpmo=parse_int(firm_kpis["lor_dpmo"]) if firm_kpis["lor_dpmo"] is not None else None,
-        )
-        db.add(firm_scorecard)
-
-        db.commit()
-        return {"message": f"{len(matches)} Fahrer und Firmen-KPIs für KW {week} erfolgreich gespeichert."}
+        # Woche wird in einer Transaktion ersetzt, wiederholte Uploads sind idempotent
+        counts = save_scorecard(db, result, week, year, import_stats)
 
+        with import_stats.stage("commit"):
+            db.commit()
+        return scorecard_response("driver_scorecard", counts, week, year, import_stats, stats)
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"KW {week}/{year} wurde gleichzeitig importiert, bitte erneut hochladen.")
+    except PdfEngineTimeout as e:
+        db.rollback()
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/scorecard/delete_drivers/{week}/{year}")
 def delete_scorecard_drivers(week: int, year: int, db: Session = Depends(get_db)):
-    deleted_count = db.query(ScorecardDriver).filter_by(week=week, year=year).delete()
+    check_week(year, week)
+    _, deleted_count = delete_week(db, week, year)
+    refresh_trends(db, year, week)
     db.commit()
     return {"message": f"{deleted_count} Fahrer-Datensätze für KW {week}/{year} gelöscht."}
 
-class FirmScorecard(Base):
-    __tablename__ = "firm_scorecards"
-
-    id = Column(Integer, primary_key=True, index=True)
-    week = Column(Integer)
-    year = Column(Integer)
-    dcr = Column(Float)
-    dnr_dpmo = Column(Integer)
-    lor_dpmo = Column(Integer)
\ No newline at end of file
+@router.get("/scorecard/drivers/{employee_id}/history", response_model=List[ScorecardDriverOut])
+def get_driver_history(
+    employee_id: int,
+    weeks: int = Query(52, ge=1, le=260),
+    db: Session = Depends(get_db)
+):
+    """
+    Die letzten `weeks` Scorecard-Wochen eines Fahrers, neueste zuerst.
+    Läuft als Bereichsscan über ix_scorecard_drivers_employee_year_week.
+    """
+    if db.query(Employee.id).filter(Employee.id == employee_id).first() is None:
+        raise HTTPException(status_code=404, detail="Mitarbeiter nicht gefunden")
+
+    return (
+        db.query(ScorecardDriver)
+        .filter(ScorecardDriver.employee_id == employee_id)
+        .order_by(ScorecardDriver.year.desc(), ScorecardDriver.week.desc())
+        .limit(weeks)
+        .all()
+    )
+
+@router.get("/scorecard/leaderboard/{year}/{week}")
+def get_leaderboard(
+    year: int,
+    week: int,
+    tier: Optional[str] = Query(None, pattern="^(Fantastic|Great|Fair|Poor)$"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Fahrer-Rangliste einer Woche mit Gesamtscore, Stufe, Perzentil und Rang.
+    """
+    return leaderboard(db, year, week, tier=tier, limit=limit)
+
+@router.get("/scorecard/export")
+def export_scorecards(
+    year: Optional[int] = None,
+    week: Optional[int] = None,
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN)
+):
+    """
+    Exportiert Fahrerwerte, optional auf Jahr/Woche gefiltert. Ohne Filter
+    wächst der Export mit jeder Woche; xlsx wird komplett gepuffert, bevor
+    das erste Byte gesendet wird, daher für Gesamtexporte csv oder ndjson.
+    """
+    columns = [
+        getattr(ScorecardDriver, column.key)
+        for column in ScorecardDriver.__table__.columns
+        if column.key != "id"
+    ]
+
+    def build_query(db: Session):
+        query = db.query(*columns)
+        if year is not None:
+            query = query.filter(ScorecardDriver.year == year)
+        if week is not None:
+            query = query.filter(ScorecardDriver.week == week)
+        return query.order_by(ScorecardDriver.year, ScorecardDriver.week, ScorecardDriver.transporter_id)
+
+    return stream_export(build_query, format, "scorecard_export")
+
+@router.get("/scorecard/trends/{year}/{week}", response_model=List[ScorecardTrendOut])
+def get_scorecard_trends(
+    year: int,
+    week: int,
+    scope: str = Query("driver", pattern="^(driver|firm)$"),
+    transporter_id: Optional[str] = None,
+    metric: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Gleitende 4- und 13-Wochen-Durchschnitte samt Veränderung zur Vorwoche,
+    je Fahrer (scope=driver) oder für die Firmen-KPIs (scope=firm).
+    """
+    return get_trends(db, year, week, scope=scope, subject=transporter_id, metric=metric)
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.models.employee import Employee
 from app.models.shift import ShiftAssignment
-from app.models.schemas import ShiftAssignmentCreate, ShiftAssignmentOut
-from typing import List
+from app.models.schemas import ShiftAssignmentCreate, ShiftAssignmentOut, ShiftDemand, AbsenceCreate
+from typing import List, Optional
 import datetime
-import holidays
-feiertage = holidays.Germany(prov="BY")  # oder je nach Bundesland
+from app.services.exports import EXPORT_FORMAT_PATTERN, stream_export
+from app.services.pagination import count_cache, paginate, set_page_headers
+from app.services.shift_planner import PLAN_MODE_PATTERN, plan_range
+from app.services.shift_replanner import replan_absence
 
 
 router = APIRouter(prefix="/shifts", tags=["Shift Planning"])
@@ -16,16 +20,61 @@ def assign_shift(shift: ShiftAssignmentCreate, db: Session = Depends(get_db)):
     assignment = ShiftAssignment(**shift.dict())
     db.add(assignment)
     db.commit()
+    count_cache.invalidate(ShiftAssignment.__tablename__)
     db.refresh(assignment)
     return assignment
 
 @router.get("/by-week/{week_start}", response_model=List[ShiftAssignmentOut])
-def get_week_shifts(week_start: datetime.date, db: Session = Depends(get_db)):
+def get_week_shifts(
+    week_start: datetime.date,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=5000),
+    include_total: bool = False,
+    db: Session = Depends(get_db)
+):
     week_end = week_start + datetime.timedelta(days=6)
-    return db.query(ShiftAssignment).filter(
+    query = db.query(ShiftAssignment).filter(
         ShiftAssignment.date >= week_start,
         ShiftAssignment.date <= week_end
-    ).all()
+    )
+    page = paginate(query, [ShiftAssignment.date, ShiftAssignment.id], cursor, limit)
+
+    total = None
+    if include_total:
+        total = count_cache.get(
+            (ShiftAssignment.__tablename__, week_start),
+            lambda: query.with_entities(func.count(ShiftAssignment.id)).scalar(),
+        )
+    set_page_headers(response, page, total)
+    return page.items
+
+@router.get("/export")
+def export_shifts(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN)
+):
+    """
+    Exportiert Schichten im Zeitraum. Ohne Zeitraum sind das alle Schichten;
+    xlsx wird dabei erst vollständig erzeugt und dann gesendet, csv/ndjson
+    streamen ab der ersten Zeile.
+    """
+    def build_query(db: Session):
+        query = db.query(
+            ShiftAssignment.date,
+            ShiftAssignment.employee_id,
+            Employee.transporter_id,
+            Employee.name,
+            ShiftAssignment.shift_type,
+        ).join(Employee, Employee.id == ShiftAssignment.employee_id)
+        if start:
+            query = query.filter(ShiftAssignment.date >= start)
+        if end:
+            query = query.filter(ShiftAssignment.date <= end)
+        return query.order_by(ShiftAssignment.date, ShiftAssignment.employee_id)
+
+    return stream_export(build_query, format, "shifts_export")
 
 @router.delete("/{assignment_id}", status_code=204)
 def delete_assignment(assignment_id: int, db: Session = Depends(get_db)):
@@ -34,105 +83,42 @@ def delete_assignment(assignment_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Schicht nicht gefunden")
     db.delete(shift)
     db.commit()
+    count_cache.invalidate(ShiftAssignment.__tablename__)
+
+@router.post("/auto-plan")
+def auto_plan_range(
+    start: datetime.date,
+    end: datetime.date,
+    mode: str = Query("forecast", pattern=PLAN_MODE_PATTERN),
+    demand: Optional[ShiftDemand] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Plant einen beliebigen Zeitraum in einem Lauf und liefert die Besetzung je Tag.
+    Optional im Body: Bedarf je Wochentag und/oder je Datum. Mitarbeiter ohne
+    Bundesland werden nicht eingeplant (Anzahl in `skipped_employees`).
+    """
+    return plan_range(db, start, end, mode, demand).to_dict()
 
 @router.post("/auto-plan/{week_start}")
-def auto_plan_week(week_start: datetime.date, mode: str = "forecast", db: Session = Depends(get_db)):
-    from app.models.employee import Employee
-
-    # 1. Daten vorbereiten
-    employees = db.query(Employee).filter(Employee.is_active == True).all()
-    week_end = week_start + datetime.timedelta(days=6)
-
-    # 2. Plan initialisieren
-    schedule = {day: [] for day in range(7)}  # Mo–So
-
-    # 3. Forecast-Planung: Bevorzugte Tage zuerst
-    for emp in employees:
-        assigned = 0
-        preferred = emp.preferred_days or []
-
-        for offset in range(7):
-            day_date = week_start + datetime.timedelta(days=offset)
-            weekday = day_date.weekday()
-
-            # 3a. Bevorzugte Tage
-            if weekday in preferred and assigned < emp.days_per_week:
-                db.add(ShiftAssignment(
-                    employee_id=emp.id,
-                    date=day_date,
-                    shift_type="work"
-                ))
-                assigned += 1
-
-        # 4. Maximum-Modus: auch flexible Tage zulassen
-        if mode == "maximum" and emp.is_flexible and assigned < emp.days_per_week:
-            for offset in range(7):
-                day_date = week_start + datetime.timedelta(days=offset)
-                weekday = day_date.weekday()
-
-                if weekday not in preferred and assigned < emp.days_per_week:
-                    db.add(ShiftAssignment(
-                        employee_id=emp.id,
-                        date=day_date,
-                        shift_type="work"
-                    ))
-                    assigned += 1
-
-    db.commit()
-    return {"message": f"Auto-Plan für Woche ab {week_start} im Modus '{mode}' abgeschlossen."}
-@router.post("/auto-plan/{week_start}")
 def auto_plan_week(
     week_start: datetime.date,
-    mode: str = "forecast",
+    mode: str = Query("forecast", pattern=PLAN_MODE_PATTERN),
+    demand: Optional[ShiftDemand] = None,
     db: Session = Depends(get_db)
 ):
-    from app.models.employee import Employee
-    from app.models.shift import ShiftAssignment
-
-    today = datetime.date.today()
     week_end = week_start + datetime.timedelta(days=6)
+    return plan_range(db, week_start, week_end, mode, demand).to_dict()
 
-    # Vorherige Zuweisungen dieser Woche abrufen
-    existing = db.query(ShiftAssignment).filter(
-        ShiftAssignment.date >= week_start,
-        ShiftAssignment.date <= week_end
-    ).all()
-    existing_map = {(e.employee_id, e.date): e for e in existing}
-
-    employees = db.query(Employee).filter(Employee.is_active == True).all()
-
-    for emp in employees:
-        if not emp.federal_state:
-            continue  # ❌ Bundesland nicht gesetzt – überspringen
-
-        # Individuelle Feiertage
-        feiertage = holidays.Germany(prov=emp.federal_state, years=week_start.year)
-        assigned_days = 0
-        preferred = emp.preferred_days or []
-
-        for offset in range(7):
-            day_date = week_start + datetime.timedelta(days=offset)
-            weekday = day_date.weekday()
-
-            # 🔒 Validierungen
-            if day_date < today:
-                continue
-            if (emp.id, day_date) in existing_map:
-                continue
-            if day_date in feiertage:
-                continue
-            if assigned_days >= emp.days_per_week:
-                continue
-            if mode == "forecast" and weekday not in preferred and not emp.is_flexible:
-                continue
-
-            # ✅ Zuweisung speichern
-            db.add(ShiftAssignment(
-                employee_id=emp.id,
-                date=day_date,
-                shift_type="work"
-            ))
-            assigned_days += 1
-
-    db.commit()
-    return {"message": f"Auto-Planung für {week_start} – {week_end} im Modus '{mode}' abgeschlossen."}
\ No newline at end of file
+@router.post("/absence")
+def report_absence(
+    absence: AbsenceCreate,
+    apply: bool = True,
+    demand: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Trägt krank/Urlaub ein und besetzt nur die betroffenen Tage nach.
+    `apply=false` liefert die Änderungen als Vorschlag, ohne zu speichern.
+    """
+    return replan_absence(db, absence, apply, demand)
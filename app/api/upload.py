@@ -1,15 +1,15 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, HTTPException
 import shutil
 from pathlib import Path
-from app.services.scorecard_service import (
-    extract_scorecard_data,
-    extract_firm_kpis_from_pdf,
-    extract_kw_from_filename,
-)
+from app.config import get_settings
+from app.services.pdf_engine import PdfEngineTimeout
+from app.services.scorecard_cache import parse_scorecard_cached
+from app.services.scorecard_service import extract_scorecard_data
 
 router = APIRouter()
+settings = get_settings()
 
-UPLOAD_DIR = Path("uploaded_files")
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 
@@ -21,15 +21,13 @@ async def upload_file(category: str, file: UploadFile = File(...)):
         shutil.copyfileobj(file.file, buffer)
 
     if category.lower() == "scorecard":
-        # Basisdaten aus erster Seite
-        core_data = extract_scorecard_data(temp_path)
-
-        # KW aus Dateinamen ziehen
-        core_data["kw"] = extract_kw_from_filename(file.filename)
-
-        # Firm KPIs aus Seite 2
-        core_data["firm_kpis"] = extract_firm_kpis_from_pdf(temp_path)
-
-        return core_data
+        # Ein Parse-Durchlauf (bzw. Cache-Treffer) liefert Overall Score, Rank, Focus Areas und Firm KPIs;
+        # Cache-Schlüssel und Prozesspool brauchen die Bytes, andere Kategorien bleiben gestreamt
+        try:
+            result = await parse_scorecard_cached(temp_path.read_bytes())
+        except PdfEngineTimeout as e:
+            raise HTTPException(status_code=504, detail=str(e))
+
+        return extract_scorecard_data(result, file.filename)
 
     return {"filename": file.filename, "category": category}
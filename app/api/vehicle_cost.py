@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.vehicle_cost import VehicleCost
+from app.models.vehicle_cost import CostCategory, VehicleCost
 from app.models.schemas import VehicleCostCreate, VehicleCostOut
-from typing import List
-from datetime import datetime, timedelta
-from app.utils.date_utils import parse_date
+from typing import List, Optional
+import datetime
+from app.services.pagination import count_cache, paginate, set_page_headers
+from app.services.cost_summary import fleet_summary, vehicle_summary
+from app.services.cost_rollups import BUCKET_PATTERN, book_costs, cost_timeseries, cost_values, rebuild_rollups
 
 
 router = APIRouter(prefix="/vehicle-costs", tags=["VehicleCosts"])
@@ -14,33 +17,68 @@ router = APIRouter(prefix="/vehicle-costs", tags=["VehicleCosts"])
 def create_vehicle_cost(cost: VehicleCostCreate, db: Session = Depends(get_db)):
     db_cost = VehicleCost(**cost.dict())
     db.add(db_cost)
+    book_costs(db, [cost_values(db_cost)])
     db.commit()
+    count_cache.invalidate(VehicleCost.__tablename__)
     db.refresh(db_cost)
     return db_cost
 
 @router.get("/by-vehicle/{vehicle_id}", response_model=List[VehicleCostOut])
-def get_costs_for_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
-    return db.query(VehicleCost).filter(VehicleCost.vehicle_id == vehicle_id).all()
+def get_costs_for_vehicle(
+    vehicle_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    include_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    query = db.query(VehicleCost).filter(VehicleCost.vehicle_id == vehicle_id)
+    page = paginate(query, [VehicleCost.date, VehicleCost.id], cursor, limit)
+
+    total = None
+    if include_total:
+        total = count_cache.get(
+            (VehicleCost.__tablename__, vehicle_id),
+            lambda: db.query(func.count(VehicleCost.id)).filter(VehicleCost.vehicle_id == vehicle_id).scalar(),
+        )
+    set_page_headers(response, page, total)
+    return page.items
+
+@router.get("/dashboard")
+def get_fleet_cost_summary(db: Session = Depends(get_db)):
+    """
+    Kostenübersicht aller aktiven Fahrzeuge mit Aufschlüsselung nach
+    Kategorie – eine gruppierte Abfrage statt eines Aufrufs je Fahrzeug.
+    """
+    return fleet_summary(db)
 
 @router.get("/dashboard/{vehicle_id}")
 def get_cost_summary(vehicle_id: int, db: Session = Depends(get_db)):
-    today = datetime.today().date()
-    days_30 = today - timedelta(days=30)
-    days_90 = today - timedelta(days=90)
-
-    total_all = db.query(VehicleCost).filter(VehicleCost.vehicle_id == vehicle_id).all()
-    total_30 = [c for c in total_all if c.date >= days_30]
-    total_90 = [c for c in total_all if c.date >= days_90]
-
-    sum_all = sum(c.amount for c in total_all)
-    sum_30 = sum(c.amount for c in total_30)
-    sum_90 = sum(c.amount for c in total_90)
-
-    return {
-        "total_all": sum_all,
-        "last_90_days": sum_90,
-        "last_30_days": sum_30
-    }
+    return vehicle_summary(db, vehicle_id)
+
+@router.get("/timeseries")
+def get_cost_timeseries(
+    bucket: str = Query("month", pattern=BUCKET_PATTERN),
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    vehicle_id: Optional[List[int]] = Query(None),
+    category: Optional[List[CostCategory]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Kosten je Tag, Woche, Monat oder Jahr, gelesen nur aus den Rollup-Tabellen.
+    `vehicle_id` und `category` dürfen mehrfach angegeben werden.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="Startdatum liegt nach dem Enddatum")
+    return cost_timeseries(db, bucket, start, end, vehicle_id, category)
+
+@router.post("/rollups/rebuild")
+def rebuild_cost_rollups(db: Session = Depends(get_db)):
+    # Nur nötig, wenn Kosten an der API vorbei geändert wurden
+    rows = rebuild_rollups(db)
+    db.commit()
+    return {"message": f"Kosten-Rollups neu aufgebaut ({rows} Tageszeilen)."}
 
 @router.delete("/{cost_id}", status_code=204)
 def delete_vehicle_cost(cost_id: int, db: Session = Depends(get_db)):
@@ -48,51 +86,94 @@ def delete_vehicle_cost(cost_id: int, db: Session = Depends(get_db)):
     if not cost:
         raise HTTPException(status_code=404, detail="Kosten-Eintrag nicht gefunden")
     db.delete(cost)
+    book_costs(db, [cost_values(cost)], sign=-1)
     db.commit()
+    count_cache.invalidate(VehicleCost.__tablename__)
     return
 
 from fastapi import UploadFile, File
-import openpyxl
-import io
+from starlette.concurrency import run_in_threadpool
+from app.models.fleet import FleetVehicle
+from app.services.bulk_import import (
+    ImportSpec, Source, detect_format, import_file,
+    to_enum, to_float, to_int, to_str,
+)
+from app.utils.date_utils import to_date
+from app.api.jobs import enqueue_upload
+
+def _positive_amount(value) -> float:
+    amount = to_float(value)
+    if amount <= 0:
+        raise ValueError("Betrag muss größer als 0 sein")
+    return amount
+
+def _check_vehicles(db: Session, rows: List[dict]) -> dict:
+    # Eine Abfrage je Block statt eines Fremdschlüsselfehlers für den ganzen Block
+    vehicle_ids = {row["vehicle_id"] for row in rows}
+    known = {vehicle_id for (vehicle_id,) in db.query(FleetVehicle.id).filter(FleetVehicle.id.in_(vehicle_ids))}
+    return {
+        position: f"Fahrzeug {row['vehicle_id']} nicht gefunden"
+        for position, row in enumerate(rows)
+        if row["vehicle_id"] not in known
+    }
 
+VEHICLE_COST_IMPORT = ImportSpec(
+    model=VehicleCost,
+    fields={
+        "vehicle_id": to_int,
+        "date": to_date,
+        "description": to_str,
+        "category": to_enum(CostCategory),
+        "amount": _positive_amount,
+    },
+    required=["vehicle_id", "date", "amount"],
+    defaults={"category": CostCategory.other},
+    check_chunk=_check_vehicles,
+    after_write=book_costs,
+)
+
+def import_vehicle_costs_file(
+    db: Session, source: Source, fmt: str = "xlsx", dry_run: bool = False, with_stats: bool = False
+) -> dict:
+    """
+    Importiert Kosten aus Excel, CSV oder Parquet.
+    """
+    return import_file(db, VEHICLE_COST_IMPORT, source, fmt, dry_run).to_dict("Kosten", with_stats)
+
+@router.post("/upload")
 @router.post("/upload_excel")
-async def upload_vehicle_costs_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    contents = await file.read()
-    workbook = openpyxl.load_workbook(io.BytesIO(contents))
-    sheet = workbook.active
-
-    headers = [cell.value for cell in sheet[1]]
-    rows = list(sheet.iter_rows(min_row=2, values_only=True))
-    inserted_count = 0
-
-    for row in rows:
-        row_data = dict(zip(headers, row))
-
-        try:
-            new_cost = VehicleCost(
-                vehicle_id=int(row_data["vehicle_id"]),
-                date=parse_date(str(row_data["date"])),
-                description=row_data.get("description"),
-                category=row_data.get("category") or "other",
-                amount=float(row_data["amount"])
-            )
-            db.add(new_cost)
-            inserted_count += 1
-        except Exception as e:
-            db.rollback()
-            raise HTTPException(status_code=400, detail=f"Fehler in Zeile {inserted_count + 2}: {e}")
-
-    db.commit()
-    return {"message": f"{inserted_count} Kosten erfolgreich importiert."}
-from datetime import datetime, date
-from typing import Optional
-
-def parse_date(date_str: Optional[str]) -> Optional[date]:
-    if not date_str:
-        return None
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y"):
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    raise ValueError(f"Unbekanntes Datumsformat: {date_str}")
+async def upload_vehicle_costs_file(
+    file: UploadFile = File(...),
+    background: bool = False,
+    dry_run: bool = False,
+    stats: bool = False,
+    db: Session = Depends(get_db)
+):
+    fmt = detect_format(file.filename)
+
+    # Hintergrund-Import: sofort mit Job-ID antworten, Status über /jobs/{id}
+    if background:
+        return await enqueue_upload("vehicle_costs_import", import_vehicle_costs_file, file, fmt, dry_run, stats)
+
+    return await run_in_threadpool(import_vehicle_costs_file, db, file.file, fmt, dry_run, stats)
+
+from app.services.exports import EXPORT_FORMAT_PATTERN, stream_export
+
+EXPORT_COLUMNS = ["vehicle_id", "date", "description", "category", "amount"]
+
+@router.get("/export")
+def export_vehicle_costs(
+    vehicle_id: Optional[int] = None,
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN)
+):
+    """
+    Exportiert Einzelkosten (optional eines Fahrzeugs) nach Datum. xlsx wird
+    vor dem Senden komplett gepuffert; lange Kostenhistorien als csv/ndjson.
+    """
+    def build_query(db: Session):
+        query = db.query(*(getattr(VehicleCost, name) for name in EXPORT_COLUMNS))
+        if vehicle_id is not None:
+            query = query.filter(VehicleCost.vehicle_id == vehicle_id)
+        return query.order_by(VehicleCost.date, VehicleCost.id)
+
+    return stream_export(build_query, format, "vehicle_costs_export")
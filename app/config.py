@@ -23,6 +23,39 @@ class Settings(BaseSettings):
     LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", "10485760"))  # 10MB
     LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
     
+    # PDF-Verarbeitung (Prozesspool)
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2"))
+    PDF_JOB_TIMEOUT: float = float(os.getenv("PDF_JOB_TIMEOUT", "60"))
+    SCORECARD_PARSE_MODE: str = os.getenv("SCORECARD_PARSE_MODE", "table")  # "table" oder "text"
+
+    # Uploads und Parse-Cache
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploaded_files")
+    SCORECARD_CACHE_MEMORY_ENTRIES: int = int(os.getenv("SCORECARD_CACHE_MEMORY_ENTRIES", "64"))
+    SCORECARD_CACHE_DISK_BYTES: int = int(os.getenv("SCORECARD_CACHE_DISK_BYTES", "268435456"))  # 256MB
+    EMPLOYEE_RESOLVER_TTL: float = float(os.getenv("EMPLOYEE_RESOLVER_TTL", "300"))  # Sekunden je Transporter-ID
+
+    # Hintergrund-Jobs für Importe
+    IMPORT_WORKERS: int = int(os.getenv("IMPORT_WORKERS", "2"))
+    IMPORT_QUEUE_SIZE: int = int(os.getenv("IMPORT_QUEUE_SIZE", "100"))
+    JOB_HISTORY: int = int(os.getenv("JOB_HISTORY", "500"))
+    JOB_DRAIN_TIMEOUT: float = float(os.getenv("JOB_DRAIN_TIMEOUT", "120"))
+
+    # Excel-/Datei-Importe
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))  # Zeilen je INSERT
+    IMPORT_DRY_RUN_MAX_ERRORS: int = int(os.getenv("IMPORT_DRY_RUN_MAX_ERRORS", "20000"))  # Fehlerbericht im Probelauf
+
+    # Datei-Exporte
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))  # Zeilen je Cursor-Block
+
+    # Listen-Endpunkte
+    COUNT_CACHE_TTL: float = float(os.getenv("COUNT_CACHE_TTL", "300"))  # Sekunden
+
+    # Schichtplanung
+    HOLIDAY_CACHE_ENTRIES: int = int(os.getenv("HOLIDAY_CACHE_ENTRIES", "64"))  # (Bundesland, Jahr)-Kalender
+    SHIFT_PLAN_MAX_DAYS: int = int(os.getenv("SHIFT_PLAN_MAX_DAYS", "400"))  # Tage je Planungslauf
+    REPLAN_CACHE_WEEKS: int = int(os.getenv("REPLAN_CACHE_WEEKS", "8"))  # Wochen im Umplanungs-Cache
+    REPLAN_CACHE_TTL: float = float(os.getenv("REPLAN_CACHE_TTL", "300"))  # Sekunden
+
     # API
     API_V1_PREFIX: str = "/api/v1"
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
@@ -1,3 +1,4 @@
+import datetime
 import logging
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
@@ -5,9 +6,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.database import init_db
-from app.api import upload, employee, scorecard, scorecard_combined, fleet, vehicle_cost, shifts
+from app.migrations import run_migrations
+from app.api import upload, employee, scorecard, scorecard_combined, fleet, vehicle_cost, shifts, jobs, holidays
 from app.config import get_settings
 from app.utils.logging_config import setup_logging
+from app.services.pdf_engine import pdf_engine
+from app.services.jobs import job_queue
+from app.services.cost_rollups import ensure_rollups
+from app.services.holiday_calendar import holiday_calendar
 # from app.utils.cache import setup_cache
 
 # Konfiguration laden
@@ -31,6 +37,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination-Header für Browser-Clients lesbar machen
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
 # Exception Handler
@@ -55,13 +63,27 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 async def startup_event():
     # Datenbank initialisieren
     init_db()
+    # Neue Indizes (und Spalten) in bestehenden Datenbanken ergänzen
+    run_migrations()
+    # Kosten-Rollups für Bestandsdaten einmalig aufbauen
+    ensure_rollups()
+    # Feiertage aller Bundesländer für dieses und nächstes Jahr vorberechnen
+    this_year = datetime.date.today().year
+    holiday_calendar.warm([this_year, this_year + 1])
     # Cache initialisieren
     # await setup_cache()
+    # Prozesspool für PDF-Verarbeitung starten
+    pdf_engine.start()
+    # Worker für Hintergrund-Importe starten
+    await job_queue.start()
     logger.info("Anwendung erfolgreich gestartet")
 
 # Shutdown Event
 @app.on_event("shutdown")
 async def shutdown_event():
+    # Offene Importe abarbeiten, bevor der PDF-Prozesspool beendet wird
+    await job_queue.shutdown(timeout=settings.JOB_DRAIN_TIMEOUT)
+    pdf_engine.shutdown()
     logger.info("Anwendung wird beendet")
 
 # Router registrieren
@@ -72,3 +94,5 @@ app.include_router(scorecard_combined.router, prefix=settings.API_V1_PREFIX + "/
 app.include_router(fleet.router, prefix=settings.API_V1_PREFIX + "/fleet", tags=["Fleet"])
 app.include_router(vehicle_cost.router, prefix=settings.API_V1_PREFIX + "/vehicle-costs", tags=["Vehicle Costs"])
 app.include_router(shifts.router, prefix=settings.API_V1_PREFIX + "/shifts", tags=["Shifts"])
+app.include_router(jobs.router, prefix=settings.API_V1_PREFIX + "/jobs", tags=["Jobs"])
+app.include_router(holidays.router, prefix=settings.API_V1_PREFIX + "/holidays", tags=["Holidays"])
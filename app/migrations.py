@@ -0,0 +1,120 @@
+"""
+Schemaänderungen für bestehende Datenbanken.
+
+`create_all` legt nur fehlende Tabellen an. Neue Spalten und Indizes an
+vorhandenen Tabellen ergänzt `run_migrations` beim Start; alle Schritte sind
+idempotent (Spalte vorher geprüft, CREATE INDEX IF NOT EXISTS). Spalten
+werden einzeln und ausdrücklich migriert, nicht automatisch aus den Modellen.
+
+PostgreSQL: Der Trigramm-Index der Mitarbeitersuche braucht die Erweiterung
+pg_trgm. Sie wird nicht automatisch angelegt (dafür sind erweiterte Rechte
+nötig), sondern einmalig von einem Datenbank-Administrator:
+
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+Fehlt sie, wird nur dieser Index übersprungen (Warnung im Log); die Suche
+funktioniert weiter, Teilstring-Suchen lesen dann die ganze Tabelle.
+"""
+import logging
+
+from sqlalchemy import Column, Table, UniqueConstraint, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from app.database import Base, engine
+from app.models.employee import POSTGRES_SEARCH_INDEXES, POSTGRES_TRGM_INDEXES, Employee
+from app.models.scorecard_driver import ScorecardDriver
+
+logger = logging.getLogger(__name__)
+
+
+def add_column(conn: Connection, column: Column):
+    """
+    ALTER TABLE ... ADD COLUMN für eine nullbare Modellspalte, falls sie fehlt.
+    Bezeichner werden über den Preparer des Dialekts quotiert.
+    """
+    inspector = inspect(conn)
+    table = column.table
+    if not inspector.has_table(table.name):
+        return  # create_all legt die Tabelle mit allen Spalten an
+    if column.name in {existing["name"] for existing in inspector.get_columns(table.name)}:
+        return
+
+    preparer = conn.dialect.identifier_preparer
+    definition = str(CreateColumn(column).compile(dialect=conn.dialect))
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        definition += f" REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})"
+        if foreign_key.ondelete:
+            definition += f" ON DELETE {foreign_key.ondelete}"
+    conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {definition}"))
+    logger.info(f"Spalte {table.name}.{column.name} ergänzt")
+
+
+def add_unique_constraints(conn: Connection, table: Table):
+    """
+    Benannte UniqueConstraints der Modelle als eindeutigen Index nachziehen
+    (SQLite kann Constraints nicht per ALTER TABLE ergänzen). Enthält der
+    Altbestand Duplikate, wird der Index übersprungen statt den Start abzubrechen.
+    """
+    constraints = [
+        constraint for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.name
+    ]
+    if not constraints:
+        return
+    inspector = inspect(conn)
+    existing = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+    existing.update(index["name"] for index in inspector.get_indexes(table.name))
+    preparer = conn.dialect.identifier_preparer
+    for constraint in constraints:
+        if constraint.name in existing:
+            continue
+        columns = ", ".join(preparer.format_column(column) for column in constraint.columns)
+        try:
+            with conn.begin_nested():
+                conn.execute(text(
+                    f"CREATE UNIQUE INDEX {preparer.quote(constraint.name)} "
+                    f"ON {preparer.format_table(table)} ({columns})"
+                ))
+        except IntegrityError:
+            logger.warning(f"{constraint.name} nicht angelegt: {table.name} enthält doppelte Zeilen")
+
+
+def ensure_indexes(conn: Connection):
+    """
+    Legt fehlende Indizes und eindeutige Schlüssel der Modelle
+    (`__table_args__`) und die PostgreSQL-Suchindizes an.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+        add_unique_constraints(conn, table)
+
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_SEARCH_INDEXES:
+        conn.execute(text(statement))
+    if conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is None:
+        logger.warning(
+            "Erweiterung pg_trgm fehlt, Trigramm-Index der Mitarbeitersuche übersprungen "
+            "(einmalig als Admin: CREATE EXTENSION pg_trgm)"
+        )
+        return
+    for statement in POSTGRES_TRGM_INDEXES:
+        conn.execute(text(statement))
+
+
+def run_migrations():
+    with engine.begin() as conn:
+        # Scorecard-Fahrer je Transporter-ID und Mitarbeiter
+        add_column(conn, ScorecardDriver.__table__.c.transporter_id)
+        add_column(conn, ScorecardDriver.__table__.c.employee_id)
+        # Bevorzugte Wochentage für die Schichtplanung
+        add_column(conn, Employee.__table__.c.preferred_days)
+        ensure_indexes(conn)
+    logger.info("Datenbank-Migrationen geprüft")
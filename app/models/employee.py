@@ -1,9 +1,20 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date
+from sqlalchemy import Column, Integer, String, Boolean, Date, Index, JSON, func, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 
+# Prädikat der Teilindizes, wie es der jeweilige Dialekt für is_active == True erzeugt
+ACTIVE_PG = text("is_active")
+ACTIVE_SQLITE = text("is_active = 1")
+
 class Employee(Base):
     __tablename__ = "employees"
+    __table_args__ = (
+        # Teilindizes nur über aktive Mitarbeiter (Listen, Suche, Filter)
+        Index("ix_employees_active_id", "id", postgresql_where=ACTIVE_PG, sqlite_where=ACTIVE_SQLITE),
+        Index("ix_employees_active_name_lower", func.lower(text("name")), "id", postgresql_where=ACTIVE_PG, sqlite_where=ACTIVE_SQLITE),
+        Index("ix_employees_active_federal_state", "federal_state", "name", postgresql_where=ACTIVE_PG, sqlite_where=ACTIVE_SQLITE),
+        Index("ix_employees_active_transporter_id", "transporter_id", postgresql_where=ACTIVE_PG, sqlite_where=ACTIVE_SQLITE),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -18,9 +29,25 @@ class Employee(Base):
     days_per_week = Column(Integer, default=5)
     is_flexible = Column(Boolean, default=True)
     prefers_six_days = Column(Boolean, default=False)
+    preferred_days = Column(JSON, nullable=True)  # bevorzugte Wochentage, 0 = Mo … 6 = So
     vehicle = Column(String)
     address = Column(String)
     is_active = Column(Boolean, default=True)
     federal_state = Column(String, nullable=True)  # z. B. "BY", "BW", "NRW"
 
     shifts = relationship("ShiftAssignment", back_populates="employee", cascade="all, delete-orphan")
+
+
+# PostgreSQL: Präfixsuche (LIKE 'abc%') unabhängig von der Collation und
+# Teilstring-Suche (LIKE '%abc%') über Trigramme. Angelegt von app.migrations
+# (auch in bestehenden Datenbanken); der Trigramm-Index braucht pg_trgm.
+POSTGRES_SEARCH_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_employees_active_name_pattern "
+    "ON employees (lower(name) text_pattern_ops) WHERE is_active",
+    "CREATE INDEX IF NOT EXISTS ix_employees_active_transporter_id_pattern "
+    "ON employees (transporter_id text_pattern_ops) WHERE is_active",
+)
+POSTGRES_TRGM_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_employees_active_name_trgm "
+    "ON employees USING gin (lower(name) gin_trgm_ops) WHERE is_active",
+)
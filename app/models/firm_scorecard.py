@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, Float
+from sqlalchemy import Column, Integer, Float, UniqueConstraint
 from app.database import Base
 
 class FirmScorecard(Base):
     __tablename__ = "scorecard_firms"
+    __table_args__ = (
+        # Eine Firmenzeile pro Woche; der Index dient auch Abfragen nach (year, week)
+        UniqueConstraint("year", "week", name="uq_scorecard_firms_year_week"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     week = Column(Integer)
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Boolean, Float, Enum
+from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
 
@@ -18,7 +19,5 @@ class FleetVehicle(Base):
     mileage = Column(Float)
     status = Column(Enum(VehicleStatus), default=VehicleStatus.active)
     is_active = Column(Boolean, default=True)
-from sqlalchemy.orm import relationship
 
-# Innerhalb der FleetVehicle-Klasse
-costs = relationship("VehicleCost", back_populates="vehicle", cascade="all, delete-orphan")
+    costs = relationship("VehicleCost", back_populates="vehicle", cascade="all, delete-orphan")
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, conint
+from typing import Dict, List, Optional
 import datetime
 from enum import Enum
 
@@ -16,8 +16,10 @@ class EmployeeBase(BaseModel):
     days_per_week: Optional[int] = None
     is_flexible: Optional[bool] = None
     prefers_six_days: Optional[bool] = None
+    preferred_days: Optional[List[conint(ge=0, le=6)]] = Field(default=None, max_length=7)  # 0 = Mo … 6 = So
     vehicle: Optional[str] = None
     address: Optional[str] = None
+    federal_state: Optional[str] = None  # z. B. "BY", "BW", "NRW"; ohne Bundesland keine Auto-Planung
 
 class EmployeeCreate(EmployeeBase):
     pass
@@ -32,6 +34,52 @@ class EmployeeOut(EmployeeBase):
     class Config:
         from_attributes = True
 
+class EmployeeSearchOut(BaseModel):
+    id: int
+    name: str
+    transporter_id: Optional[str] = None
+    federal_state: Optional[str] = None
+    vehicle: Optional[str] = None
+    is_flexible: Optional[bool] = None
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+class ScorecardDriverOut(BaseModel):
+    id: int
+    week: int
+    year: int
+    transporter_id: Optional[str] = None
+    employee_id: Optional[int] = None
+    name: Optional[str] = None
+    delivered: Optional[int] = None
+    dcr: Optional[float] = None
+    dnr_dpmo: Optional[int] = None
+    lor_dpmo: Optional[int] = None
+    pod: Optional[float] = None
+    cc: Optional[float] = None
+    ce: Optional[int] = None
+    dex: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class ScorecardTrendOut(BaseModel):
+    scope: str
+    subject: str
+    metric: str
+    year: int
+    week: int
+    value: Optional[float] = None
+    avg_4w: Optional[float] = None
+    avg_13w: Optional[float] = None
+    delta_4w: Optional[float] = None
+    delta_13w: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
 class VehicleStatus(str, Enum):
     active = "active"
     in_workshop = "in_workshop"
@@ -106,6 +154,14 @@ class ShiftAssignmentOut(ShiftAssignmentCreate):
 
     class Config:
         from_attributes = True
-class EmployeeBase(BaseModel):
-    ...
-    federal_state: Optional[str] = None
+
+class AbsenceCreate(BaseModel):
+    employee_id: int
+    start: datetime.date
+    end: Optional[datetime.date] = None  # ohne Ende: nur `start`
+    shift_type: ShiftType  # sick oder vacation
+
+class ShiftDemand(BaseModel):
+    # Benötigte Fahrer je Wochentag (Mo–So) und Abweichungen für einzelne Tage
+    weekday: Optional[List[conint(ge=0)]] = Field(default=None, min_length=7, max_length=7)
+    days: Dict[datetime.date, conint(ge=0)] = {}
@@ -1,17 +1,26 @@
-from sqlalchemy import Column, Integer, Float, String
-from app.database import Base  # <- sicherstellen, dass das importiert ist
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Index, UniqueConstraint
+from app.database import Base
 
 class ScorecardDriver(Base):
     __tablename__ = "scorecard_drivers"
+    __table_args__ = (
+        # Eine Zeile pro Fahrer und Woche
+        UniqueConstraint("transporter_id", "year", "week", name="uq_scorecard_drivers_driver_week"),
+        Index("ix_scorecard_drivers_year_week", "year", "week"),
+        # Verlauf je Fahrer als Index-Bereichsscan
+        Index("ix_scorecard_drivers_employee_year_week", "employee_id", "year", "week"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     week = Column(Integer)
     year = Column(Integer)
+    transporter_id = Column(String)  # normalisiert, siehe normalize_transporter_id
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="SET NULL"), nullable=True)
     name = Column(String)
     delivered = Column(Integer)
     dcr = Column(Float)
     dnr_dpmo = Column(Integer)
-    lor_dpmo = Column(Integer)  # <- NEU
+    lor_dpmo = Column(Integer)
     pod = Column(Float)
     cc = Column(Float)
     ce = Column(Integer)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, String, Index, UniqueConstraint
+from app.database import Base
+
+class ScorecardTrend(Base):
+    """
+    Gleitende Durchschnitte je Fahrer bzw. Firma und Kennzahl, gepflegt beim
+    Scorecard-Import (siehe app/services/scorecard_trends.py).
+    """
+    __tablename__ = "scorecard_trends"
+    __table_args__ = (
+        UniqueConstraint("scope", "subject", "metric", "year", "week", name="uq_scorecard_trends_subject_week"),
+        Index("ix_scorecard_trends_scope_year_week", "scope", "year", "week"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)    # "driver" oder "firm"
+    subject = Column(String, nullable=False)  # Transporter-ID bzw. "firm"
+    metric = Column(String, nullable=False)   # z. B. "dcr", "score"
+    year = Column(Integer, nullable=False)
+    week = Column(Integer, nullable=False)
+
+    value = Column(Float)     # Wert der Woche (leer, wenn die Kennzahl fehlt)
+    avg_4w = Column(Float)    # Durchschnitt der letzten 4 Kalenderwochen inkl. dieser
+    avg_13w = Column(Float)   # Durchschnitt der letzten 13 Kalenderwochen inkl. dieser
+    delta_4w = Column(Float)  # Veränderung von avg_4w zur Vorwoche
+    delta_13w = Column(Float) # Veränderung von avg_13w zur Vorwoche
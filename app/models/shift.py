@@ -1,5 +1,5 @@
 # app/models/shift.py
-from sqlalchemy import Column, Integer, Date, Enum, ForeignKey
+from sqlalchemy import Column, Integer, Date, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -13,6 +13,10 @@ class ShiftType(str, enum.Enum):
 
 class ShiftAssignment(Base):
     __tablename__ = "shift_assignments"
+    __table_args__ = (
+        # Wochenansicht, seitenweise nach (date, id)
+        Index("ix_shift_assignments_date_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Float, String, Date, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -12,6 +12,10 @@ class CostCategory(str, enum.Enum):
 
 class VehicleCost(Base):
     __tablename__ = "vehicle_costs"
+    __table_args__ = (
+        # Kosten je Fahrzeug, seitenweise nach (date, id)
+        Index("ix_vehicle_costs_vehicle_date_id", "vehicle_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     vehicle_id = Column(Integer, ForeignKey("fleet_vehicles.id"), nullable=False)
@@ -21,3 +25,32 @@ class VehicleCost(Base):
     amount = Column(Float, nullable=False)
 
     vehicle = relationship("FleetVehicle", back_populates="costs")
+
+
+# Vorverdichtete Summen je Fahrzeug, Kategorie und Tag bzw. Monat.
+# Werden beim Schreiben von Kosten in derselben Transaktion nachgeführt
+# (siehe app/services/cost_rollups.py); Zeitreihen lesen nur hieraus.
+
+class VehicleCostDaily(Base):
+    __tablename__ = "vehicle_cost_daily"
+    __table_args__ = (
+        Index("ix_vehicle_cost_daily_day", "day"),
+    )
+
+    vehicle_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    category = Column(Enum(CostCategory), primary_key=True)
+    amount = Column(Float, nullable=False, default=0.0)
+    entries = Column(Integer, nullable=False, default=0)
+
+class VehicleCostMonthly(Base):
+    __tablename__ = "vehicle_cost_monthly"
+    __table_args__ = (
+        Index("ix_vehicle_cost_monthly_month", "month"),
+    )
+
+    vehicle_id = Column(Integer, primary_key=True)
+    month = Column(Date, primary_key=True)  # erster Tag des Monats
+    category = Column(Enum(CostCategory), primary_key=True)
+    amount = Column(Float, nullable=False, default=0.0)
+    entries = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,648 @@
+"""
+Gemeinsame Import-Engine für Datei-Uploads (Mitarbeiter, Fahrzeuge, Kosten).
+
+- liest Excel im read-only-Modus zeilenweise (kein Laden der ganzen Datei),
+  CSV und Parquet blockweise mit pandas/pyarrow und konvertiert diese spaltenweise
+- prüft und konvertiert die Zeilen blockweise anhand einer ImportSpec
+- schreibt jeden Block mit einem mehrzeiligen INSERT bzw. einem Upsert
+  (ON CONFLICT auf den fachlichen Schlüssel, z. B. transporter_id)
+- sammelt Fehler je Zeile, statt den ganzen Import abzubrechen
+- prüft im Probelauf (`dry_run`) die ganze Datei, ohne etwas zu schreiben
+- misst die Stufen read/parse/validate/insert/commit (siehe import_stats)
+
+Speicherbedarf und Anzahl der Datenbank-Roundtrips hängen damit von der
+Blockgröße ab, nicht von der Zeilenzahl der Datei.
+"""
+import itertools
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+import openpyxl
+import pandas as pd
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.services.import_stats import ImportStats
+from app.services.jobs import Job, run_with_session
+from app.services.pagination import count_cache
+from app.utils.date_utils import parse_date_column, to_date
+
+settings = get_settings()
+
+# Höchstens so viele Fehlermeldungen werden zurückgegeben (gezählt werden alle)
+MAX_REPORTED_ERRORS = 1000
+# Schlüssel je IN-Abfrage beim Abgleich mit der DB im Probelauf
+KEY_LOOKUP_SIZE = 10_000
+
+Source = Union[str, "os.PathLike[str]", IO[bytes]]
+Coercer = Callable[[Any], Any]
+ChunkCheck = Callable[[Session, List[dict]], Dict[int, str]]
+ChunkHook = Callable[[Session, List[dict]], None]
+
+
+# ============================================================
+#                KONVERTIERUNG EINZELNER ZELLEN
+# ============================================================
+
+def to_str(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel liefert Zahlen-IDs als float
+    return str(value).strip()
+
+
+def to_int(value: Any) -> int:
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"Ganzzahl erwartet: {value}")
+    return int(number)
+
+
+def to_float(value: Any) -> float:
+    if isinstance(value, str):
+        value = value.strip().replace(",", ".")
+    return float(value)
+
+
+def to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    text = str(value).strip().lower()
+    if text in ("1", "true", "ja", "yes", "x", "wahr"):
+        return True
+    if text in ("0", "false", "nein", "no", "falsch"):
+        return False
+    raise ValueError(f"Wahrheitswert erwartet: {value}")
+
+
+def to_enum(enum_cls: Type[Enum]) -> Coercer:
+    def coerce(value: Any) -> Enum:
+        try:
+            return enum_cls(str(value).strip())
+        except ValueError:
+            allowed = ", ".join(member.value for member in enum_cls)
+            raise ValueError(f"Ungültiger Wert '{value}' (erlaubt: {allowed})")
+    return coerce
+
+
+# ============================================================
+#                IMPORT-DEFINITION UND ERGEBNIS
+# ============================================================
+
+@dataclass
+class ImportSpec:
+    model: Any
+    fields: Dict[str, Coercer]             # Spalte → Konvertierung (wirft ValueError)
+    required: Sequence[str]
+    key: Optional[str] = None               # Upsert-Schlüssel, sonst reiner INSERT
+    defaults: Dict[str, Any] = field(default_factory=dict)
+    check_chunk: Optional[ChunkCheck] = None  # Prüfung gegen die DB, eine Abfrage je Block
+    after_write: Optional[ChunkHook] = None   # z. B. Rollups nachführen, im selben Savepoint
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    error_count: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    dry_run: bool = False
+    max_errors: int = MAX_REPORTED_ERRORS
+    stats: ImportStats = field(default_factory=ImportStats)
+
+    def add_error(self, row: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((row, message))
+
+    def to_dict(self, label: str, with_stats: bool = False) -> dict:
+        if self.dry_run:
+            message = (
+                f"Probelauf: {self.inserted + self.updated} {label} gültig "
+                f"({self.inserted} neu, {self.updated} vorhanden), {self.error_count} Fehler. "
+                "Es wurde nichts gespeichert."
+            )
+        else:
+            message = f"{self.inserted + self.updated} {label} erfolgreich importiert."
+        return {
+            "message": message,
+            "dry_run": self.dry_run,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": [f"Zeile {row}: {message}" for row, message in sorted(self.errors)] or None,
+            **({"stats": self.stats.to_dict()} if with_stats else {}),
+        }
+
+
+# ============================================================
+#                LESEN
+# ============================================================
+
+def iter_excel_rows(source: Source) -> Iterator[tuple]:
+    """
+    Liefert die Zeilen des aktiven Blatts als Tupel (erste Zeile = Kopfzeile).
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _check_headers(headers: List[Optional[str]], spec: ImportSpec):
+    for name in spec.required:
+        if name not in headers:
+            raise HTTPException(status_code=400, detail=f"Erforderliches Feld '{name}' fehlt in der Datei")
+
+
+def _read_headers(rows: Iterator[tuple], spec: ImportSpec) -> List[Optional[str]]:
+    try:
+        headers = [str(value).strip() if value is not None else None for value in next(rows)]
+    except StopIteration:
+        raise HTTPException(status_code=400, detail="Die Datei enthält keine Kopfzeile")
+
+    _check_headers(headers, spec)
+    return headers
+
+
+def iter_csv_frames(source: Source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Liest eine CSV-Datei blockweise als DataFrames mit Textspalten.
+    Trennzeichen (Komma oder Semikolon) wird aus der Kopfzeile erkannt.
+    """
+    with _open_binary(source) as fh:
+        header = fh.readline()
+        fh.seek(0)
+        separator = ";" if header.count(b";") > header.count(b",") else ","
+        yield from pd.read_csv(
+            fh,
+            sep=separator,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""],
+            skipinitialspace=True,
+            encoding="utf-8-sig",
+            chunksize=chunk_size,
+        )
+
+
+def iter_parquet_frames(source: Source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Liest eine Parquet-Datei Batch für Batch (Speicherbedarf = ein Batch).
+    """
+    import pyarrow.parquet as pq
+
+    with _open_binary(source) as fh:
+        for batch in pq.ParquetFile(fh).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas(date_as_object=False)
+
+
+@contextmanager
+def _open_binary(source: Source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            yield fh
+    else:
+        yield source
+
+
+def _coerce_row(spec: ImportSpec, columns: List[Tuple[int, str]], row: tuple) -> dict:
+    values = dict(spec.defaults)
+    for index, name in columns:
+        value = row[index] if index < len(row) else None
+        if isinstance(value, str) and not value.strip():
+            value = None
+        if value is None:
+            if name in spec.required:
+                raise ValueError(f"Pflichtfeld '{name}' fehlt")
+            values[name] = spec.defaults.get(name)
+            continue
+        try:
+            values[name] = spec.fields[name](value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{name}: {e}")
+    return values
+
+
+def _text(series: pd.Series) -> pd.Series:
+    return series.astype("string").str.strip()
+
+
+def _str_column(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    if pd.api.types.is_float_dtype(series):
+        return series.map(to_str, na_action="ignore"), pd.Series(False, index=series.index)
+    return _text(series), pd.Series(False, index=series.index)
+
+
+def _int_column(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    numbers = pd.to_numeric(series if not pd.api.types.is_object_dtype(series) else _text(series), errors="coerce")
+    invalid = numbers.isna() | (numbers % 1 != 0)
+    return numbers.where(~invalid).astype("Int64"), invalid
+
+
+def _float_column(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    if not pd.api.types.is_numeric_dtype(series):
+        series = _text(series).str.replace(",", ".", regex=False)
+    numbers = pd.to_numeric(series, errors="coerce")
+    return numbers, numbers.isna()
+
+
+def _bool_column(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    if pd.api.types.is_bool_dtype(series):
+        return series, pd.Series(False, index=series.index)
+    if pd.api.types.is_numeric_dtype(series):
+        return series != 0, pd.Series(False, index=series.index)
+    text = _text(series).str.lower()
+    mapped = text.map(BOOL_VALUES)
+    return mapped, mapped.isna()
+
+
+def _date_column(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    parsed = parse_date_column(series)
+    return parsed.dt.date, parsed.isna()
+
+
+def _scalar_column(coerce: Coercer) -> Callable[[pd.Series], Tuple[pd.Series, pd.Series]]:
+    # Für eigene Konvertierungen (z. B. Enums, Beträge): Wert für Wert
+    def convert(series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        values, invalid = [], []
+        for value in series:
+            try:
+                values.append(coerce(value.strip() if isinstance(value, str) else value))
+                invalid.append(False)
+            except (TypeError, ValueError):
+                values.append(None)
+                invalid.append(True)
+        return pd.Series(values, index=series.index, dtype=object), pd.Series(invalid, index=series.index)
+    return convert
+
+
+BOOL_VALUES = {
+    "1": True, "true": True, "ja": True, "yes": True, "x": True, "wahr": True,
+    "0": False, "false": False, "nein": False, "no": False, "falsch": False,
+}
+
+VECTOR_COERCERS = {
+    to_str: _str_column,
+    to_int: _int_column,
+    to_float: _float_column,
+    to_bool: _bool_column,
+    to_date: _date_column,
+}
+
+
+def _constant(value: Any, index: pd.Index) -> pd.Series:
+    # Als Objekt-Spalte, sonst macht pandas aus str-Enums (CostCategory.other) numpy-Strings
+    return pd.Series([value] * len(index), index=index, dtype=object)
+
+
+def _coerce_frame(spec: ImportSpec, frame: pd.DataFrame, first_row: int) -> Iterator[Tuple[int, Any]]:
+    """
+    Konvertiert einen Block spaltenweise. Liefert (Zeilennummer, Werte-dict)
+    bzw. (Zeilennummer, Fehlermeldung als str) für ungültige Zeilen.
+    """
+    row_numbers = range(first_row, first_row + len(frame))
+    frame = frame.reset_index(drop=True)
+    errors = pd.Series("", index=frame.index, dtype=object)
+    out = {name: _constant(value, frame.index) for name, value in spec.defaults.items()}
+
+    for name, coerce in spec.fields.items():
+        if name not in frame.columns:
+            continue
+        raw = frame[name]
+        if pd.api.types.is_object_dtype(raw) or pd.api.types.is_string_dtype(raw):
+            raw = raw.where(_text(raw).fillna("") != "")
+        present = raw.notna()
+
+        converter = VECTOR_COERCERS.get(coerce) or _scalar_column(coerce)
+        values, invalid = converter(raw)
+        invalid = invalid.fillna(True).astype(bool) & present
+
+        if name in spec.required:
+            errors[~present] += f"Pflichtfeld '{name}' fehlt; "
+        errors[invalid] += f"{name}: ungültiger Wert; "
+
+        column = values.astype(object).where(present & ~invalid, None)
+        if name in spec.defaults:
+            column = column.where(present, _constant(spec.defaults[name], frame.index))
+        out[name] = column
+
+    blank = frame.isna().all(axis=1).to_numpy()
+    records = pd.DataFrame(out, index=frame.index).to_dict("records")
+    for position, (row_number, values) in enumerate(zip(row_numbers, records)):
+        if blank[position]:
+            continue
+        message = errors[position]
+        yield row_number, (message[:-2] if message else values)
+
+
+# ============================================================
+#                SCHREIBEN
+# ============================================================
+
+def dialect_insert(dialect: str):
+    # INSERT mit ON CONFLICT, sofern der Dialekt es unterstützt
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    else:
+        return None
+    return upsert
+
+
+def _write_chunk(db: Session, spec: ImportSpec, chunk: List[dict], update_columns: List[str]) -> Tuple[int, int]:
+    """
+    Schreibt einen Block und gibt (eingefügt, aktualisiert) zurück. Vorhandene
+    Datensätze werden nur in den Spalten der Datei (`update_columns`) geändert.
+    """
+    if spec.key is None:
+        db.execute(insert(spec.model), chunk)
+        return len(chunk), 0
+
+    key_column = getattr(spec.model, spec.key)
+    keys = [values[spec.key] for values in chunk]
+    existing = dict(db.query(key_column, spec.model.id).filter(key_column.in_(keys)).all())
+
+    upsert = dialect_insert(db.get_bind().dialect.name)
+    if upsert is not None:
+        stmt = upsert(spec.model.__table__)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[spec.key],
+                set_={name: stmt.excluded[name] for name in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[spec.key])
+        db.execute(stmt, chunk)
+    else:
+        # Ohne ON CONFLICT: neue Zeilen einfügen, vorhandene über den Primärschlüssel aktualisieren
+        new_rows = [values for values in chunk if values[spec.key] not in existing]
+        updates = [
+            {"id": existing[values[spec.key]], **{name: values[name] for name in update_columns}}
+            for values in chunk if values[spec.key] in existing
+        ]
+        if new_rows:
+            db.execute(insert(spec.model), new_rows)
+        if updates and update_columns:
+            db.execute(update(spec.model), updates)
+
+    return len(chunk) - len(existing), len(existing)
+
+
+def _check_chunk(db: Session, spec: ImportSpec, chunk: List[Tuple[int, dict]], result: ImportResult) -> List[Tuple[int, dict]]:
+    # Prüfung gegen die DB (z. B. Fremdschlüssel); liefert die gültigen Zeilen
+    if not spec.check_chunk:
+        return chunk
+    failed = spec.check_chunk(db, [values for _, values in chunk])
+    for position, message in sorted(failed.items()):
+        result.add_error(chunk[position][0], message)
+    return [item for position, item in enumerate(chunk) if position not in failed]
+
+
+def _existing_keys(db: Session, spec: ImportSpec, keys: List[Any]) -> set:
+    key_column = getattr(spec.model, spec.key)
+    existing = set()
+    for start in range(0, len(keys), KEY_LOOKUP_SIZE):
+        batch = keys[start:start + KEY_LOOKUP_SIZE]
+        existing.update(key for (key,) in db.query(key_column).filter(key_column.in_(batch)))
+    return existing
+
+
+def _flush_chunk(
+    db: Session, spec: ImportSpec, chunk: List[Tuple[int, dict]], update_columns: List[str], result: ImportResult
+):
+    chunk = _check_chunk(db, spec, chunk, result)
+    if not chunk:
+        return
+
+    try:
+        # Savepoint je Block: ein fehlerhafter Block verwirft nicht den ganzen Import
+        with result.stats.stage("insert"), db.begin_nested():
+            result.stats.count("batches")
+            rows = [values for _, values in chunk]
+            inserted, updated = _write_chunk(db, spec, rows, update_columns)
+            if spec.after_write:
+                spec.after_write(db, rows)
+    except SQLAlchemyError as e:
+        message = str(getattr(e, "orig", e)).splitlines()[0]
+        for row_number, _ in chunk:
+            result.add_error(row_number, f"Datenbankfehler: {message}")
+        return
+    except ValueError as e:
+        # z. B. after_write (Rollups) mit einem Wert, den die Konvertierung durchgelassen hat
+        for row_number, _ in chunk:
+            result.add_error(row_number, f"Ungültige Daten im Block: {e}")
+        return
+
+    result.inserted += inserted
+    result.updated += updated
+
+
+def _import_records(
+    db: Session,
+    spec: ImportSpec,
+    records: Iterable[Tuple[int, Any]],
+    update_columns: List[str],
+    chunk_size: int,
+    dry_run: bool = False,
+    stats: Optional[ImportStats] = None,
+) -> ImportResult:
+    """
+    Gemeinsamer Schreibpfad: Duplikate prüfen, blockweise schreiben, am Ende committen.
+    `records` liefert (Zeilennummer, Werte-dict) bzw. (Zeilennummer, Fehlermeldung).
+
+    Im Probelauf werden dieselben Prüfungen ausgeführt, aber nichts geschrieben;
+    ob ein Schlüssel schon existiert, klärt am Ende ein gesammelter Abgleich.
+    """
+    stats = stats or ImportStats()
+    if dry_run:
+        result = ImportResult(dry_run=True, max_errors=settings.IMPORT_DRY_RUN_MAX_ERRORS, stats=stats)
+    else:
+        result = ImportResult(stats=stats)
+    seen_keys: Dict[Any, int] = {}
+    chunk: List[Tuple[int, dict]] = []
+    # Probelauf: nur Anzahl und Schlüssel der gültigen Zeilen, nicht die Zeilen selbst
+    valid_count = 0
+    valid_keys: List[Any] = []
+
+    def flush(chunk: List[Tuple[int, dict]]):
+        nonlocal valid_count
+        if dry_run:
+            checked = _check_chunk(db, spec, chunk, result)
+            valid_count += len(checked)
+            if spec.key:
+                valid_keys.extend(values[spec.key] for _, values in checked)
+        else:
+            _flush_chunk(db, spec, chunk, update_columns, result)
+
+    # Alles, was nicht Lesen/Konvertieren/Schreiben ist, zählt als Prüfung
+    with stats.stage("validate"):
+        for row_number, values in stats.timed(records, "parse"):
+            stats.count("rows")
+            if isinstance(values, str):
+                result.add_error(row_number, values)
+                continue
+
+            if spec.key:
+                first = seen_keys.setdefault(values[spec.key], row_number)
+                if first != row_number:
+                    result.add_error(row_number, f"{spec.key} '{values[spec.key]}' doppelt (bereits in Zeile {first})")
+                    continue
+
+            chunk.append((row_number, values))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+
+        if chunk:
+            flush(chunk)
+
+        if dry_run:
+            existing = _existing_keys(db, spec, valid_keys) if spec.key else set()
+            result.updated = len(existing)
+            result.inserted = valid_count - len(existing)
+
+    if dry_run:
+        db.rollback()
+    else:
+        with stats.stage("commit"):
+            db.commit()
+        count_cache.invalidate(spec.model.__tablename__)
+
+    stats.log(
+        spec.model.__tablename__, dry_run=dry_run,
+        inserted=result.inserted, updated=result.updated, error_count=result.error_count,
+    )
+    return result
+
+
+def run_import(
+    db: Session,
+    spec: ImportSpec,
+    rows: Iterable[tuple],
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    stats: Optional[ImportStats] = None,
+) -> ImportResult:
+    """
+    Importiert Zeilen (erste Zeile = Kopfzeile) und committet am Ende.
+    Zeilennummern in Fehlermeldungen entsprechen denen der Datei.
+    """
+    stats = stats or ImportStats()
+    rows = stats.timed(rows, "read")
+    headers = _read_headers(rows, spec)
+    columns = [(index, name) for index, name in enumerate(headers) if name in spec.fields]
+    update_columns = [name for _, name in columns if name != spec.key]
+
+    def records() -> Iterator[Tuple[int, Any]]:
+        for row_number, row in enumerate(rows, start=2):
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in row):
+                continue
+            try:
+                yield row_number, _coerce_row(spec, columns, row)
+            except ValueError as e:
+                yield row_number, str(e)
+
+    return _import_records(db, spec, records(), update_columns, chunk_size or settings.IMPORT_CHUNK_SIZE, dry_run, stats)
+
+
+def run_frame_import(
+    db: Session,
+    spec: ImportSpec,
+    frames: Iterator[pd.DataFrame],
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    stats: Optional[ImportStats] = None,
+) -> ImportResult:
+    """
+    Wie run_import, aber für DataFrame-Blöcke (CSV/Parquet) mit spaltenweiser Konvertierung.
+    """
+    stats = stats or ImportStats()
+    frames = stats.timed(frames, "read")
+    first = next(frames, None)
+    if first is None:
+        raise HTTPException(status_code=400, detail="Die Datei enthält keine Kopfzeile")
+    first.columns = [str(name).strip() for name in first.columns]
+    _check_headers(list(first.columns), spec)
+    update_columns = [name for name in first.columns if name in spec.fields and name != spec.key]
+
+    def records() -> Iterator[Tuple[int, Any]]:
+        row_number = 2
+        for frame in itertools.chain([first], frames):
+            frame.columns = [str(name).strip() for name in frame.columns]
+            yield from _coerce_frame(spec, frame, row_number)
+            row_number += len(frame)
+
+    return _import_records(db, spec, records(), update_columns, chunk_size or settings.IMPORT_CHUNK_SIZE, dry_run, stats)
+
+
+def import_excel(
+    db: Session, spec: ImportSpec, source: Source, dry_run: bool = False, stats: Optional[ImportStats] = None
+) -> ImportResult:
+    return run_import(db, spec, iter_excel_rows(source), dry_run=dry_run, stats=stats)
+
+
+FILE_FORMATS = {".xlsx": "xlsx", ".xlsm": "xlsx", ".csv": "csv", ".parquet": "parquet"}
+
+
+def detect_format(filename: str) -> str:
+    fmt = FILE_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+    if fmt is None:
+        allowed = ", ".join(FILE_FORMATS)
+        raise HTTPException(status_code=400, detail=f"Nicht unterstütztes Dateiformat (erlaubt: {allowed})")
+    return fmt
+
+
+def import_file(db: Session, spec: ImportSpec, source: Source, fmt: str, dry_run: bool = False) -> ImportResult:
+    """
+    Import aus Excel, CSV oder Parquet. CSV/Parquet werden mit pandas/pyarrow
+    blockweise gelesen und spaltenweise konvertiert. Mit `dry_run` wird die
+    Datei nur geprüft.
+    """
+    chunk_size = settings.IMPORT_CHUNK_SIZE
+    stats = ImportStats()
+    stats.count_source_bytes(source)
+    if fmt == "csv":
+        return run_frame_import(db, spec, iter_csv_frames(source, chunk_size), dry_run=dry_run, stats=stats)
+    if fmt == "parquet":
+        return run_frame_import(db, spec, iter_parquet_frames(source, chunk_size), dry_run=dry_run, stats=stats)
+    return import_excel(db, spec, source, dry_run=dry_run, stats=stats)
+
+
+# ============================================================
+#                UPLOADS
+# ============================================================
+
+async def spool_upload(file: UploadFile) -> str:
+    """
+    Kopiert einen Upload blockweise in eine temporäre Datei (für Hintergrund-Jobs,
+    die nach dem Ende der Anfrage noch auf die Datei zugreifen).
+    """
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(file.filename or "")[1])
+    with os.fdopen(fd, "wb") as target:
+        while True:
+            block = await file.read(1024 * 1024)
+            if not block:
+                break
+            target.write(block)
+    return path
+
+
+async def import_spooled_job(job: Job, importer: Callable[..., dict], path: str, *args: Any) -> dict:
+    """
+    Hintergrund-Job für einen gespoolten Upload; die temporäre Datei wird danach gelöscht.
+    """
+    try:
+        return await run_with_session(importer, path, *args)
+    finally:
+        os.remove(path)
@@ -0,0 +1,243 @@
+"""
+Tages- und Monatssummen der Fahrzeugkosten (Rollups) und Zeitreihen daraus.
+
+`vehicle_cost_daily` und `vehicle_cost_monthly` halten je Fahrzeug, Kategorie
+und Tag bzw. Monat die Summe und die Anzahl der Belege. Jeder Schreibpfad
+(Anlegen, Löschen, Datei-Import) bucht seine Kosten mit `book_costs` in
+derselben Transaktion nach; Zeitreihen lesen nur aus den Rollups und damit
+wenige hundert Zeilen statt aller Belege.
+
+Für Bestandsdaten bzw. nach Änderungen an der DB vorbei baut
+`rebuild_rollups` beide Tabellen aus `vehicle_costs` neu auf.
+"""
+import datetime
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.vehicle_cost import CostCategory, VehicleCost, VehicleCostDaily, VehicleCostMonthly
+from app.services.bulk_import import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+BUCKET_PATTERN = "^(day|week|month|year)$"
+
+Key = Tuple[int, datetime.date, CostCategory]
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def _next_month(day: datetime.date) -> datetime.date:
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def bucket_start(day: datetime.date, bucket: str) -> datetime.date:
+    if bucket == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == "month":
+        return month_start(day)
+    if bucket == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def _next_bucket(start: datetime.date, bucket: str) -> datetime.date:
+    if bucket == "day":
+        return start + datetime.timedelta(days=1)
+    if bucket == "week":
+        return start + datetime.timedelta(days=7)
+    if bucket == "month":
+        return _next_month(start)
+    return start.replace(year=start.year + 1)
+
+
+# (Modell, Spalte des Zeitraums, Zuordnung Belegdatum → Zeitraum)
+ROLLUPS = (
+    (VehicleCostDaily, "day", lambda day: day),
+    (VehicleCostMonthly, "month", month_start),
+)
+
+
+# ============================================================
+#                NACHFÜHREN
+# ============================================================
+
+def _upsert(db: Session, model: Any, period: str, deltas: Dict[Key, List[float]]):
+    rows = [
+        {"vehicle_id": vehicle_id, period: start, "category": category, "amount": amount, "entries": entries}
+        for (vehicle_id, start, category), (amount, entries) in deltas.items()
+    ]
+    upsert = dialect_insert(db.get_bind().dialect.name)
+    if upsert is not None:
+        table = model.__table__
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["vehicle_id", period, "category"],
+            set_={
+                "amount": table.c.amount + stmt.excluded.amount,
+                "entries": table.c.entries + stmt.excluded.entries,
+            },
+        )
+        db.execute(stmt, rows)
+    else:
+        # Ohne ON CONFLICT: Zeile für Zeile über den Primärschlüssel
+        for row in rows:
+            current = db.get(model, (row["vehicle_id"], row[period], row["category"]))
+            if current is None:
+                db.add(model(**row))
+            else:
+                current.amount += row["amount"]
+                current.entries += row["entries"]
+        db.flush()
+
+    # Leere Summen entfernen (alle Belege gelöscht); vermeidet Rundungsreste
+    vehicle_ids = {vehicle_id for vehicle_id, _, _ in deltas}
+    db.query(model).filter(model.vehicle_id.in_(vehicle_ids), model.entries <= 0).delete(synchronize_session=False)
+
+
+def book_costs(db: Session, costs: Iterable[dict], sign: int = 1):
+    """
+    Bucht Kosten (dicts mit vehicle_id, date, category, amount) in die Rollups;
+    `sign=-1` bucht sie wieder aus. Committet nicht.
+    """
+    costs = list(costs)
+    if not costs:
+        return
+    for model, period, to_period in ROLLUPS:
+        deltas: Dict[Key, List[float]] = {}
+        for cost in costs:
+            key = (cost["vehicle_id"], to_period(cost["date"]), CostCategory(cost["category"]))
+            delta = deltas.setdefault(key, [0.0, 0])
+            delta[0] += sign * cost["amount"]
+            delta[1] += sign
+        _upsert(db, model, period, deltas)
+
+
+def cost_values(cost: VehicleCost) -> dict:
+    return {"vehicle_id": cost.vehicle_id, "date": cost.date, "category": cost.category, "amount": cost.amount}
+
+
+def rebuild_rollups(db: Session) -> int:
+    """
+    Baut beide Rollups aus `vehicle_costs` neu auf und gibt die Zahl der
+    Tageszeilen zurück. Committet nicht.
+    """
+    db.query(VehicleCostDaily).delete(synchronize_session=False)
+    db.query(VehicleCostMonthly).delete(synchronize_session=False)
+
+    daily = (
+        select(
+            VehicleCost.vehicle_id, VehicleCost.date, VehicleCost.category,
+            func.sum(VehicleCost.amount), func.count(),
+        )
+        .group_by(VehicleCost.vehicle_id, VehicleCost.date, VehicleCost.category)
+    )
+    db.execute(insert(VehicleCostDaily).from_select(["vehicle_id", "day", "category", "amount", "entries"], daily))
+
+    # Monatssummen aus den Tageszeilen; Monatsgrenzen unabhängig vom Dialekt in Python
+    monthly: Dict[Key, List[float]] = {}
+    day_rows = 0
+    for vehicle_id, day, category, amount, entries in db.execute(
+        select(VehicleCostDaily.vehicle_id, VehicleCostDaily.day, VehicleCostDaily.category,
+               VehicleCostDaily.amount, VehicleCostDaily.entries)
+    ):
+        day_rows += 1
+        total = monthly.setdefault((vehicle_id, month_start(day), category), [0.0, 0])
+        total[0] += amount
+        total[1] += entries
+    if monthly:
+        db.execute(insert(VehicleCostMonthly), [
+            {"vehicle_id": vehicle_id, "month": month, "category": category, "amount": amount, "entries": entries}
+            for (vehicle_id, month, category), (amount, entries) in monthly.items()
+        ])
+    return day_rows
+
+
+def ensure_rollups():
+    """
+    Beim Start: Rollups einmalig aufbauen, wenn es Kosten, aber noch keine
+    Tagessummen gibt (z. B. nach dem Einspielen dieser Version).
+    """
+    with get_db() as db:
+        if db.query(VehicleCostDaily.vehicle_id).first() is not None:
+            return
+        if db.query(VehicleCost.id).first() is None:
+            return
+        rows = rebuild_rollups(db)
+        db.commit()
+        logger.info(f"Kosten-Rollups aufgebaut ({rows} Tageszeilen)")
+
+
+# ============================================================
+#                ZEITREIHEN
+# ============================================================
+
+def _periods(first: datetime.date, last: datetime.date, bucket: str) -> Iterator[datetime.date]:
+    current = first
+    while current <= last:
+        yield current
+        current = _next_bucket(current, bucket)
+
+
+def cost_timeseries(
+    db: Session,
+    bucket: str = "month",
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    vehicle_ids: Optional[Sequence[int]] = None,
+    categories: Optional[Sequence[CostCategory]] = None,
+) -> dict:
+    """
+    Kosten je Zeitraum (Tag, Woche ab Montag, Monat, Jahr) mit Aufschlüsselung
+    nach Kategorie. Tage und Wochen kommen aus den Tages-, Monate und Jahre aus
+    den Monatssummen; `start`/`end` werden auf ganze Zeiträume erweitert.
+    Zeiträume ohne Kosten erscheinen mit 0, damit Diagramme lückenlos sind.
+    """
+    model, period = (VehicleCostDaily, "day") if bucket in ("day", "week") else (VehicleCostMonthly, "month")
+    column = getattr(model, period)
+
+    query = db.query(column, model.category, func.sum(model.amount), func.sum(model.entries))
+    if start:
+        start = bucket_start(start, bucket)
+        query = query.filter(column >= start)
+    if end:
+        end = _next_bucket(bucket_start(end, bucket), bucket) - datetime.timedelta(days=1)
+        query = query.filter(column <= end)
+    if vehicle_ids:
+        query = query.filter(model.vehicle_id.in_(vehicle_ids))
+    if categories:
+        query = query.filter(model.category.in_(categories))
+    rows = query.group_by(column, model.category).order_by(column).all()
+
+    series: Dict[datetime.date, dict] = {}
+    for day, category, amount, entries in rows:
+        point = series.setdefault(bucket_start(day, bucket), {"total": 0.0, "entries": 0, "by_category": {}})
+        point["total"] += amount
+        point["entries"] += entries
+        point["by_category"][category.value] = point["by_category"].get(category.value, 0.0) + amount
+
+    first = bucket_start(start, bucket) if start else min(series, default=None)
+    last = bucket_start(end, bucket) if end else max(series, default=None)
+    points = []
+    if first is not None and last is not None:
+        for period_start in _periods(first, last, bucket):
+            point = series.get(period_start, {"total": 0.0, "entries": 0, "by_category": {}})
+            points.append({
+                "period": period_start,
+                "total": round(point["total"], 2),
+                "entries": point["entries"],
+                "by_category": {name: round(amount, 2) for name, amount in point["by_category"].items()},
+            })
+
+    return {
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "total": round(sum(point["total"] for point in points), 2),
+        "series": points,
+    }
@@ -0,0 +1,84 @@
+"""
+Kostenübersichten für Fahrzeuge, vollständig in SQL aggregiert.
+
+Die Zeitfenster (gesamt, letzte 90 und 30 Tage) werden als bedingte Summen
+(`SUM(CASE WHEN date >= :ab THEN amount ELSE 0 END)`) in einem einzigen
+Durchlauf berechnet – statt alle Kostenzeilen zu laden und in Python zu summieren.
+"""
+import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.fleet import FleetVehicle
+from app.models.vehicle_cost import VehicleCost
+
+WINDOWS = {"last_90_days": 90, "last_30_days": 30}
+
+
+def _window_sums(today: datetime.date) -> list:
+    columns = [func.coalesce(func.sum(VehicleCost.amount), 0.0).label("total_all")]
+    for name, days in WINDOWS.items():
+        since = today - datetime.timedelta(days=days)
+        columns.append(
+            func.coalesce(func.sum(case((VehicleCost.date >= since, VehicleCost.amount), else_=0.0)), 0.0).label(name)
+        )
+    return columns
+
+
+def _empty() -> Dict[str, float]:
+    return {"total_all": 0.0, **{name: 0.0 for name in WINDOWS}}
+
+
+def _add(target: Dict[str, float], row) -> None:
+    target["total_all"] += row.total_all
+    for name in WINDOWS:
+        target[name] += getattr(row, name)
+
+
+def vehicle_summary(db: Session, vehicle_id: int, today: Optional[datetime.date] = None) -> Dict[str, float]:
+    """
+    Summen eines Fahrzeugs über alle Zeitfenster, eine Abfrage.
+    """
+    today = today or datetime.date.today()
+    row = db.query(*_window_sums(today)).filter(VehicleCost.vehicle_id == vehicle_id).one()
+    return {"total_all": row.total_all, **{name: getattr(row, name) for name in WINDOWS}}
+
+
+def fleet_summary(db: Session, today: Optional[datetime.date] = None) -> dict:
+    """
+    Summen und Aufschlüsselung nach Kategorie für alle aktiven Fahrzeuge.
+
+    Eine gruppierte Abfrage über (Fahrzeug, Kategorie); Fahrzeuge ohne Kosten
+    erscheinen über den LEFT JOIN mit Nullwerten.
+    """
+    today = today or datetime.date.today()
+    rows = (
+        db.query(FleetVehicle.id, FleetVehicle.license_plate, VehicleCost.category, *_window_sums(today))
+        .outerjoin(VehicleCost, VehicleCost.vehicle_id == FleetVehicle.id)
+        .filter(FleetVehicle.is_active == True)
+        .group_by(FleetVehicle.id, FleetVehicle.license_plate, VehicleCost.category)
+        .order_by(FleetVehicle.license_plate)
+        .all()
+    )
+
+    vehicles: Dict[int, dict] = {}
+    totals = {**_empty(), "by_category": {}}
+    for row in rows:
+        vehicle = vehicles.setdefault(row.id, {
+            "vehicle_id": row.id,
+            "license_plate": row.license_plate,
+            **_empty(),
+            "by_category": {},
+        })
+        if row.category is None:
+            continue
+        category = row.category.value
+        _add(vehicle, row)
+        _add(vehicle["by_category"].setdefault(category, _empty()), row)
+        _add(totals, row)
+        _add(totals["by_category"].setdefault(category, _empty()), row)
+
+    vehicle_list: List[dict] = list(vehicles.values())
+    return {"as_of": today, "vehicles": vehicle_list, "totals": totals}
@@ -0,0 +1,127 @@
+"""
+Fahrer-Scoring auf Basis der gespeicherten Scorecard-Werte.
+
+Alle Fahrer einer oder mehrerer Wochen werden als pandas-Spalten geladen und in
+einem vektorisierten Durchlauf bewertet:
+- je Kennzahl ein Teilscore 0–100 (linear zwischen "Poor"- und "Fantastic"-Schwelle)
+- gewichteter Gesamtscore über die vorhandenen Kennzahlen
+- Stufe Fantastic/Great/Fair/Poor wie auf der Firmenseite der Scorecard
+- Perzentil und Rang je Woche
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.scorecard_driver import ScorecardDriver
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    weight: float
+    fantastic: float  # ab hier 100 Punkte
+    poor: float       # ab hier 0 Punkte; liegt unter "fantastic", wenn kleiner besser ist
+
+
+METRICS: Dict[str, MetricSpec] = {
+    "dcr": MetricSpec(weight=0.25, fantastic=99.5, poor=97.0),
+    "dnr_dpmo": MetricSpec(weight=0.25, fantastic=1000, poor=3000),
+    "lor_dpmo": MetricSpec(weight=0.05, fantastic=0, poor=300),
+    "pod": MetricSpec(weight=0.10, fantastic=99.0, poor=90.0),
+    "cc": MetricSpec(weight=0.10, fantastic=98.0, poor=85.0),
+    "ce": MetricSpec(weight=0.10, fantastic=0, poor=3),
+    "dex": MetricSpec(weight=0.15, fantastic=95.0, poor=80.0),
+}
+
+# Untergrenzen des Gesamtscores je Stufe, absteigend
+TIERS = [("Fantastic", 90.0), ("Great", 80.0), ("Fair", 70.0), ("Poor", -np.inf)]
+
+BASE_COLUMNS = ["year", "week", "transporter_id", "employee_id", "name", "delivered"]
+# Ganzzahlige Spalten mit möglichen NULL-Werten (sonst macht pandas daraus float)
+INT_COLUMNS = ["employee_id", "delivered", "dnr_dpmo", "lor_dpmo", "ce"]
+
+
+def load_driver_frame(db: Session, weeks: List[tuple]) -> pd.DataFrame:
+    """
+    Lädt die Fahrerzeilen der angegebenen (year, week)-Paare als DataFrame
+    (Abfrage über ix_scorecard_drivers_year_week).
+    """
+    columns = BASE_COLUMNS + list(METRICS)
+    if not weeks:
+        return pd.DataFrame(columns=columns).astype({name: "Int64" for name in INT_COLUMNS})
+
+    stmt = select(*(getattr(ScorecardDriver, name) for name in columns))
+    if len(weeks) == 1:
+        year, week = weeks[0]
+        stmt = stmt.where(ScorecardDriver.year == year, ScorecardDriver.week == week)
+    else:
+        stmt = stmt.where(tuple_(ScorecardDriver.year, ScorecardDriver.week).in_(weeks))
+
+    frame = pd.DataFrame(db.execute(stmt).all(), columns=columns)
+    return frame.astype({name: "Int64" for name in INT_COLUMNS})
+
+
+def score_drivers(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ergänzt Teilscores, Gesamtscore, Stufe, Perzentil und Rang (je Woche).
+    Fehlende Kennzahlen (z. B. LoR bei alten Scorecards) gehen nicht in die
+    Gewichtung ein.
+    """
+    frame = frame.copy()
+    if frame.empty:
+        for column in ["score", "tier", "percentile", "rank"]:
+            frame[column] = pd.Series(dtype=object)
+        return frame
+
+    metric_names = list(METRICS)
+    values = frame[metric_names].to_numpy(dtype=float, na_value=np.nan)
+    fantastic = np.array([METRICS[name].fantastic for name in metric_names])
+    poor = np.array([METRICS[name].poor for name in metric_names])
+    weights = np.array([METRICS[name].weight for name in metric_names])
+
+    partial = np.clip((values - poor) / (fantastic - poor), 0.0, 1.0) * 100.0
+    present = ~np.isnan(partial)
+    weight_sum = (present * weights).sum(axis=1)
+    weighted = np.where(present, partial, 0.0) @ weights
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.where(weight_sum > 0, weighted / weight_sum, np.nan)
+
+    for index, name in enumerate(metric_names):
+        frame[f"{name}_score"] = np.round(partial[:, index], 2)
+    frame["score"] = np.round(score, 2)
+
+    labels = [label for label, _ in TIERS]
+    bounds = [bound for _, bound in TIERS]
+    tier = np.select([score >= bound for bound in bounds], labels, default=None)
+    frame["tier"] = np.where(np.isnan(score), None, tier)
+
+    by_week = frame.groupby(["year", "week"])["score"]
+    frame["percentile"] = np.round(by_week.rank(pct=True, method="max") * 100.0, 1)
+    frame["rank"] = by_week.rank(ascending=False, method="min").astype("Int64")
+    return frame
+
+
+def leaderboard(
+    db: Session,
+    year: int,
+    week: int,
+    tier: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[dict]:
+    """
+    Rangliste einer Woche, bester Fahrer zuerst.
+    """
+    frame = score_drivers(load_driver_frame(db, [(year, week)]))
+    if tier:
+        frame = frame[frame["tier"] == tier]
+
+    frame = frame.sort_values(["rank", "transporter_id"], na_position="last")
+    if limit:
+        frame = frame.head(limit)
+
+    # NaN/NA → None für die JSON-Antwort
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
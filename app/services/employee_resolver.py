@@ -0,0 +1,97 @@
+"""
+Auflösung Transporter-ID → Mitarbeiter für Scorecard-Importe.
+
+Statt bei jedem Upload alle Mitarbeiter zu laden, hält der Resolver eine
+prozessweite Zuordnung normalisierte Transporter-ID → (id, name). Fehlende IDs
+werden gesammelt mit einer einzigen `WHERE transporter_id IN (...)`-Abfrage
+nachgeladen; die Kosten hängen damit von der Größe des Reports ab, nicht von der
+Belegschaft. Unbekannte IDs werden nicht gemerkt: ein in einem anderen Prozess
+angelegter Mitarbeiter wird beim nächsten Upload gefunden.
+
+Anlegen, Ändern, Löschen und der Excel-Import von Mitarbeitern rufen
+`employee_resolver.invalidate()` auf; das wirkt nur im eigenen Prozess, die TTL
+begrenzt veraltete Zuordnungen in den übrigen Workern.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.employee import Employee
+from app.services.scorecard_parser import normalize_transporter_id
+
+settings = get_settings()
+
+# Obergrenze für gemerkte IDs, danach wird der Cache geleert
+MAX_CACHED_IDS = 50_000
+
+
+@dataclass(frozen=True)
+class ResolvedEmployee:
+    id: int
+    name: str
+
+
+class EmployeeResolver:
+    def __init__(self, max_entries: int = MAX_CACHED_IDS, ttl: float = settings.EMPLOYEE_RESOLVER_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[ResolvedEmployee, float]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def resolve(self, db: Session, transporter_ids: Iterable[str]) -> Dict[str, ResolvedEmployee]:
+        """
+        Liefert für jede bekannte (normalisierte) Transporter-ID den Mitarbeiter.
+        Unbekannte IDs fehlen im Ergebnis.
+        """
+        wanted = {normalize_transporter_id(tid) for tid in transporter_ids if tid}
+
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation
+            cached = {
+                tid: entry[0] for tid in wanted
+                if (entry := self._entries.get(tid)) and now - entry[1] < self.ttl
+            }
+        missing = wanted - cached.keys()
+
+        if missing:
+            loaded = self._load(db, missing)
+            with self._lock:
+                # Während der Abfrage invalidiert: Ergebnis verwenden, aber nicht merken
+                if generation == self._generation:
+                    if len(self._entries) + len(loaded) > self.max_entries:
+                        self._entries.clear()
+                    self._entries.update((tid, (employee, now)) for tid, employee in loaded.items())
+            cached.update(loaded)
+
+        return cached
+
+    @staticmethod
+    def _load(db: Session, normalized_ids: set) -> Dict[str, ResolvedEmployee]:
+        # In der DB kann die ID noch ohne führendes "A" stehen (siehe normalize_transporter_id)
+        candidates = set(normalized_ids)
+        candidates.update(tid[1:] for tid in normalized_ids if tid.startswith("A") and len(tid) == 14)
+
+        rows = (
+            db.query(Employee.id, Employee.name, Employee.transporter_id)
+            .filter(Employee.transporter_id.in_(candidates))
+            .all()
+        )
+
+        loaded: Dict[str, ResolvedEmployee] = {}
+        for employee_id, name, transporter_id in rows:
+            loaded[normalize_transporter_id(transporter_id)] = ResolvedEmployee(id=employee_id, name=name)
+        return loaded
+
+
+employee_resolver = EmployeeResolver()
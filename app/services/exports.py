@@ -0,0 +1,221 @@
+"""
+Datei-Exporte (Excel, CSV, NDJSON, Parquet) für Mitarbeiter, Fahrzeuge,
+Kosten, Schichten und Scorecards.
+
+Zeilen werden blockweise über einen serverseitigen Cursor gelesen
+(`yield_per`) und direkt kodiert an den Client gestreamt. Der Speicherbedarf
+hängt damit von der Blockgröße ab, nicht von der Tabellengröße.
+
+Ausnahme xlsx: Das ZIP-Archiv entsteht erst beim Speichern. Die ganze
+Arbeitsmappe wird deshalb zuerst in eine temporäre Datei geschrieben und
+erst danach gesendet; der erste Block kommt nach dem kompletten Export, und
+die Platte braucht Platz für die ganze Datei. Für große Exporte csv, ndjson
+oder parquet verwenden (xlsx bleibt Standard für bestehende Clients).
+"""
+import csv
+import datetime
+import io
+import json
+import tempfile
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric
+from sqlalchemy.orm import Query, Session
+
+from app.config import get_settings
+from app.database import get_db
+
+settings = get_settings()
+
+EXPORT_FORMATS = ("xlsx", "csv", "ndjson", "parquet")
+EXPORT_FORMAT_PATTERN = "^(xlsx|csv|ndjson|parquet)$"
+TEMPLATE_FORMAT_PATTERN = "^(xlsx|csv|parquet)$"
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Blockgröße beim Weiterreichen fertig geschriebener Dateien (Excel)
+FILE_BLOCK_SIZE = 64 * 1024
+
+Rows = Iterable[Sequence[Any]]
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, list):
+        return ",".join(str(item) for item in value)  # z. B. Wochentage, wie beim Import
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Nicht serialisierbar: {type(value).__name__}")
+
+
+def _arrow_type(sa_type: Any) -> pa.DataType:
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, Integer):
+        return pa.int64()
+    if isinstance(sa_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(sa_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Schreibziel für pyarrow: sammelt geschriebene Bytes, bis sie mit
+    `drain` an den Client weitergegeben werden.
+    """
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# ============================================================
+#                KODIERUNG
+# ============================================================
+
+def _encode_csv(columns: List[str], types: List[Any], partitions: Iterable[Rows]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(columns: List[str], types: List[Any], partitions: Iterable[Rows]) -> Iterator[bytes]:
+    for rows in partitions:
+        lines = [
+            json.dumps(
+                {name: _plain(value) for name, value in zip(columns, row)},
+                default=_json_default, ensure_ascii=False,
+            )
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _encode_parquet(columns: List[str], types: List[Any], partitions: Iterable[Rows]) -> Iterator[bytes]:
+    # Ein Row-Group je Block; das Schema kommt aus den Spaltentypen der Abfrage
+    schema = pa.schema([(name, _arrow_type(sa_type)) for name, sa_type in zip(columns, types)])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in partitions:
+            arrays = [
+                pa.array([_plain(row[position]) for row in rows], type=field.type)
+                for position, field in enumerate(schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    # Footer mit den Metadaten
+    yield sink.drain()
+
+
+def _encode_xlsx(columns: List[str], types: List[Any], partitions: Iterable[Rows]) -> Iterator[bytes]:
+    # Write-only-Arbeitsmappen halten keine Zeilen im Speicher; das ZIP-Archiv
+    # entsteht aber erst beim Speichern und wird deshalb über eine
+    # temporäre Datei gestreamt.
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    for rows in partitions:
+        for row in rows:
+            sheet.append([_plain(value) for value in row])
+
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            block = spool.read(FILE_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+
+
+ENCODERS = {
+    "xlsx": _encode_xlsx,
+    "csv": _encode_csv,
+    "ndjson": _encode_ndjson,
+    "parquet": _encode_parquet,
+}
+
+
+def _download(body: Iterator[bytes], fmt: str, basename: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={basename}.{fmt}"},
+    )
+
+
+# ============================================================
+#                ÖFFENTLICHE API
+# ============================================================
+
+def stream_export(build_query: Callable[[Session], Query], fmt: str, basename: str) -> StreamingResponse:
+    """
+    Streamt das Ergebnis einer Spaltenabfrage als Datei-Download.
+
+    `build_query` erhält eine eigene Session, die so lange offen bleibt, wie
+    der Download läuft. Spaltennamen und -typen stammen aus der Abfrage.
+    """
+    def body() -> Iterator[bytes]:
+        with get_db() as db:
+            query = build_query(db)
+            columns = [description["name"] for description in query.column_descriptions]
+            types = [description["type"] for description in query.column_descriptions]
+            result = db.execute(
+                query.statement,
+                execution_options={"yield_per": settings.EXPORT_CHUNK_SIZE},
+            )
+            yield from ENCODERS[fmt](columns, types, result.partitions())
+
+    return _download(body(), fmt, basename)
+
+
+def template_response(model: Any, columns: List[str], fmt: str, basename: str) -> StreamingResponse:
+    """
+    Leere Importvorlage mit den Spalten `columns` des Modells.
+    """
+    types = [getattr(model, name).type for name in columns]
+    return _download(ENCODERS[fmt](columns, types, []), fmt, basename)
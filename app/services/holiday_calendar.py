@@ -0,0 +1,92 @@
+"""
+Feiertagskalender je Bundesland für Schichtplanung und Frontend.
+
+Die Feiertage werden je (Bundesland, Jahr) einmal mit `holidays` berechnet
+und in einem LRU-Cache gehalten; Abfragen wie „ist dieser Tag in BY ein
+Arbeitstag?“ sind danach ein Dictionary-Zugriff. Beim Start werden alle
+Bundesländer für das laufende und das nächste Jahr vorberechnet.
+"""
+import datetime
+import logging
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Tuple
+
+import holidays
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+STATES = tuple(state for state in holidays.Germany.subdivisions if len(state) == 2)
+# Abkürzungen und Namen, wie sie in Mitarbeiterdaten vorkommen
+STATE_ALIASES = {
+    "NRW": "NW",
+    **{name.upper(): code for name, code in holidays.Germany.subdivisions_aliases.items()},
+}
+
+# Arbeitstage im Sinne der Planung: Montag bis Samstag
+WORKING_WEEKDAYS = frozenset(range(6))
+
+Key = Tuple[Optional[str], int]
+
+
+def normalize_state(state: Optional[str]) -> Optional[str]:
+    """
+    Liefert das Kürzel (z. B. "BY") bzw. None für nur bundesweite Feiertage.
+    Wirft ValueError bei unbekannten Bundesländern.
+    """
+    if state is None or not state.strip():
+        return None
+    value = state.strip().upper()
+    value = STATE_ALIASES.get(value, value)
+    if value not in STATES:
+        raise ValueError(f"Unbekanntes Bundesland '{state}'")
+    return value
+
+
+class HolidayCalendar:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, Mapping[datetime.date, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def holidays_for(self, state: Optional[str], year: int) -> Mapping[datetime.date, str]:
+        """
+        Feiertage (Datum → Name) eines Bundeslands in einem Jahr, unveränderlich.
+        """
+        key = (normalize_state(state), year)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = MappingProxyType(dict(holidays.Germany(subdiv=key[0], years=year, language="de")))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def holiday_name(self, state: Optional[str], day: datetime.date) -> Optional[str]:
+        return self.holidays_for(state, day.year).get(day)
+
+    def is_holiday(self, state: Optional[str], day: datetime.date) -> bool:
+        return day in self.holidays_for(state, day.year)
+
+    def is_working_day(self, state: Optional[str], day: datetime.date) -> bool:
+        return day.weekday() in WORKING_WEEKDAYS and not self.is_holiday(state, day)
+
+    def warm(self, years: Iterable[int], states: Iterable[Optional[str]] = (None, *STATES)):
+        years = list(years)
+        for state in states:
+            for year in years:
+                self.holidays_for(state, year)
+        logger.info(f"Feiertagskalender vorberechnet ({len(self._entries)} Einträge)")
+
+
+holiday_calendar = HolidayCalendar(max_entries=settings.HOLIDAY_CACHE_ENTRIES)
@@ -0,0 +1,94 @@
+"""
+Laufzeit- und Mengenstatistik für Importe (Datei-Uploads und Scorecards).
+
+Jeder Import misst die Stufen read, parse, validate, insert und commit sowie
+die Zähler rows, batches und bytes. Stufen dürfen verschachtelt werden; gezählt
+wird jeweils die eigene Zeit ohne die der inneren Stufe (z. B. parse ohne read),
+die Summe der Stufen ergibt damit die gemessene Gesamtzeit.
+
+Die Statistik wird immer strukturiert geloggt und auf Wunsch (`stats=true`)
+in der Antwort mitgeliefert.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("read", "parse", "validate", "insert", "commit")
+COUNTERS = ("rows", "batches", "bytes")
+
+
+class ImportStats:
+    def __init__(self):
+        self.timings: Dict[str, float] = {stage: 0.0 for stage in STAGES}
+        self.counters: Dict[str, int] = {counter: 0 for counter in COUNTERS}
+        self._stack: List[list] = []  # [Stufe, Startzeit des laufenden Abschnitts]
+        self._started = time.perf_counter()
+
+    def _enter(self, stage: str):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.timings[parent[0]] += now - parent[1]
+        self._stack.append([stage, now])
+
+    def _exit(self):
+        now = time.perf_counter()
+        stage, since = self._stack.pop()
+        self.timings[stage] += now - since
+        if self._stack:
+            self._stack[-1][1] = now
+
+    @contextmanager
+    def stage(self, name: str):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, iterable: Iterable[Any], stage: str) -> Iterator[Any]:
+        """
+        Reicht die Elemente durch und rechnet die Zeit für deren Erzeugung
+        der Stufe `stage` zu (für Generatoren wie Zeilen- oder Block-Leser).
+        """
+        iterator = iter(iterable)
+        while True:
+            self._enter(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] += amount
+
+    def count_source_bytes(self, source: Any):
+        # Dateipfad oder (spulbares) Dateiobjekt
+        if isinstance(source, (str, os.PathLike)):
+            self.count("bytes", os.path.getsize(source))
+            return
+        try:
+            position = source.tell()
+            self.count("bytes", source.seek(0, os.SEEK_END))
+            source.seek(position)
+        except (AttributeError, OSError, ValueError):
+            pass
+
+    def to_dict(self) -> dict:
+        return {
+            **self.counters,
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 1),
+            "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.timings.items()},
+        }
+
+    def log(self, kind: str, **context: Any):
+        payload = {"kind": kind, **context, **self.to_dict()}
+        logger.info(f"Import-Statistik {json.dumps(payload, default=str)}", extra={"import_stats": payload})
@@ -0,0 +1,180 @@
+"""
+In-Process-Jobverwaltung für schwere Uploads (Scorecards, Excel-Importe).
+
+Uploads legen einen Job an und antworten sofort mit dessen ID; eine feste Anzahl
+Worker-Tasks (IMPORT_WORKERS) arbeitet die Warteschlange ab. Damit ist die
+Import-Parallelität unabhängig von der Anzahl gleichzeitiger HTTP-Anfragen
+begrenzt und belegt höchstens IMPORT_WORKERS Verbindungen aus dem DB-Pool.
+"""
+import asyncio
+import datetime
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.database import get_db
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class JobQueueFull(Exception):
+    """Die Warteschlange ist voll oder nimmt (beim Herunterfahren) keine Jobs mehr an."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: JobStatus = JobStatus.queued
+    progress: float = 0.0
+    result: Any = None
+    error: Optional[str] = None
+    created_at: datetime.datetime = field(default_factory=datetime.datetime.utcnow)
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.succeeded, JobStatus.failed)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "progress": round(self.progress, 3),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+JobFunc = Callable[..., Awaitable[Any]]
+
+
+class JobQueue:
+    def __init__(self, workers: int, max_pending: int, history: int):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.history = history
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = False
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._accepting = True
+        logger.info(f"Job-Warteschlange gestartet ({self.workers} Worker)")
+
+    async def shutdown(self, timeout: float):
+        """
+        Nimmt keine neuen Jobs mehr an und arbeitet die Warteschlange bis zum
+        Zeitlimit ab. Danach noch laufende Jobs werden abgebrochen.
+        """
+        self._accepting = False
+        if self._queue is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Job-Warteschlange nach {timeout:.0f}s nicht leer, offene Jobs werden abgebrochen")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Job-Warteschlange beendet")
+
+    def submit(self, kind: str, func: JobFunc, *args: Any) -> Job:
+        """
+        Reiht `await func(job, *args)` ein und gibt den Job sofort zurück.
+        """
+        if not self._accepting or self._queue is None:
+            raise JobQueueFull("Die Job-Warteschlange nimmt derzeit keine Aufträge an.")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        try:
+            self._queue.put_nowait((job, func, args))
+        except asyncio.QueueFull:
+            raise JobQueueFull("Zu viele Importe in der Warteschlange, bitte später erneut versuchen.")
+
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job, func, args = await self._queue.get()
+            try:
+                await self._run(job, func, args)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, func: JobFunc, args: tuple):
+        job.status = JobStatus.running
+        job.started_at = datetime.datetime.utcnow()
+        try:
+            job.result = await func(job, *args)
+            job.status = JobStatus.succeeded
+            job.progress = 1.0
+        except asyncio.CancelledError:
+            job.status = JobStatus.failed
+            job.error = "Job wurde beim Herunterfahren abgebrochen."
+            raise
+        except HTTPException as e:
+            job.status = JobStatus.failed
+            job.error = str(e.detail)
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) fehlgeschlagen")
+            job.status = JobStatus.failed
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.datetime.utcnow()
+
+    def _prune(self):
+        # Nur abgeschlossene Jobs verdrängen, wartende und laufende bleiben abrufbar
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [job.id for job in self._jobs.values() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+
+async def run_with_session(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Führt `func(db, *args)` in einem Thread mit eigener Datenbank-Session aus.
+    """
+    def call():
+        with get_db() as db:
+            return func(db, *args)
+
+    return await asyncio.to_thread(call)
+
+
+job_queue = JobQueue(
+    workers=settings.IMPORT_WORKERS,
+    max_pending=settings.IMPORT_QUEUE_SIZE,
+    history=settings.JOB_HISTORY,
+)
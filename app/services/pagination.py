@@ -0,0 +1,147 @@
+"""
+Keyset-Pagination und zwischengespeicherte Gesamtzahlen für Listen-Endpunkte.
+
+Statt `OFFSET` wird über einen undurchsichtigen Cursor geblättert, der die
+Sortierschlüssel der letzten Zeile enthält (z. B. `(id)` oder `(date, id)`).
+Die nächste Seite beginnt mit `WHERE (date, id) > (:date, :id)` und ist damit
+ein Index-Bereichsscan – tiefe Seiten kosten so viel wie die erste.
+
+Antworten bleiben reine Listen wie vor der Pagination, damit bestehende
+Clients unverändert funktionieren; der Cursor der nächsten Seite steht im
+Header `X-Next-Cursor` (fehlt auf der letzten Seite).
+
+Gesamtzahlen (`X-Total-Count`) kommen aus `count_cache`. Schreibende
+Endpunkte und Importe rufen `count_cache.invalidate(<tabelle>)` auf.
+"""
+import base64
+import datetime
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Date, DateTime, Integer, tuple_
+from sqlalchemy.orm import Query
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+# ============================================================
+#                CURSOR
+# ============================================================
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value for value in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_value(column: Any, value: Any) -> Any:
+    if isinstance(column.type, DateTime):
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return datetime.date.fromisoformat(value)
+    if isinstance(column.type, Integer) and not isinstance(value, int):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, keys: Sequence[Any]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [_decode_value(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def paginate(query: Query, keys: Sequence[Any], cursor: Optional[str], limit: int, offset: int = 0) -> Page:
+    """
+    Liefert eine Seite von `query`, sortiert nach `keys` (aufsteigend,
+    die letzte Spalte muss eindeutig sein, i. d. R. die id).
+    `offset` gibt es nur für Altclients ohne Cursor; beides zusammen ist
+    ein Fehler, weil die Seite sonst weder zum Cursor noch zum Offset passt.
+    """
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="skip und cursor können nicht kombiniert werden")
+    if cursor:
+        query = query.filter(tuple_(*keys) > tuple_(*decode_cursor(cursor, keys)))
+
+    query = query.order_by(*keys)
+    if offset:
+        query = query.offset(offset)
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return Page(items=items, next_cursor=None)
+
+    items = items[:limit]
+    last = items[-1]
+    return Page(items=items, next_cursor=encode_cursor([getattr(last, key.key) for key in keys]))
+
+
+def set_page_headers(response: Response, page: Page, total: Optional[int] = None):
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+
+
+# ============================================================
+#                GESAMTZAHLEN
+# ============================================================
+
+class CountCache:
+    """
+    Prozessweiter Zwischenspeicher für `COUNT(*)`-Ergebnisse, Schlüssel ist
+    (Tabelle, Filter...). Einträge werden beim Schreiben über `invalidate`
+    verworfen; die TTL begrenzt Abweichungen durch andere Prozesse.
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[Hashable, ...], Tuple[int, float]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, table: str):
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [key for key in self._entries if key[0] == table]:
+                del self._entries[key]
+
+    def generation(self, table: str) -> int:
+        # Zählt Invalidierungen; andere Caches erkennen daran Schreibzugriffe auf `table`
+        with self._lock:
+            return self._generations.get(table, 0)
+
+    def get(self, key: Tuple[Hashable, ...], count: Callable[[], int]) -> int:
+        table = key[0]
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(table, 0)
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                return entry[0]
+
+        value = count()
+        with self._lock:
+            # Während der Zählung invalidiert: Ergebnis verwenden, aber nicht merken
+            if generation == self._generations.get(table, 0):
+                self._entries[key] = (value, now)
+        return value
+
+
+count_cache = CountCache(ttl=settings.COUNT_CACHE_TTL)
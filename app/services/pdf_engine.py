@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class PdfEngineError(Exception):
+    """Fehler bei der PDF-Verarbeitung im Worker-Prozess."""
+
+
+class PdfEngineTimeout(PdfEngineError):
+    """Ein Job hat das konfigurierte Zeitlimit überschritten."""
+
+
+class PdfParsingEngine:
+    """
+    Führt PDF-Textextraktion und Regex-Auswertung in einem begrenzten
+    Prozesspool aus, damit große Scorecards den Event-Loop nicht blockieren.
+
+    - Anzahl der Worker über PDF_WORKERS konfigurierbar
+    - Zeitlimit pro Job über PDF_JOB_TIMEOUT; hängende Worker werden beendet
+    - Abstürze eines Workers machen den Pool nicht dauerhaft unbrauchbar:
+      der Pool wird neu gestartet und betroffene Jobs einmal isoliert wiederholt
+    """
+
+    def __init__(self, max_workers: int, timeout: float):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Nur so viele Jobs gleichzeitig, wie Worker vorhanden sind –
+        # das Zeitlimit gilt damit für die Verarbeitung, nicht für die Wartezeit.
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # "spawn" statt fork: der Server-Prozess hat Threads und offene Verbindungen
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _current(self) -> Tuple[ProcessPoolExecutor, int]:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor, self._generation
+
+    def _restart(self, generation: int, terminate: bool = False):
+        with self._lock:
+            if generation != self._generation:
+                return  # Pool wurde bereits von einem anderen Job neu gestartet
+            old = self._executor
+            self._executor = self._create_executor()
+            self._generation += 1
+
+        if old is None:
+            return
+        if terminate:
+            for process in list((old._processes or {}).values()):
+                process.terminate()
+        old.shutdown(wait=False, cancel_futures=True)
+
+    def start(self):
+        """
+        Startet den Prozesspool (wird sonst beim ersten Job angelegt).
+        """
+        self._current()
+        logger.info(f"PDF-Engine gestartet ({self.max_workers} Worker, Timeout {self.timeout:.0f}s)")
+
+    def shutdown(self):
+        """
+        Beendet den Prozesspool und wartet auf laufende Jobs.
+        """
+        with self._lock:
+            old, self._executor = self._executor, None
+        if old is not None:
+            old.shutdown(wait=True, cancel_futures=True)
+            logger.info("PDF-Engine beendet")
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Führt `func(*args)` in einem Worker-Prozess aus und liefert das Ergebnis.
+        `func` muss eine Modul-Funktion sein (picklebar), Argumente und
+        Rückgabewert ebenso.
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self._slots:
+            executor, generation = self._current()
+            try:
+                return await self._submit(loop, executor, func, args)
+            except asyncio.TimeoutError:
+                logger.error(f"PDF-Job {func.__name__} nach {self.timeout:.0f}s abgebrochen")
+                self._restart(generation, terminate=True)
+                raise PdfEngineTimeout(f"PDF-Verarbeitung nach {self.timeout:.0f} Sekunden abgebrochen.")
+            except BrokenProcessPool:
+                logger.warning(f"PDF-Worker abgestürzt (Job {func.__name__}), Pool wird neu gestartet")
+                self._restart(generation)
+
+            # Wiederholung isoliert in einem eigenen Prozess: ein Job, der den
+            # Worker erneut zum Absturz bringt, reißt keine anderen Jobs mit.
+            isolated = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                return await self._submit(loop, isolated, func, args)
+            except asyncio.TimeoutError:
+                for process in list((isolated._processes or {}).values()):
+                    process.terminate()
+                raise PdfEngineTimeout(f"PDF-Verarbeitung nach {self.timeout:.0f} Sekunden abgebrochen.")
+            except BrokenProcessPool:
+                logger.error(f"PDF-Job {func.__name__} bringt den Worker-Prozess zum Absturz")
+                raise PdfEngineError("PDF-Verarbeitung fehlgeschlagen: Worker-Prozess abgestürzt.")
+            finally:
+                isolated.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, loop, executor: ProcessPoolExecutor, func: Callable[..., Any], args: tuple) -> Any:
+        future = loop.run_in_executor(executor, func, *args)
+        return await asyncio.wait_for(future, timeout=self.timeout)
+
+
+pdf_engine = PdfParsingEngine(
+    max_workers=settings.PDF_WORKERS,
+    timeout=settings.PDF_JOB_TIMEOUT,
+)
@@ -0,0 +1,135 @@
+"""
+Cache für geparste Scorecards, Schlüssel ist der SHA-256 der hochgeladenen Bytes.
+
+Zwei Ebenen:
+- Arbeitsspeicher: LRU mit fester Anzahl Einträge
+- Festplatte: JSON-Dateien unter UPLOAD_DIR/parse_cache, begrenzt über die Gesamtgröße
+
+Identische Uploads (Wiederholungen, Vorschau + Import) überspringen damit pdfplumber komplett.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.config import get_settings
+from app.services.pdf_engine import pdf_engine
+from app.services.scorecard_parser import PARSER_VERSION, ScorecardResult, parse_scorecard
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ScorecardParseCache:
+    def __init__(self, cache_dir: Path, max_entries: int, max_disk_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, ScorecardResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(contents: bytes) -> str:
+        # Parser-Version und -Modus im Schlüssel: alte Ergebnisse werden nach Parser-Änderungen nicht mehr getroffen
+        return f"{hashlib.sha256(contents).hexdigest()}-v{PARSER_VERSION}-{settings.SCORECARD_PARSE_MODE}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[ScorecardResult]:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                return result
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                result = ScorecardResult.from_dict(json.load(fh))
+            os.utime(path)  # Zugriffszeit für die Verdrängung auffrischen
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Defekter Cache-Eintrag {path.name} wird verworfen: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: ScorecardResult):
+        self._remember(key, result)
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(result.to_dict(), fh)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Scorecard-Cache konnte nicht geschrieben werden: {e}")
+
+    def _remember(self, key: str, result: ScorecardResult):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """
+        Löscht die am längsten nicht genutzten Dateien, bis die Größengrenze eingehalten ist.
+        """
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_disk_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+scorecard_cache = ScorecardParseCache(
+    cache_dir=Path(settings.UPLOAD_DIR) / "parse_cache",
+    max_entries=settings.SCORECARD_CACHE_MEMORY_ENTRIES,
+    max_disk_bytes=settings.SCORECARD_CACHE_DISK_BYTES,
+)
+
+
+async def parse_scorecard_cached(contents: bytes) -> ScorecardResult:
+    """
+    Liefert das Parse-Ergebnis aus dem Cache oder parst über die PDF-Engine.
+    """
+    key = scorecard_cache.key_for(contents)
+    result = scorecard_cache.get(key)
+    if result is not None:
+        logger.info(f"Scorecard-Cache-Treffer {key[:12]}")
+        return result
+
+    result = await pdf_engine.run(parse_scorecard, contents)
+    scorecard_cache.put(key, result)
+    return result
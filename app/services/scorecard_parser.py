@@ -0,0 +1,430 @@
+"""
+Zentraler Parser für Amazon-Scorecard-PDFs.
+
+Jede Seite wird genau einmal extrahiert; Fahrerzeilen, Firmen-KPIs,
+Overall Score, Rank und Focus Areas entstehen in einem Durchlauf.
+Alle Endpunkte (Fahrer-, Kombi-Upload und Vorschau) nutzen dieses Modul.
+"""
+import io
+import logging
+import re
+from bisect import bisect_right
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import pdfplumber
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# ============================================================
+#                VORKOMPILIERTE MUSTER
+# ============================================================
+
+_NUM = r"([\d.,%-]+)"
+_INT = r"(\d+)"
+_SEP = r"[\s\n]+"
+
+DRIVER_PATTERN_WITH_LOR = re.compile(
+    r"([A-Z0-9]{13,14})" + _SEP + _INT + _SEP + _NUM + _SEP + _INT + _SEP + _INT
+    + _SEP + _NUM + _SEP + _NUM + _SEP + _INT + _SEP + _NUM
+)
+DRIVER_PATTERN_WITHOUT_LOR = re.compile(
+    r"([A-Z0-9]{13,14})" + _SEP + _INT + _SEP + _NUM + _SEP + _INT
+    + _SEP + _NUM + _SEP + _NUM + _SEP + _INT + _SEP + _NUM
+)
+
+FIRM_KPI_PATTERNS = {
+    "dcr": re.compile(r"Delivery Completion Rate\(DCR\)[\s:]*([\d.,]+)%"),
+    "dnr_dpmo": re.compile(r"Delivered Not Received\(DNR DPMO\)[\s:]*([\d.,]+)"),
+    "lor_dpmo": re.compile(r"Lost on Road \(LoR\) DPMO[\s:]*([\d.,]+)"),
+}
+
+OVERALL_SCORE_PATTERN = re.compile(r"Overall Score:\s*([0-9]{2,3}\.[0-9]{1,2})\s*\|", re.IGNORECASE)
+RANK_PATTERN = re.compile(r"Rank at [A-Z0-9]+[:\s]*([0-9]+)", re.IGNORECASE)
+FOCUS_AREA_PATTERN = re.compile(r"^\s*\d+\.\s+(.+?)\s*$", re.MULTILINE)
+FIRM_METRIC_PATTERN = re.compile(
+    r"([0-9]+(?:\.[0-9]+)?%?)\s*\|\s*(Fantastic|Great|Fair|Poor|In Compliance|None|Not in Compliance)",
+    re.IGNORECASE,
+)
+BOC_PATTERN = re.compile(r"Breach of Contract \(BOC\)\s+(None|Not in Compliance)", re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Uploads erwarten "Week12" im Dateinamen; die Vorschau zeigt auch "KW12"/"KW-12" an
+WEEK_PATTERN = re.compile(r"Week(\d{1,2})", re.IGNORECASE)
+WEEK_LABEL_PATTERN = re.compile(r"(KW|Week)[-_]?\d{1,2}", re.IGNORECASE)
+
+FOCUS_AREAS_MARKER = "Recommended Focus Areas"
+
+# Tabellen-Modus: Kopfzeile der Fahrertabelle und Zuordnung Spaltenname -> Feld
+TABLE_HEADER_MARKER = "Transporter"
+TRANSPORTER_ID_PATTERN = re.compile(r"^[A-Z0-9]{13,14}$")
+HEADER_ALIASES = {
+    "transporter id": "transporter_id",
+    "delivered": "delivered",
+    "dcr": "dcr",
+    "dnr dpmo": "dnr_dpmo",
+    "lor dpmo": "lor_dpmo",
+    "pod": "pod",
+    "cc": "cc",
+    "ce": "ce",
+    "dex": "dex",
+    "cdf": "dex",
+}
+PARSE_MODES = ("table", "text")
+
+# Bei Änderungen am Parse-Ergebnis erhöhen – macht gecachte Ergebnisse ungültig
+PARSER_VERSION = 3
+
+# ============================================================
+#                ERGEBNISTYPEN
+# ============================================================
+
+@dataclass
+class DriverRow:
+    transporter_id: str
+    delivered: Optional[int]
+    dcr: Optional[float]
+    dnr_dpmo: Optional[int]
+    lor_dpmo: Optional[int]
+    pod: Optional[float]
+    cc: Optional[float]
+    ce: Optional[int]
+    dex: Optional[float]
+
+
+@dataclass
+class FirmMetric:
+    name: str
+    value: str
+    status: str
+
+
+@dataclass
+class FirmKpis:
+    dcr: Optional[float] = None
+    dnr_dpmo: Optional[int] = None
+    lor_dpmo: Optional[int] = None
+
+
+@dataclass
+class ScorecardResult:
+    drivers: List[DriverRow] = field(default_factory=list)
+    has_lor: bool = False
+    firm_kpis: FirmKpis = field(default_factory=FirmKpis)
+    firm_metrics: List[FirmMetric] = field(default_factory=list)
+    overall_score: Optional[float] = None
+    rank: Optional[int] = None
+    focus_areas: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScorecardResult":
+        return cls(
+            drivers=[DriverRow(**row) for row in data["drivers"]],
+            has_lor=data["has_lor"],
+            firm_kpis=FirmKpis(**data["firm_kpis"]),
+            firm_metrics=[FirmMetric(**metric) for metric in data["firm_metrics"]],
+            overall_score=data["overall_score"],
+            rank=data["rank"],
+            focus_areas=data["focus_areas"],
+        )
+
+# ============================================================
+#                WERT-PARSER
+# ============================================================
+
+def parse_int(value) -> Optional[int]:
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "-" or value == "":
+            return None
+        return int(float(value))
+    return None
+
+
+def parse_float(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = value.strip().replace("%", "").replace(",", ".")
+        if value == "-" or value == "":
+            return None
+        return float(value)
+    return None
+
+
+def normalize_transporter_id(tid: str) -> str:
+    if not tid.startswith("A") and len(tid) == 13:
+        return "A" + tid
+    return tid
+
+
+def extract_week_from_filename(filename: str) -> int:
+    match = WEEK_PATTERN.search(filename)
+    if match:
+        return int(match.group(1))
+    raise ValueError("Keine gültige KW im Dateinamen gefunden.")
+
+
+def extract_kw_from_filename(filename: str) -> str:
+    match = WEEK_LABEL_PATTERN.search(filename)
+    return match.group(0).replace("_", "-").upper() if match else "KW?"
+
+# ============================================================
+#                SEITEN-PARSER
+# ============================================================
+
+def _driver_row(match: "re.Match", with_lor: bool) -> DriverRow:
+    if with_lor:
+        tid, delivered, dcr, dnr_dpmo, lor_dpmo, pod, cc, ce, dex = match.groups()
+    else:
+        tid, delivered, dcr, dnr_dpmo, pod, cc, ce, dex = match.groups()
+        lor_dpmo = None
+
+    return DriverRow(
+        transporter_id=normalize_transporter_id(tid),
+        delivered=parse_int(delivered),
+        dcr=parse_float(dcr),
+        dnr_dpmo=parse_int(dnr_dpmo),
+        lor_dpmo=parse_int(lor_dpmo),
+        pod=parse_float(pod),
+        cc=parse_float(cc),
+        ce=parse_int(ce),
+        dex=parse_float(dex),
+    )
+
+
+def iter_driver_rows(pages: Iterable) -> Iterator[DriverRow]:
+    """
+    Läuft Seite für Seite durch das Dokument und liefert Fahrerzeilen, sobald sie
+    gefunden werden. Seiten ohne Treffer werden übersprungen; die Tabelle darf
+    beliebig viele Seiten umfassen. Das Spaltenlayout (mit/ohne LoR) wird auf der
+    ersten Tabellenseite bestimmt und für den Rest des Dokuments beibehalten.
+    """
+    pattern = None
+    for page in pages:
+        text = page.extract_text() or ""
+        page.close()  # Layout-Cache der Seite sofort freigeben
+
+        if pattern is None:
+            if DRIVER_PATTERN_WITH_LOR.search(text):
+                pattern = DRIVER_PATTERN_WITH_LOR
+            elif DRIVER_PATTERN_WITHOUT_LOR.search(text):
+                pattern = DRIVER_PATTERN_WITHOUT_LOR
+            else:
+                continue
+
+        with_lor = pattern is DRIVER_PATTERN_WITH_LOR
+        for match in pattern.finditer(text):
+            yield _driver_row(match, with_lor)
+
+
+@dataclass
+class _TableLayout:
+    fields: List[Optional[str]]  # Feld je Spalte, None für unbekannte Spalten
+    boundaries: List[float]      # x-Positionen der Spaltengrenzen (eine mehr als Spalten)
+
+
+def _normalize_header(label: str) -> str:
+    return WHITESPACE_PATTERN.sub(" ", label).strip().lower()
+
+
+def _find_table_header(page) -> Optional[Tuple[float, float]]:
+    """
+    Sucht die Kopfzeile direkt in den Zeichen der Seite (ohne Text-Layout).
+    Gibt top/bottom der Kopfzeile zurück.
+    """
+    chars = page.chars
+    index = "".join(char["text"] for char in chars).find(TABLE_HEADER_MARKER)
+    if index < 0:
+        return None
+    return chars[index]["top"], chars[index]["bottom"]
+
+
+def _read_table_layout(page, top: float, bottom: float) -> Optional[_TableLayout]:
+    """
+    Liest die Spaltennamen aus dem schmalen Streifen der Kopfzeile und legt die
+    Spaltengrenzen jeweils in die Mitte der Lücke zwischen zwei Spaltennamen.
+    """
+    band = page.crop((0, max(0, top - 1), page.width, min(page.height, bottom + 1)))
+    labels = sorted(band.extract_words(keep_blank_chars=True, x_tolerance=3), key=lambda word: word["x0"])
+    fields = [HEADER_ALIASES.get(_normalize_header(label["text"])) for label in labels]
+    if "transporter_id" not in fields:
+        return None
+
+    boundaries = [0.0]
+    for left, right in zip(labels, labels[1:]):
+        boundaries.append((left["x1"] + right["x0"]) / 2)
+    boundaries.append(float(page.width))
+    return _TableLayout(fields=fields, boundaries=boundaries)
+
+
+def _cell(values: dict, key: str, parser) -> Optional[Union[int, float]]:
+    try:
+        return parser(values.get(key))
+    except ValueError:
+        logger.warning(f"Ungültiger Wert in Spalte {key} der Fahrertabelle: {values.get(key)!r}")
+        return None
+
+
+def _table_cells(page, layout: _TableLayout, top: float) -> Iterator[List[str]]:
+    """
+    Schneidet den Tabellenbereich aus und liefert dessen Zeilen als Zellenlisten.
+    Wörter werden über ihre x-Mitte der Spalte und über ihre Oberkante der Zeile zugeordnet.
+    """
+    cropped = page.crop((layout.boundaries[0], top, layout.boundaries[-1], page.height))
+    column_edges = layout.boundaries[1:-1]
+
+    line_top = None
+    cells: List[List[str]] = []
+    for word in sorted(cropped.extract_words(), key=lambda w: (round(w["top"]), w["x0"])):
+        if line_top is None or abs(word["top"] - line_top) > 2:
+            if cells:
+                yield [" ".join(parts) for parts in cells]
+            line_top = word["top"]
+            cells = [[] for _ in layout.fields]
+        center = (word["x0"] + word["x1"]) / 2
+        cells[bisect_right(column_edges, center)].append(word["text"])
+    if cells:
+        yield [" ".join(parts) for parts in cells]
+
+
+def _iter_table_page(page, layout: _TableLayout, top: float) -> Iterator[DriverRow]:
+    for cells in _table_cells(page, layout, top):
+        values = dict(zip(layout.fields, cells))
+        tid = (values.get("transporter_id") or "").strip()
+        if not TRANSPORTER_ID_PATTERN.match(tid):
+            continue  # Kopfzeile, Summen oder Fremdtext
+
+        yield DriverRow(
+            transporter_id=normalize_transporter_id(tid),
+            delivered=_cell(values, "delivered", parse_int),
+            dcr=_cell(values, "dcr", parse_float),
+            dnr_dpmo=_cell(values, "dnr_dpmo", parse_int),
+            lor_dpmo=_cell(values, "lor_dpmo", parse_int),
+            pod=_cell(values, "pod", parse_float),
+            cc=_cell(values, "cc", parse_float),
+            ce=_cell(values, "ce", parse_int),
+            dex=_cell(values, "dex", parse_float),
+        )
+
+
+def iter_table_rows(pages: Iterable) -> Iterator[DriverRow]:
+    """
+    Tabellen-Modus: findet pro Seite die Kopfzeile der Fahrertabelle, schneidet
+    nur den Tabellenbereich aus und liest ihn als Zellen. Spalten werden über
+    ihren Namen zugeordnet, nicht über ihre Position. Folgeseiten ohne eigene
+    Kopfzeile übernehmen das Layout der vorherigen Tabellenseite.
+    """
+    layout = None
+    for page in pages:
+        header = _find_table_header(page)
+        top = 0.0
+        if header is not None:
+            layout = _read_table_layout(page, *header) or layout
+            top = header[0]
+
+        if layout is not None:
+            yield from _iter_table_page(page, layout, top)
+        page.close()
+
+
+def parse_firm_page(text: str, result: ScorecardResult) -> None:
+    """
+    Wertet Seite 2 aus: Firmen-KPIs, Statuszeilen, Overall Score, Rank, Focus Areas.
+    """
+    values = {}
+    for key, pattern in FIRM_KPI_PATTERNS.items():
+        match = pattern.search(text)
+        values[key] = parse_float(match.group(1)) if match else None
+
+    result.firm_kpis = FirmKpis(
+        dcr=values["dcr"],
+        dnr_dpmo=parse_int(values["dnr_dpmo"]),
+        lor_dpmo=parse_int(values["lor_dpmo"]),
+    )
+
+    flat_text = text.replace("\n", " ")
+    score_match = OVERALL_SCORE_PATTERN.search(flat_text)
+    if score_match:
+        result.overall_score = float(score_match.group(1))
+    rank_match = RANK_PATTERN.search(flat_text)
+    if rank_match:
+        result.rank = int(rank_match.group(1))
+
+    if FOCUS_AREAS_MARKER in text:
+        focus_block = text.split(FOCUS_AREAS_MARKER)[-1]
+        result.focus_areas = FOCUS_AREA_PATTERN.findall(focus_block)
+
+    for line in text.split("\n"):
+        match = FIRM_METRIC_PATTERN.search(line)
+        if match:
+            name = WHITESPACE_PATTERN.sub(" ", line[:match.start()].strip())
+            result.firm_metrics.append(FirmMetric(
+                name=name,
+                value=match.group(1),
+                status=match.group(2).strip().capitalize(),
+            ))
+
+    boc_match = BOC_PATTERN.search(text)
+    if boc_match:
+        result.firm_metrics.append(FirmMetric(
+            name="Breach of Contract (BOC)",
+            value=boc_match.group(1),
+            status=boc_match.group(1).capitalize(),
+        ))
+
+# ============================================================
+#                GESAMTES DOKUMENT
+# ============================================================
+
+def _open(source: Union[bytes, str, Path]):
+    if isinstance(source, (bytes, bytearray)):
+        return pdfplumber.open(io.BytesIO(source))
+    return pdfplumber.open(str(source))
+
+
+def _iter_rows(pages: list, mode: str) -> Iterator[DriverRow]:
+    """
+    Tabellen-Modus mit Rückfall auf die Text-Regex, falls keine Tabelle erkannt wurde.
+    """
+    if mode == "table":
+        found = False
+        for row in iter_table_rows(pages):
+            found = True
+            yield row
+        if found:
+            return
+    yield from iter_driver_rows(pages)
+
+
+def parse_scorecard(source: Union[bytes, str, Path], mode: Optional[str] = None) -> ScorecardResult:
+    """
+    Parst eine Scorecard (Bytes oder Dateipfad) in einem Durchlauf.
+    Seite 2 enthält die Firmenwerte, ab Seite 3 folgt die Fahrertabelle.
+    `mode` ist "table" (Standard, zugeschnittene Tabelle) oder "text" (Regex über den Seitentext).
+    Läuft typischerweise im Prozesspool der PDF-Engine.
+
+    Seiten werden einzeln gelesen und wieder geschlossen, die Fahrerzeilen
+    dagegen vollständig gesammelt: Das Ergebnis geht gepickelt aus dem
+    Prozesspool zurück und landet im Parse-Cache (Speicher und JSON auf der
+    Platte), beides braucht eine fertige Liste. Die Zeilen selbst sind klein
+    (einige hundert je Scorecard); der Speicher hängt an den PDF-Seiten.
+    """
+    result = ScorecardResult()
+    with _open(source) as pdf:
+        pages = pdf.pages
+        if len(pages) >= 2:
+            parse_firm_page(pages[1].extract_text() or "", result)
+            pages[1].close()
+        result.drivers = list(_iter_rows(pages[2:], mode or settings.SCORECARD_PARSE_MODE))
+
+    result.has_lor = any(row.lor_dpmo is not None for row in result.drivers)
+    return result
@@ -1,88 +1,212 @@
-from pdfplumber import open as open_pdf
-import re
-from pathlib import Path
-
-
-def extract_kw_from_filename(filename: str) -> str:
-    match = re.search(r"(KW|Week)[-_]?\d{1,2}", filename, re.IGNORECASE)
-    return match.group(0).replace("_", "-").upper() if match else "KW?"
-
-
-def extract_scorecard_data(pdf_path: Path) -> dict:
-    import re
-    from pdfplumber import open as open_pdf
-
-    with open_pdf(str(pdf_path)) as pdf:
-        text = pdf.pages[1].extract_text()  # Seite 2
-
-    # Text glätten
-    flat_text = text.replace("\n", " ")
-
-    overall_score = None
-    rank = None
-    focus_areas = []
-
-    # 1. Overall Score (Beispiel: 75.22 | Great)
-    score_match = re.search(r"Overall Score:\s*([0-9]{2,3}\.[0-9]{1,2})\s*\|", flat_text, re.IGNORECASE)
-    if score_match:
-        overall_score = float(score_match.group(1))
-
-    # 2. Rank (Beispiel: Rank at DSU1: 6)
-    rank_match = re.search(r"Rank at DSU1[:\s]*([0-9]+)", flat_text, re.IGNORECASE)
-    if rank_match:
-        rank = int(rank_match.group(1))
-
-    # 3. Focus Areas (ab "Recommended Focus Areas")
-    if "Recommended Focus Areas" in text:
-        focus_block = text.split("Recommended Focus Areas")[-1]
-        focus_areas = re.findall(r"\d+\.\s+(.*?)\n", focus_block)
-
+from dataclasses import asdict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.firm_scorecard import FirmScorecard
+from app.models.scorecard_driver import ScorecardDriver
+from app.services.employee_resolver import ResolvedEmployee, employee_resolver
+from app.services.import_stats import ImportStats
+from app.services.jobs import Job, run_with_session
+from app.services.scorecard_cache import parse_scorecard_cached
+from app.services.scorecard_trends import refresh_trends
+from app.services.scorecard_parser import DriverRow, ScorecardResult, extract_kw_from_filename
+
+# Zeilen pro Bulk-INSERT
+INSERT_CHUNK_SIZE = 500
+
+
+def extract_scorecard_data(result: ScorecardResult, filename: str) -> dict:
+    """
+    Baut die Vorschau für /upload/scorecard aus einem bereits geparsten Dokument.
+    """
     return {
-        "overall_score": overall_score,
-        "rank": rank,
-        "focus_areas": focus_areas
+        "overall_score": result.overall_score,
+        "rank": result.rank,
+        "focus_areas": result.focus_areas,
+        "kw": extract_kw_from_filename(filename),
+        "firm_kpis": {
+            "metrics": [asdict(metric) for metric in result.firm_metrics]
+        },
     }
 
 
-def extract_firm_kpis_from_pdf(pdf_path: Path) -> dict:
-    import re
-    from pdfplumber import open as open_pdf
-
-    with open_pdf(str(pdf_path)) as pdf:
-        text = pdf.pages[1].extract_text()
-
-    firm_kpis = []
-
-    # Wir splitten den Text in Zeilen
-    lines = text.split("\n")
-
-    pattern = re.compile(r"([0-9]+(?:\.[0-9]+)?%?)\s*\|\s*(Fantastic|Great|Fair|Poor|In Compliance|None|Not in Compliance)", re.IGNORECASE)
-
-    for line in lines:
-        match = pattern.search(line)
-        if match:
-            value = match.group(1)
-            status = match.group(2).strip().capitalize()
-
-            # Der KPI-Name steht links vom Wert
-            name = line[:match.start()].strip()
-            name = re.sub(r"\s+", " ", name)  # doppelte Leerzeichen entfernen
-
-            firm_kpis.append({
-                "name": name,
-                "value": value,
-                "status": status
-            })
-
-    # Sonderfall: Breach of Contract (BOC)
-    boc_match = re.search(r"Breach of Contract \(BOC\)\s+(None|Not in Compliance)", text, re.IGNORECASE)
-    if boc_match:
-        firm_kpis.append({
-            "name": "Breach of Contract (BOC)",
-            "value": boc_match.group(1),
-            "status": boc_match.group(1).capitalize()
-        })
-
+def _driver_mappings(
+    rows: Iterable[DriverRow], week: int, year: int, employees: Dict[str, ResolvedEmployee]
+) -> Iterator[dict]:
+    for row in rows:
+        employee = employees.get(row.transporter_id)
+        yield {
+            "week": week,
+            "year": year,
+            "transporter_id": row.transporter_id,
+            "employee_id": employee.id if employee else None,
+            "name": employee.name if employee else row.transporter_id,
+            "delivered": row.delivered,
+            "dcr": row.dcr,
+            "dnr_dpmo": row.dnr_dpmo,
+            "lor_dpmo": row.lor_dpmo,
+            "pod": row.pod,
+            "cc": row.cc,
+            "ce": row.ce,
+            "dex": row.dex,
+        }
+
+
+def _unique_rows(rows: Iterable[DriverRow], seen: Set[str]) -> Iterator[DriverRow]:
+    for row in rows:
+        if row.transporter_id not in seen:
+            seen.add(row.transporter_id)
+            yield row
+
+
+def save_driver_rows(
+    db: Session, rows: Iterable[DriverRow], week: int, year: int, stats: Optional[ImportStats] = None
+) -> Set[str]:
+    """
+    Schreibt Fahrerzeilen blockweise als Bulk-INSERT, ohne ORM-Objekte aufzubauen.
+    Mitarbeiter werden je Block über den Resolver aufgelöst (höchstens eine Abfrage).
+    Doppelte Transporter-IDs im Dokument werden nur einmal gespeichert.
+    Gibt die gespeicherten Transporter-IDs zurück.
+    """
+    stats = stats or ImportStats()
+    saved: Set[str] = set()
+    rows = _unique_rows(rows, saved)
+    while True:
+        chunk = list(islice(rows, INSERT_CHUNK_SIZE))
+        if not chunk:
+            break
+        with stats.stage("validate"):
+            employees = employee_resolver.resolve(db, (row.transporter_id for row in chunk))
+        stats.count("batches")
+        db.execute(insert(ScorecardDriver), list(_driver_mappings(chunk, week, year, employees)))
+
+    return saved
+
+
+def scorecard_message(counts: Dict[str, int], week: int) -> str:
+    return (
+        f"{counts['drivers']} Fahrer und Firmen-KPIs für KW {week} gespeichert "
+        f"({counts['replaced']} ersetzt, {counts['inserted']} neu)."
+    )
+
+
+def delete_week(db: Session, week: int, year: int, drivers: bool = True) -> Tuple[Set[str], int]:
+    """
+    Löscht Fahrer- und Firmenwerte einer Woche (ohne Commit); mit
+    `drivers=False` nur die Firmenwerte.
+    Gibt die Transporter-IDs der gelöschten Fahrerzeilen und deren Anzahl zurück
+    (Altbestand ohne Transporter-ID zählt nur in der Anzahl).
+    """
+    if not drivers:
+        db.query(FirmScorecard).filter_by(week=week, year=year).delete(synchronize_session=False)
+        return set(), 0
+
+    existing = {
+        transporter_id for (transporter_id,) in
+        db.query(ScorecardDriver.transporter_id).filter_by(week=week, year=year)
+        if transporter_id
+    }
+    deleted = db.query(ScorecardDriver).filter_by(week=week, year=year).delete(synchronize_session=False)
+    db.query(FirmScorecard).filter_by(week=week, year=year).delete(synchronize_session=False)
+    return existing, deleted
+
+
+def save_scorecard(
+    db: Session, result: ScorecardResult, week: int, year: int, stats: Optional[ImportStats] = None
+) -> Dict[str, int]:
+    """
+    Ersetzt die Scorecard-Daten einer Woche (ohne Commit): vorhandene Fahrer-
+    und Firmenwerte werden gelöscht und neu geschrieben. Wiederholte Uploads
+    derselben Datei ändern den Tabellenbestand daher nicht.
+
+    Zählt je Fahrer, ob er ersetzt (war schon gespeichert), neu eingefügt oder
+    entfernt wurde (nur im alten Datenbestand). Enthält die Datei keine Fahrer
+    (z. B. kombinierte PDF nur mit Firmen-KPIs), bleiben die gespeicherten
+    Fahrer der Woche erhalten.
+    """
+    stats = stats or ImportStats()
+    stats.count("rows", len(result.drivers))
+    try:
+        with stats.stage("insert"):
+            existing, deleted = delete_week(db, week, year, drivers=bool(result.drivers))
+            saved = save_driver_rows(db, result.drivers, week, year, stats)
+
+            db.add(FirmScorecard(
+                week=week,
+                year=year,
+                dcr=result.firm_kpis.dcr,
+                dnr_dpmo=result.firm_kpis.dnr_dpmo,
+                lor_dpmo=result.firm_kpis.lor_dpmo,
+            ))
+            db.flush()
+
+            # Gleitende Durchschnitte der betroffenen Wochen in derselben Transaktion nachziehen
+            refresh_trends(db, year, week)
+    except IntegrityError:
+        # Nur bei parallelem Import derselben Woche möglich
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Scorecard für KW {week}/{year} wird gerade gleichzeitig importiert, bitte erneut versuchen.",
+        )
+
+    replaced = len(saved & existing)
     return {
-        "metrics": firm_kpis
+        "drivers": len(saved),
+        "replaced": replaced,
+        "inserted": len(saved) - replaced,
+        "removed": deleted - replaced,
     }
+
+
+def store_scorecard(
+    db: Session, result: ScorecardResult, week: int, year: int, stats: Optional[ImportStats] = None
+) -> Dict[str, int]:
+    """
+    Wie save_scorecard, aber mit Commit (für Hintergrund-Jobs mit eigener Session).
+    """
+    stats = stats or ImportStats()
+    counts = save_scorecard(db, result, week, year, stats)
+    with stats.stage("commit"):
+        db.commit()
+    return counts
+
+
+def scorecard_response(
+    kind: str, counts: Dict[str, int], week: int, year: int, stats: ImportStats, with_stats: bool = False
+) -> dict:
+    """
+    Antwort eines Scorecard-Imports; die Statistik wird immer geloggt und
+    nur mit `with_stats` zurückgegeben.
+    """
+    stats.log(kind, week=week, year=year, **counts)
+    response = {"message": scorecard_message(counts, week), **counts}
+    if with_stats:
+        response["stats"] = stats.to_dict()
+    return response
+
+
+async def import_scorecard_job(
+    job: Job, contents: bytes, week: int, year: int, require_drivers: bool, with_stats: bool = False
+) -> dict:
+    """
+    Hintergrund-Job: Scorecard parsen (Prozesspool/Cache) und speichern.
+    """
+    stats = ImportStats()
+    stats.count("bytes", len(contents))
+    with stats.stage("parse"):
+        result = await parse_scorecard_cached(contents)
+    job.progress = 0.5
+
+    if require_drivers and not result.drivers:
+        raise ValueError("Keine Fahrer-Daten in der Scorecard gefunden.")
+
+    counts = await run_with_session(store_scorecard, result, week, year, stats)
+    kind = "driver_scorecard" if require_drivers else "combined_scorecard"
+    response = scorecard_response(kind, counts, week, year, stats, with_stats)
+    return {**response, "week": week, "year": year}
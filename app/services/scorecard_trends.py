@@ -0,0 +1,151 @@
+"""
+Inkrementell gepflegte Trends (gleitende 4- und 13-Wochen-Durchschnitte) je
+Fahrer und für die Firmen-KPIs.
+
+Ein Import der Woche W ändert nur die Fenster, die W enthalten, also die
+Wochen W bis W+12. Dafür werden die Rohwerte von W-13 bis W+12 geladen (26
+Wochen, unabhängig von der Länge der Historie), die Durchschnitte für alle
+Fahrer und Kennzahlen spaltenweise mit pandas berechnet und die betroffenen
+Zeilen in scorecard_trends ersetzt. Lesezugriffe gehen nur auf diese Tabelle.
+"""
+import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.firm_scorecard import FirmScorecard
+from app.models.scorecard_trend import ScorecardTrend
+from app.services.driver_scoring import METRICS, load_driver_frame, score_drivers
+
+WINDOWS = {"4w": 4, "13w": 13}
+MAX_WINDOW = max(WINDOWS.values())
+
+DRIVER_METRICS = list(METRICS) + ["score"]
+FIRM_METRICS = ["dcr", "dnr_dpmo", "lor_dpmo"]
+FIRM_SUBJECT = "firm"
+
+
+def check_week(year: int, week: int):
+    """
+    Wirft 400, wenn es die ISO-Kalenderwoche im Jahr nicht gibt (z. B. KW 53 in 2025).
+    """
+    weeks_in_year = datetime.date(year, 12, 28).isocalendar()[1]
+    if not 1 <= week <= weeks_in_year:
+        raise HTTPException(status_code=400, detail=f"KW {week}/{year} existiert nicht (1–{weeks_in_year})")
+
+
+def _week_index(year: int, week: int) -> int:
+    # Fortlaufende Wochennummer über Jahresgrenzen (ISO-Wochen, Montag)
+    return (datetime.date.fromisocalendar(year, week, 1).toordinal() - 1) // 7
+
+
+def _from_week_index(index: int) -> Tuple[int, int]:
+    iso = datetime.date.fromordinal(index * 7 + 1).isocalendar()
+    return iso[0], iso[1]
+
+
+def _driver_values(db: Session, weeks: List[Tuple[int, int]]) -> pd.DataFrame:
+    frame = score_drivers(load_driver_frame(db, weeks))
+    frame = frame[frame["transporter_id"].notna()]
+    long = frame.melt(
+        id_vars=["year", "week", "transporter_id"], value_vars=DRIVER_METRICS, var_name="metric"
+    )
+    long = long.rename(columns={"transporter_id": "subject"})
+    long["scope"] = "driver"
+    return long
+
+
+def _firm_values(db: Session, weeks: List[Tuple[int, int]]) -> pd.DataFrame:
+    columns = ["year", "week"] + FIRM_METRICS
+    stmt = select(*(getattr(FirmScorecard, name) for name in columns)).where(
+        tuple_(FirmScorecard.year, FirmScorecard.week).in_(weeks)
+    )
+    frame = pd.DataFrame(db.execute(stmt).all(), columns=columns)
+    long = frame.melt(id_vars=["year", "week"], value_vars=FIRM_METRICS, var_name="metric")
+    long["subject"] = FIRM_SUBJECT
+    long["scope"] = "firm"
+    return long
+
+
+def compute_trends(values: pd.DataFrame, first: int, last: int) -> pd.DataFrame:
+    """
+    Berechnet für alle (scope, subject, metric)-Reihen gleichzeitig die
+    gleitenden Durchschnitte und deren Veränderung zur Vorwoche.
+    Liefert Zeilen für Wochen im Bereich [first, last], in denen es Werte gibt.
+    """
+    values = values.copy()
+    values["value"] = pd.to_numeric(values["value"], errors="coerce").astype(float)
+    values["week_index"] = [_week_index(y, w) for y, w in zip(values["year"], values["week"])]
+
+    # Eine Spalte je Reihe, eine Zeile je Kalenderwoche (fehlende Wochen als NaN)
+    series = ["scope", "subject", "metric"]
+    wide = values.pivot(index="week_index", columns=series, values="value")
+    start = int(values["week_index"].min())
+    wide = wide.reindex(range(start, last + 1))
+
+    result = values[(values["week_index"] >= first) & (values["week_index"] <= last)].copy()
+    # Position jeder Ergebniszeile in der Wochen × Reihen-Matrix
+    rows = result["week_index"].to_numpy() - start
+    cols = wide.columns.get_indexer(pd.MultiIndex.from_frame(result[series]))
+
+    for suffix, size in WINDOWS.items():
+        average = wide.rolling(size, min_periods=1).mean().to_numpy()
+        delta = np.full_like(average, np.nan)
+        delta[1:] = average[1:] - average[:-1]
+        result[f"avg_{suffix}"] = average[rows, cols]
+        result[f"delta_{suffix}"] = delta[rows, cols]
+
+    return result.drop(columns="week_index")
+
+
+def refresh_trends(db: Session, year: int, week: int) -> int:
+    """
+    Aktualisiert die Trends nach Import oder Löschung der Woche (ohne Commit).
+    Gibt die Anzahl der geschriebenen Trendzeilen zurück.
+    """
+    center = _week_index(year, week)
+    first, last = center, center + MAX_WINDOW - 1
+    source_weeks = [_from_week_index(i) for i in range(center - MAX_WINDOW, last + 1)]
+    target_weeks = [_from_week_index(i) for i in range(first, last + 1)]
+
+    db.query(ScorecardTrend).filter(
+        tuple_(ScorecardTrend.year, ScorecardTrend.week).in_(target_weeks)
+    ).delete(synchronize_session=False)
+
+    values = pd.concat([_driver_values(db, source_weeks), _firm_values(db, source_weeks)], ignore_index=True)
+    if values.empty:
+        return 0
+
+    trends = compute_trends(values, first, last)
+    trends = trends.round(4)
+    rows = trends.astype(object).where(trends.notna(), None).to_dict("records")
+    if rows:
+        db.execute(insert(ScorecardTrend), rows)
+    return len(rows)
+
+
+def get_trends(
+    db: Session,
+    year: int,
+    week: int,
+    scope: str = "driver",
+    subject: Optional[str] = None,
+    metric: Optional[str] = None,
+) -> List[ScorecardTrend]:
+    """
+    Trends einer Woche aus der Aggregattabelle (ix_scorecard_trends_scope_year_week).
+    """
+    query = db.query(ScorecardTrend).filter(
+        ScorecardTrend.scope == scope,
+        ScorecardTrend.year == year,
+        ScorecardTrend.week == week,
+    )
+    if subject:
+        query = query.filter(ScorecardTrend.subject == subject)
+    if metric:
+        query = query.filter(ScorecardTrend.metric == metric)
+    return query.order_by(ScorecardTrend.subject, ScorecardTrend.metric).all()
@@ -0,0 +1,308 @@
+"""
+Automatische Schichtplanung über beliebige Zeiträume mit Bedarfsvorgaben.
+
+Ein Planungslauf lädt aktive Mitarbeiter und die vorhandenen Zuweisungen des
+Zeitraums (auf ganze Wochen erweitert) je einmal, plant den ganzen Horizont im
+Speicher und schreibt das Ergebnis mit einem mehrzeiligen INSERT.
+
+Verfügbarkeit (Matrix Mitarbeiter × Tage):
+- keine Tage in der Vergangenheit, an Feiertagen des Bundeslands, außerhalb
+  von Eintritt/Austritt oder mit bereits vorhandener Zuweisung (auch krank/Urlaub)
+- höchstens `days_per_week` Arbeitstage je Woche (Mo–So), vorhandene
+  Arbeitsschichten zählen mit; `prefers_six_days` erlaubt bei Unterdeckung
+  einen sechsten Tag
+- bevorzugte Wochentage zuerst; andere Tage nur für flexible Mitarbeiter
+  bzw. im Modus "maximum"
+- aktive Mitarbeiter ohne Bundesland werden ohne Fehler übersprungen (keine
+  Feiertage bestimmbar); sie erscheinen nur als Anzahl in `skipped_employees`
+
+Zuteilung in drei Durchgängen (bevorzugte Tage, übrige erlaubte Tage,
+sechster Tag). Je Durchgang werden die Tage nach Knappheit abgearbeitet
+(verfügbare je fehlende Fahrer, knappste zuerst); je Tag erhalten die
+Mitarbeiter mit der bisher geringsten Auslastung den Zuschlag. Ohne
+Bedarfsvorgabe wird jeder Mitarbeiter bis zu seinem Wochensoll eingeplant.
+"""
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.employee import Employee
+from app.models.schemas import ShiftDemand
+from app.models.shift import ShiftAssignment, ShiftType
+from app.services.holiday_calendar import holiday_calendar, normalize_state
+from app.services.pagination import count_cache
+
+settings = get_settings()
+
+PLAN_MODE_PATTERN = "^(forecast|maximum)$"
+
+# Wochentage für Mitarbeiter mit prefers_six_days (nur bei Unterdeckung)
+SIX_DAYS = 6
+
+
+@dataclass
+class PlanResult:
+    start: datetime.date
+    end: datetime.date
+    mode: str
+    created: int = 0
+    skipped_employees: int = 0
+    # je Tag ab `start`: neu geplant, Arbeitsschichten gesamt, Bedarf (None = ohne Vorgabe)
+    planned: List[int] = field(default_factory=list)
+    headcount: List[int] = field(default_factory=list)
+    demand: List[Optional[int]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        days = [
+            {
+                "date": self.start + datetime.timedelta(days=offset),
+                "planned": planned,
+                "headcount": headcount,
+                "demand": demand,
+                "shortfall": max(demand - headcount, 0) if demand is not None else None,
+            }
+            for offset, (planned, headcount, demand) in enumerate(zip(self.planned, self.headcount, self.demand))
+        ]
+        return {
+            "message": f"Auto-Planung für {self.start} – {self.end} im Modus '{self.mode}' abgeschlossen.",
+            "start": self.start,
+            "end": self.end,
+            "mode": self.mode,
+            "created": self.created,
+            "skipped_employees": self.skipped_employees,
+            "shortfall": sum(day["shortfall"] or 0 for day in days),
+            "days": days,
+        }
+
+
+def _week_start(day: datetime.date) -> datetime.date:
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def _demand_vector(demand: Optional[ShiftDemand], days: List[datetime.date]) -> Optional[np.ndarray]:
+    if demand is None or (demand.weekday is None and not demand.days):
+        return None
+    # Tage ohne Vorgabe (weder Wochentag noch Einzeltag): kein Bedarf
+    weekday = demand.weekday or [0] * 7
+    return np.array([demand.days.get(day, weekday[day.weekday()]) for day in days], dtype=np.int64)
+
+
+def _assign(
+    eligible: np.ndarray,
+    remaining: np.ndarray,
+    week_of_day: np.ndarray,
+    need: np.ndarray,
+    assigned: np.ndarray,
+    load: np.ndarray,
+    capacity: np.ndarray,
+):
+    """
+    Ein Durchgang: Tage nach Knappheit, je Tag die geringste Auslastung zuerst.
+    Ändert `remaining`, `need`, `assigned` und `load` an Ort und Stelle.
+    """
+    supply = eligible.sum(axis=0)
+    open_days = np.flatnonzero((need > 0) & (supply > 0))
+    order = open_days[np.argsort(supply[open_days] / need[open_days], kind="stable")]
+
+    for day in order:
+        week = week_of_day[day]
+        candidates = np.flatnonzero(eligible[:, day] & ~assigned[:, day] & (remaining[:, week] > 0))
+        if candidates.size == 0:
+            continue
+        take = min(int(need[day]), candidates.size)
+        if take < candidates.size:
+            utilization = load[candidates] / capacity[candidates]
+            candidates = candidates[np.argsort(utilization, kind="stable")[:take]]
+        assigned[candidates, day] = True
+        remaining[candidates, week] -= 1
+        load[candidates] += 1
+        need[day] -= take
+
+
+@dataclass
+class Availability:
+    """
+    Planungsgrundlage für einen Zeitraum: Matrizen Mitarbeiter × Tage
+    (nur aktive Mitarbeiter mit Bundesland) und die Besetzung je Tag.
+    """
+    start: datetime.date
+    days: List[datetime.date]
+    weeks: int                     # Wochen ab Montag vor `start`
+    week_of_day: np.ndarray        # Tag → Woche
+    employee_ids: List[int]
+    index: Dict[int, int]          # Mitarbeiter-ID → Zeile
+    skipped: int                   # aktive Mitarbeiter ohne Bundesland
+    eligible: np.ndarray           # beschäftigt und kein Feiertag
+    preferred: np.ndarray          # bevorzugter Wochentag
+    others_allowed: np.ndarray     # je Mitarbeiter: auch andere Tage (flexibel / "maximum")
+    six_days: np.ndarray
+    days_per_week: np.ndarray
+    occupied: np.ndarray           # irgendeine Zuweisung (auch krank/Urlaub)
+    work: np.ndarray               # Arbeitsschicht
+    worked: np.ndarray             # Arbeitsschichten je Mitarbeiter und Woche
+    headcount: np.ndarray          # Arbeitsschichten je Tag (alle Mitarbeiter)
+
+
+def load_availability(db: Session, start: datetime.date, end: datetime.date, mode: str = "forecast") -> Availability:
+    """
+    Lädt Mitarbeiter und die Zuweisungen der betroffenen Wochen je einmal
+    und baut daraus die Matrizen für Planung und Umplanung.
+    """
+    days = [start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)]
+    load_start = _week_start(start)
+    load_end = _week_start(end) + datetime.timedelta(days=6)
+    weeks = (load_end - load_start).days // 7 + 1
+    week_of_day = np.array([(day - load_start).days // 7 for day in days], dtype=np.int64)
+    weekday_of_day = np.array([day.weekday() for day in days], dtype=np.int64)
+    ordinal_of_day = np.array([day.toordinal() for day in days], dtype=np.int64)
+
+    employees = db.query(Employee).filter(Employee.is_active == True).order_by(Employee.id).all()
+    skipped = sum(1 for emp in employees if not emp.federal_state)
+    employees = [emp for emp in employees if emp.federal_state]
+    index = {emp.id: position for position, emp in enumerate(employees)}
+    n = len(employees)
+
+    # Beschäftigungszeitraum
+    first_day = np.array([emp.start_date.toordinal() if emp.start_date else 0 for emp in employees], dtype=np.int64)
+    last_day = np.array([emp.end_date.toordinal() if emp.end_date else 10**7 for emp in employees], dtype=np.int64)
+    eligible = (ordinal_of_day[None, :] >= first_day[:, None]) & (ordinal_of_day[None, :] <= last_day[:, None])
+
+    # Feiertage: eine Zeile je Bundesland statt je Mitarbeiter
+    states: Dict[Optional[str], int] = {}
+    state_of_employee = np.zeros(n, dtype=np.int64)
+    for position, emp in enumerate(employees):
+        try:
+            state = normalize_state(emp.federal_state)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{e} bei Mitarbeiter {emp.name}")
+        state_of_employee[position] = states.setdefault(state, len(states))
+    holiday_rows = np.array(
+        [[holiday_calendar.is_holiday(state, day) for day in days] for state in states], dtype=bool
+    ).reshape(len(states), len(days))
+    eligible &= ~holiday_rows[state_of_employee]
+
+    # Vorhandene Zuweisungen: Tag belegt (auch krank/Urlaub), Arbeitsschichten zählen zum Wochensoll
+    occupied = np.zeros((n, len(days)), dtype=bool)
+    work = np.zeros((n, len(days)), dtype=bool)
+    worked = np.zeros((n, weeks), dtype=np.int64)
+    headcount = np.zeros(len(days), dtype=np.int64)
+    for employee_id, day, shift_type in db.query(
+        ShiftAssignment.employee_id, ShiftAssignment.date, ShiftAssignment.shift_type
+    ).filter(ShiftAssignment.date >= load_start, ShiftAssignment.date <= load_end):
+        offset = (day - start).days
+        in_range = 0 <= offset < len(days)
+        if shift_type == ShiftType.work and in_range:
+            headcount[offset] += 1
+        position = index.get(employee_id)
+        if position is None:
+            continue
+        if in_range:
+            occupied[position, offset] = True
+            work[position, offset] = shift_type == ShiftType.work
+        if shift_type == ShiftType.work:
+            worked[position, (day - load_start).days // 7] += 1
+
+    # Präferenzen, Flexibilität und Wochensoll
+    preferred_weekdays = np.zeros((n, 7), dtype=bool)
+    for position, emp in enumerate(employees):
+        for weekday in emp.preferred_days or []:
+            if 0 <= weekday <= 6:
+                preferred_weekdays[position, weekday] = True
+
+    return Availability(
+        start=start,
+        days=days,
+        weeks=weeks,
+        week_of_day=week_of_day,
+        employee_ids=[emp.id for emp in employees],
+        index=index,
+        skipped=skipped,
+        eligible=eligible,
+        preferred=preferred_weekdays[:, weekday_of_day],
+        others_allowed=np.array([mode == "maximum" or bool(emp.is_flexible) for emp in employees], dtype=bool),
+        six_days=np.array([bool(emp.prefers_six_days) for emp in employees], dtype=bool),
+        days_per_week=np.array([emp.days_per_week or 0 for emp in employees], dtype=np.int64),
+        occupied=occupied,
+        work=work,
+        worked=worked,
+        headcount=headcount,
+    )
+
+
+def not_past(days: List[datetime.date]) -> np.ndarray:
+    today = datetime.date.today()
+    return np.array([day >= today for day in days], dtype=bool)
+
+
+def plan_range(
+    db: Session,
+    start: datetime.date,
+    end: datetime.date,
+    mode: str = "forecast",
+    demand: Optional[ShiftDemand] = None,
+) -> PlanResult:
+    """
+    Plant Arbeitsschichten für alle aktiven Mitarbeiter von `start` bis `end`
+    (einschließlich) und committet. Mit `demand` wird je Tag höchstens der
+    Bedarf besetzt; fehlende Fahrer werden als `shortfall` ausgewiesen.
+    Mitarbeiter ohne Bundesland werden nicht eingeplant, nur gezählt.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="Enddatum liegt vor dem Startdatum")
+    if (end - start).days + 1 > settings.SHIFT_PLAN_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Planungszeitraum zu lang (höchstens {settings.SHIFT_PLAN_MAX_DAYS} Tage)",
+        )
+
+    av = load_availability(db, start, end, mode)
+    days = av.days
+    n = len(av.employee_ids)
+    available = av.eligible & ~av.occupied & not_past(days)[None, :]
+
+    target = _demand_vector(demand, days)
+    if target is not None:
+        need = np.maximum(target - av.headcount, 0)
+    else:
+        need = np.full(len(days), n, dtype=np.int64)
+
+    remaining = np.maximum(av.days_per_week[:, None] - av.worked, 0)
+    assigned = np.zeros((n, len(days)), dtype=bool)
+    load = av.worked.sum(axis=1).astype(np.float64)
+    capacity = np.maximum(av.days_per_week * av.weeks, 1).astype(np.float64)
+    others = av.others_allowed[:, None]
+
+    _assign(available & av.preferred, remaining, av.week_of_day, need, assigned, load, capacity)
+    _assign(available & others, remaining, av.week_of_day, need, assigned, load, capacity)
+    if target is not None and av.six_days.any() and need.any():
+        # Sechster Tag nur bei Unterdeckung und nur für Mitarbeiter, die ihn wünschen
+        remaining += np.where(av.six_days, np.maximum(SIX_DAYS - av.days_per_week, 0), 0)[:, None]
+        eligible = available & (av.preferred | others) & av.six_days[:, None]
+        _assign(eligible, remaining, av.week_of_day, need, assigned, load, capacity)
+
+    rows = [
+        {"employee_id": av.employee_ids[position], "date": days[offset], "shift_type": ShiftType.work}
+        for position, offset in zip(*np.nonzero(assigned))
+    ]
+    if rows:
+        db.execute(insert(ShiftAssignment.__table__), rows)
+    db.commit()
+    count_cache.invalidate(ShiftAssignment.__tablename__)
+
+    planned = assigned.sum(axis=0)
+    return PlanResult(
+        start=start,
+        end=end,
+        mode=mode,
+        created=len(rows),
+        skipped_employees=av.skipped,
+        planned=planned.tolist(),
+        headcount=(av.headcount + planned).tolist(),
+        demand=target.tolist() if target is not None else [None] * len(days),
+    )
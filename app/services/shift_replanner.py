@@ -0,0 +1,347 @@
+"""
+Umplanung bei Abwesenheiten (krank, Urlaub).
+
+Wird ein Fahrer für einzelne Tage abgemeldet, werden nur diese Tage neu
+besetzt, ausgehend vom zwischengespeicherten Wochenzustand (Verfügbarkeit
+wie in shift_planner):
+
+1. direkter Ersatz: verfügbarer Fahrer mit freiem Wochensoll; bevorzugter
+   Tag und geringste Auslastung zuerst, ein sechster Tag (prefers_six_days)
+   nur, wenn es sonst niemanden gibt
+2. Tausch: ein Fahrer, dessen Wochensoll erfüllt ist, wechselt von einem
+   anderen Tag der Woche auf den Tag; sein alter Tag wird direkt nachbesetzt
+
+Ergebnis ist die Liste der Änderungen (add/remove); ohne `apply` wird nur
+vorgeschlagen. Der Wochenzustand bleibt gültig, bis Mitarbeiter oder
+Schichten an anderer Stelle geändert werden (Generationen von count_cache)
+oder die TTL abläuft; eigene Änderungen werden direkt eingearbeitet.
+"""
+import dataclasses
+import datetime
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.employee import Employee
+from app.models.schemas import AbsenceCreate
+from app.models.shift import ShiftAssignment, ShiftType
+from app.services.pagination import count_cache
+from app.services.shift_planner import SIX_DAYS, Availability, load_availability
+
+settings = get_settings()
+
+ABSENCE_TYPES = (ShiftType.sick, ShiftType.vacation)
+# Höchstens so viele Fahrer werden je Tag als Tauschpartner geprüft
+SWAP_CANDIDATES = 50
+
+Generations = Tuple[int, int]
+
+
+def _week_start(day: datetime.date) -> datetime.date:
+    return day - datetime.timedelta(days=day.weekday())
+
+
+# ============================================================
+#                WOCHENZUSTAND
+# ============================================================
+
+class WeekStateCache:
+    """
+    Verfügbarkeit je Woche (Montag → Availability) als LRU mit TTL.
+    """
+    def __init__(self, max_weeks: int, ttl: float):
+        self.max_weeks = max_weeks
+        self.ttl = ttl
+        self._entries: "OrderedDict[datetime.date, Tuple[Availability, Generations, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def generations() -> Generations:
+        return (
+            count_cache.generation(Employee.__tablename__),
+            count_cache.generation(ShiftAssignment.__tablename__),
+        )
+
+    def get(self, db: Session, week_start: datetime.date) -> Availability:
+        generations = self.generations()
+        with self._lock:
+            entry = self._entries.get(week_start)
+            if entry and entry[1] == generations and time.monotonic() - entry[2] < self.ttl:
+                self._entries.move_to_end(week_start)
+                return entry[0]
+
+        availability = load_availability(db, week_start, week_start + datetime.timedelta(days=6))
+        self.put(week_start, availability, generations)
+        return availability
+
+    def put(self, week_start: datetime.date, availability: Availability, generations: Optional[Generations] = None):
+        with self._lock:
+            self._entries[week_start] = (availability, generations or self.generations(), time.monotonic())
+            self._entries.move_to_end(week_start)
+            while len(self._entries) > self.max_weeks:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+week_states = WeekStateCache(max_weeks=settings.REPLAN_CACHE_WEEKS, ttl=settings.REPLAN_CACHE_TTL)
+
+# Umplanungen nacheinander, damit zwei Abmeldungen nicht denselben Ersatz wählen
+_replan_lock = threading.Lock()
+
+
+def _working_copy(av: Availability) -> Availability:
+    return dataclasses.replace(
+        av,
+        occupied=av.occupied.copy(),
+        work=av.work.copy(),
+        worked=av.worked.copy(),
+        headcount=av.headcount.copy(),
+    )
+
+
+# ============================================================
+#                ERSATZSUCHE
+# ============================================================
+
+@dataclass
+class Change:
+    action: str  # "add" oder "remove"
+    employee_id: int
+    date: datetime.date
+    shift_type: ShiftType
+
+    def to_dict(self) -> dict:
+        return {
+            "action": self.action,
+            "employee_id": self.employee_id,
+            "date": self.date,
+            "shift_type": self.shift_type.value,
+        }
+
+
+def _book(av: Availability, position: int, offset: int, shift_type: ShiftType, add: bool):
+    if add:
+        av.occupied[position, offset] = True
+        if shift_type == ShiftType.work:
+            av.work[position, offset] = True
+            av.worked[position, 0] += 1
+            av.headcount[offset] += 1
+        return
+    if av.work[position, offset] and shift_type == ShiftType.work:
+        av.work[position, offset] = False
+        av.worked[position, 0] -= 1
+        av.headcount[offset] -= 1
+    av.occupied[position, offset] = False
+
+
+def _free(av: Availability, offset: int) -> np.ndarray:
+    return av.eligible[:, offset] & ~av.occupied[:, offset] & (av.preferred[:, offset] | av.others_allowed)
+
+
+def _direct(av: Availability, offset: int, exclude: int = -1) -> Optional[int]:
+    """
+    Bester Ersatz mit freiem Wochensoll für den Tag `offset`, sonst None.
+    """
+    free = _free(av, offset)
+    if 0 <= exclude < len(free):
+        free[exclude] = False
+    worked = av.worked[:, 0]
+    regular = free & (worked < av.days_per_week)
+    sixth = free & ~regular & av.six_days & (worked < SIX_DAYS)
+    candidates = np.flatnonzero(regular | sixth)
+    if candidates.size == 0:
+        return None
+    utilization = worked[candidates] / np.maximum(av.days_per_week[candidates], 1)
+    # Reihenfolge: kein sechster Tag, bevorzugter Tag, geringste Auslastung
+    order = np.lexsort((utilization, ~av.preferred[candidates, offset], sixth[candidates]))
+    return int(candidates[order[0]])
+
+
+def _swap(av: Availability, offset: int, today: datetime.date) -> Optional[List[Tuple[str, int, int]]]:
+    """
+    Sucht einen Fahrer mit erfülltem Wochensoll, der von einem anderen Tag
+    auf `offset` wechseln kann, und einen direkten Ersatz für dessen alten Tag.
+    Liefert [(Aktion, Zeile, Tag), ...] und bucht den Tausch in `av`.
+    """
+    blocked = np.flatnonzero(_free(av, offset) & (av.worked[:, 0] >= av.days_per_week))
+    blocked = blocked[np.argsort(~av.preferred[blocked, offset], kind="stable")][:SWAP_CANDIDATES]
+    for position in blocked:
+        position = int(position)
+        for other in np.flatnonzero(av.work[position]):
+            other = int(other)
+            if other == offset or av.days[other] < today:
+                continue
+            _book(av, position, other, ShiftType.work, add=False)
+            replacement = _direct(av, other, exclude=position)
+            if replacement is None:
+                _book(av, position, other, ShiftType.work, add=True)
+                continue
+            _book(av, position, offset, ShiftType.work, add=True)
+            _book(av, replacement, other, ShiftType.work, add=True)
+            return [("remove", position, other), ("add", position, offset), ("add", replacement, other)]
+    return None
+
+
+def _compute(
+    db: Session,
+    absence: AbsenceCreate,
+    days: List[datetime.date],
+    demand: Optional[int],
+) -> Tuple[List[Change], List[datetime.date], Dict[datetime.date, Availability]]:
+    today = datetime.date.today()
+    existing: Dict[datetime.date, List[ShiftType]] = defaultdict(list)
+    for day, shift_type in db.query(ShiftAssignment.date, ShiftAssignment.shift_type).filter(
+        ShiftAssignment.employee_id == absence.employee_id,
+        ShiftAssignment.date >= days[0],
+        ShiftAssignment.date <= days[-1],
+    ):
+        existing[day].append(shift_type)
+
+    changes: List[Change] = []
+    uncovered: List[datetime.date] = []
+    states: Dict[datetime.date, Availability] = {}
+
+    for day in days:
+        week = _week_start(day)
+        if week not in states:
+            states[week] = _working_copy(week_states.get(db, week))
+        av = states[week]
+        offset = (day - week).days
+        position = av.index.get(absence.employee_id)
+
+        # Abwesenheit eintragen, andere Einträge des Tages ersetzen
+        current = existing.get(day, [])
+        if current == [absence.shift_type]:
+            continue
+        was_work = ShiftType.work in current
+        for shift_type in current:
+            if shift_type == absence.shift_type:
+                continue
+            changes.append(Change("remove", absence.employee_id, day, shift_type))
+            if position is not None:
+                _book(av, position, offset, shift_type, add=False)
+            elif shift_type == ShiftType.work:
+                av.headcount[offset] -= 1
+        if absence.shift_type not in current:
+            changes.append(Change("add", absence.employee_id, day, absence.shift_type))
+            if position is not None:
+                _book(av, position, offset, absence.shift_type, add=True)
+
+        # Nur heutige und künftige Tage nachbesetzen
+        if day < today:
+            continue
+        needed = max(demand - int(av.headcount[offset]), 0) if demand is not None else int(was_work)
+        for _ in range(needed):
+            replacement = _direct(av, offset)
+            if replacement is not None:
+                _book(av, replacement, offset, ShiftType.work, add=True)
+                changes.append(Change("add", av.employee_ids[replacement], day, ShiftType.work))
+                continue
+            swap = _swap(av, offset, today)
+            if swap is None:
+                uncovered.append(day)
+                break
+            changes.extend(
+                Change(action, av.employee_ids[row], av.days[other], ShiftType.work)
+                for action, row, other in swap
+            )
+
+    return changes, uncovered, states
+
+
+def _still_free(db: Session, changes: List[Change], employee_id: int) -> bool:
+    # Ersatzfahrer dürfen seit dem Laden des Wochenzustands nichts bekommen haben
+    pairs = [
+        (change.employee_id, change.date)
+        for change in changes
+        if change.action == "add" and change.employee_id != employee_id
+    ]
+    if not pairs:
+        return True
+    return db.query(ShiftAssignment.id).filter(
+        tuple_(ShiftAssignment.employee_id, ShiftAssignment.date).in_(pairs)
+    ).first() is None
+
+
+def _write(db: Session, changes: List[Change]):
+    for change in changes:
+        if change.action == "remove":
+            db.query(ShiftAssignment).filter(
+                ShiftAssignment.employee_id == change.employee_id,
+                ShiftAssignment.date == change.date,
+                ShiftAssignment.shift_type == change.shift_type,
+            ).delete(synchronize_session=False)
+    rows = [
+        {"employee_id": change.employee_id, "date": change.date, "shift_type": change.shift_type}
+        for change in changes if change.action == "add"
+    ]
+    if rows:
+        db.execute(insert(ShiftAssignment.__table__), rows)
+
+
+# ============================================================
+#                ÖFFENTLICHE API
+# ============================================================
+
+def replan_absence(db: Session, absence: AbsenceCreate, apply: bool = True, demand: Optional[int] = None) -> dict:
+    """
+    Trägt eine Abwesenheit ein und besetzt die betroffenen Tage nach.
+    Mit `demand` wird je Tag bis zu diesem Bedarf nachbesetzt, sonst je
+    ausgefallener Arbeitsschicht ein Ersatz. Ohne `apply` nur Vorschlag.
+    """
+    if absence.shift_type not in ABSENCE_TYPES:
+        raise HTTPException(status_code=400, detail="Nur Abwesenheiten (sick, vacation) erlaubt")
+    end = absence.end or absence.start
+    if end < absence.start:
+        raise HTTPException(status_code=400, detail="Enddatum liegt vor dem Startdatum")
+    if (end - absence.start).days + 1 > settings.SHIFT_PLAN_MAX_DAYS:
+        raise HTTPException(status_code=400, detail="Abwesenheitszeitraum zu lang")
+    if db.get(Employee, absence.employee_id) is None:
+        raise HTTPException(status_code=404, detail="Mitarbeiter nicht gefunden")
+
+    days = [absence.start + datetime.timedelta(days=offset) for offset in range((end - absence.start).days + 1)]
+    with _replan_lock:
+        changes, uncovered, states = _compute(db, absence, days, demand)
+        if apply and not _still_free(db, changes, absence.employee_id):
+            # Zustand veraltet (Änderung in einem anderen Prozess): einmal neu laden
+            week_states.clear()
+            changes, uncovered, states = _compute(db, absence, days, demand)
+
+        if apply and changes:
+            _write(db, changes)
+            db.commit()
+            count_cache.invalidate(ShiftAssignment.__tablename__)
+            for week, availability in states.items():
+                week_states.put(week, availability)
+
+    # Ein Tausch verlegt eine Schicht und besetzt deren alten Tag nach
+    swaps = sum(
+        1 for change in changes
+        if change.action == "remove" and change.employee_id != absence.employee_id
+    )
+    replacements = sum(
+        1 for change in changes
+        if change.action == "add" and change.shift_type == ShiftType.work
+    ) - swaps
+    return {
+        "message": (
+            f"Abwesenheit eingetragen, {replacements} Ersatzschichten geplant ({swaps} per Tausch)."
+            if apply else f"Vorschlag: {replacements} Ersatzschichten ({swaps} per Tausch)."
+        ),
+        "applied": apply,
+        "replacements": replacements,
+        "swaps": swaps,
+        "changes": [change.to_dict() for change in changes],
+        "uncovered": uncovered,
+    }
@@ -2,13 +2,50 @@
 from datetime import datetime, date
 from typing import Optional
 
+import pandas as pd
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y")
+
 
 def parse_date(date_str: Optional[str]) -> Optional[date]:
     if not date_str:
         return None
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y"):
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(date_str, fmt).date()
         except ValueError:
             continue
     raise ValueError(f"Unbekanntes Datumsformat: {date_str}")
+
+
+def to_date(value) -> Optional[date]:
+    """
+    Wie parse_date, akzeptiert aber auch Datumswerte aus Excel-Zellen
+    (datetime/date) und leere Zellen.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return parse_date(str(value).strip())
+
+
+def parse_date_column(series: pd.Series) -> pd.Series:
+    """
+    Spaltenweise Variante von parse_date für pandas-Serien: jedes Format wird
+    einmal vektorisiert auf die noch ungeparsten Werte angewendet.
+    Liefert datetime64-Werte; nicht erkannte Einträge sind NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    text = series.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna() & text.notna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors="coerce")
+    return parsed
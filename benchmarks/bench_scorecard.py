@@ -0,0 +1,232 @@
+"""
+Benchmark für den Scorecard-Import auf synthetischen PDFs.
+
+Jeder Fall (Fahreranzahl × LoR-Spalte × Tabellenseiten) läuft über die echten
+Endpunkte (TestClient gegen eine temporäre SQLite-Datenbank):
+upload_driver_scorecard und upload_combined_scorecard mit Prozesspool,
+save_scorecard und Commit, dazu die Vorschau über /upload/scorecard. Vor jedem
+Lauf werden Parse-Cache und Mitarbeiter-Resolver geleert und die Woche
+gelöscht; gemessen wird also immer ein kalter Import. Die Hälfte der
+Transporter-IDs ist als Mitarbeiter angelegt.
+
+Stufen der Uploads stammen aus ImportStats (`stats=true`): read (Upload
+lesen), parse (PDF im Prozesspool), validate (Mitarbeiter auflösen), insert
+(Woche ersetzen, Trends), commit; `request` ist die Dauer des ganzen Requests.
+Der Spitzenspeicher gilt nur für den API-Prozess, das Parsen selbst läuft im
+PDF-Prozesspool. Ergebnis als JSON, damit Läufe vergleichbar sind.
+
+Aufruf (im Projektverzeichnis):
+    python -m benchmarks.bench_scorecard --output bench.json
+    python -m benchmarks.bench_scorecard --quick --mode text
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib.metadata import PackageNotFoundError, version
+from itertools import product
+from typing import Dict, List
+
+from benchmarks.synthetic_scorecard import build_scorecard_pdf
+
+DRIVER_COUNTS = [10, 50, 100, 250, 500]
+LOR_VARIANTS = [True, False]
+TABLE_PAGES = [2, 4, 8]
+QUICK_DRIVER_COUNTS = [10, 100, 500]
+QUICK_TABLE_PAGES = [2, 8]
+
+WEEK = 12
+YEAR = 2025
+FILENAME = f"Scorecard_Week{WEEK}.pdf"
+
+# Endpunkt-Funktion je Ziel; der Pfad wird aus den registrierten Routen gelesen
+TARGETS = {
+    "upload_driver_scorecard": "upload_driver_scorecard",
+    "upload_combined_scorecard": "upload_combined_scorecard",
+    "preview": "upload_file",
+}
+
+
+class Bench:
+    """
+    App mit eigener Datenbank und eigenem Upload-Verzeichnis. Die Umgebung muss
+    vor dem ersten App-Import stehen (Settings und Prozesspool lesen sie).
+    """
+
+    def __init__(self, mode: str):
+        self._dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self._dir.name, 'bench.db')}"
+        os.environ["UPLOAD_DIR"] = os.path.join(self._dir.name, "uploads")
+        os.environ["SCORECARD_PARSE_MODE"] = mode
+
+        from fastapi.testclient import TestClient
+
+        from app.database import SessionLocal, get_db
+        from app.main import app
+
+        def session():
+            # get_db ist ein Kontext-Manager; als Dependency wird eine Session erwartet
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = session
+        self.client = TestClient(app)
+        self.paths = {
+            target: next(route.path for route in app.routes if getattr(route, "name", None) == name)
+            for target, name in TARGETS.items()
+        }
+        self.paths["preview"] = self.paths["preview"].replace("{category}", "scorecard")
+
+    def __enter__(self):
+        self.client.__enter__()  # Startup: Tabellen, Migrationen, PDF-Prozesspool
+        return self
+
+    def __exit__(self, *exc):
+        self.client.__exit__(*exc)
+        self._dir.cleanup()
+
+    def seed_employees(self, contents: bytes):
+        """Jede zweite Transporter-ID der Scorecard als Mitarbeiter anlegen."""
+        from app.database import SessionLocal
+        from app.models.employee import Employee
+        from app.services.scorecard_parser import parse_scorecard
+
+        transporter_ids = [row.transporter_id for row in parse_scorecard(contents).drivers]
+        db = SessionLocal()
+        try:
+            db.query(Employee).delete(synchronize_session=False)
+            db.add_all(
+                Employee(name=f"Fahrer {i}", transporter_id=transporter_id, start_date=datetime.date(2024, 1, 1))
+                for i, transporter_id in enumerate(transporter_ids[::2])
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def reset(self):
+        """Kalter Start für den nächsten Lauf: Caches leeren, Woche löschen."""
+        from app.database import SessionLocal
+        from app.services.employee_resolver import employee_resolver
+        from app.services.scorecard_cache import scorecard_cache
+        from app.services.scorecard_service import delete_week
+
+        scorecard_cache.clear()
+        employee_resolver.invalidate()
+        db = SessionLocal()
+        try:
+            delete_week(db, WEEK, YEAR)
+            db.commit()
+        finally:
+            db.close()
+
+    def post(self, target: str, contents: bytes) -> dict:
+        response = self.client.post(
+            self.paths[target],
+            params={"stats": "true"} if target != "preview" else None,
+            files={"file": (FILENAME, contents, "application/pdf")},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def run_target(self, target: str, contents: bytes, repeat: int) -> dict:
+        runs: List[Dict[str, float]] = []
+        body: dict = {}
+        for _ in range(repeat):
+            self.reset()
+            start = time.perf_counter()
+            body = self.post(target, contents)
+            request_ms = (time.perf_counter() - start) * 1000
+            runs.append({**body.get("stats", {}).get("stages_ms", {}), "request": request_ms})
+
+        # Eigener Durchlauf für den Speicher: tracemalloc verlangsamt den Request deutlich
+        self.reset()
+        tracemalloc.start()
+        try:
+            self.post(target, contents)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        stage_names = list(dict.fromkeys(name for run in runs for name in run))
+        return {
+            "rows": body.get("drivers"),  # Vorschau liefert keine Zeilenzahl
+            "stages_ms": {
+                name: round(statistics.median(run.get(name, 0.0) for run in runs), 3)
+                for name in stage_names
+            },
+            "peak_memory_bytes": peak,
+        }
+
+
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def run(mode: str, repeat: int, quick: bool) -> dict:
+    driver_counts = QUICK_DRIVER_COUNTS if quick else DRIVER_COUNTS
+    table_pages = QUICK_TABLE_PAGES if quick else TABLE_PAGES
+
+    cases = []
+    with Bench(mode) as bench:
+        for drivers, with_lor, pages in product(driver_counts, LOR_VARIANTS, table_pages):
+            contents = build_scorecard_pdf(drivers, with_lor=with_lor, table_pages=pages, week=WEEK)
+            bench.seed_employees(contents)
+            case = {
+                "drivers": drivers,
+                "with_lor": with_lor,
+                "table_pages": pages,
+                "total_pages": pages + 2,
+                "pdf_bytes": len(contents),
+                "targets": {target: bench.run_target(target, contents, repeat) for target in TARGETS},
+            }
+            cases.append(case)
+            print(
+                f"{drivers:>4} Fahrer, LoR={str(with_lor):<5}, {pages} Tabellenseiten: "
+                f"{case['targets']['upload_driver_scorecard']['stages_ms']['request']:.1f} ms",
+                file=sys.stderr,
+            )
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "pdfplumber": _package_version("pdfplumber"),
+            "sqlalchemy": _package_version("sqlalchemy"),
+            "mode": mode,
+            "repeat": repeat,
+        },
+        "cases": cases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scorecard-Import-Benchmark")
+    parser.add_argument("--mode", choices=["table", "text"], default="table")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="reduzierte Fallmatrix")
+    parser.add_argument("--output", help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args()
+
+    report = run(args.mode, max(1, args.repeat), args.quick)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
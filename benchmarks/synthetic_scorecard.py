@@ -0,0 +1,159 @@
+"""
+Erzeugt realistische, synthetische Scorecard-PDFs für Benchmarks – ohne
+zusätzliche Abhängigkeiten (PDF wird direkt geschrieben).
+
+Aufbau wie die Amazon-Scorecard:
+- Seite 1: Deckblatt
+- Seite 2: Firmenwerte (Overall Score, Rank, KPIs mit Status, Focus Areas)
+- ab Seite 3: Fahrertabelle, verteilt auf `table_pages` Seiten
+"""
+import random
+import string
+from typing import List, Tuple
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+FONT_SIZE = 8
+LINE_HEIGHT = 11
+TOP_MARGIN = 50
+
+COLUMN_X = [30, 125, 177, 229, 281, 333, 385, 437, 489]
+
+TextItem = Tuple[float, float, str]
+Page = Tuple[float, List[TextItem]]  # (Seitenhöhe, Textelemente)
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _write_pdf(pages: List[Page]) -> bytes:
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")  # wird unten gesetzt, sobald die Seiten-IDs feststehen
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for height, items in pages:
+        stream = "".join(
+            f"BT /F1 {FONT_SIZE} Tf 1 0 0 1 {x:.2f} {height - y:.2f} Tm ({_escape(text)}) Tj ET\n"
+            for x, y, text in items
+        ).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"endstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {height:.0f}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        ))
+
+    objects[catalog_id - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    return bytes(out)
+
+
+def _lines_page(lines: List[str]) -> Page:
+    return PAGE_HEIGHT, [(40, TOP_MARGIN + i * 16, line) for i, line in enumerate(lines)]
+
+
+def _cover_page(station: str, week: int) -> Page:
+    return _lines_page([f"{station} Weekly Scorecard", f"Week {week}", "Delivery Service Partner Performance"])
+
+
+def _firm_page(rng: random.Random, station: str) -> Page:
+    return _lines_page([
+        f"Overall Score: {rng.uniform(60, 95):.2f} | Great",
+        f"Rank at {station}: {rng.randint(1, 20)}",
+        "Compliance",
+        "Breach of Contract (BOC) None",
+        "Quality",
+        f"Delivery Completion Rate(DCR) {rng.uniform(97, 100):.2f}% | Fantastic",
+        f"Delivered Not Received(DNR DPMO) {rng.randint(500, 2500)} | Great",
+        f"Lost on Road (LoR) DPMO {rng.randint(0, 150)} | Fair",
+        f"Photo-On-Delivery {rng.uniform(90, 100):.1f}% | Fantastic",
+        f"Contact Compliance {rng.uniform(85, 100):.1f}% | Great",
+        "Recommended Focus Areas",
+        "1. Delivery Completion Rate",
+        "2. Delivered Not Received",
+        "3. Contact Compliance",
+    ])
+
+
+def _transporter_id(rng: random.Random) -> str:
+    return "A" + "".join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(12))
+
+
+def _driver_values(rng: random.Random, with_lor: bool) -> List[str]:
+    values = [
+        _transporter_id(rng),
+        str(rng.randint(400, 1800)),
+        f"{rng.uniform(95, 100):.2f}%",
+        str(rng.randint(0, 3000)),
+    ]
+    if with_lor:
+        values.append(str(rng.randint(0, 250)))
+    values += [
+        f"{rng.uniform(85, 100):.2f}%",
+        f"{rng.uniform(80, 100):.2f}%",
+        str(rng.randint(0, 4)),
+        f"{rng.uniform(75, 100):.2f}%",
+    ]
+    return values
+
+
+def _table_pages(rng: random.Random, drivers: int, with_lor: bool, table_pages: int) -> List[Page]:
+    header = ["Transporter ID", "Delivered", "DCR", "DNR DPMO"]
+    if with_lor:
+        header.append("LoR DPMO")
+    header += ["POD", "CC", "CE", "DEX"]
+
+    per_page = -(-drivers // table_pages) if drivers else 0
+    pages = []
+    remaining = drivers
+    for _ in range(table_pages):
+        rows = min(per_page, remaining)
+        remaining -= rows
+        # Lange Tabellen: Seite wird höher statt Zeilen zu überlagern
+        height = max(PAGE_HEIGHT, TOP_MARGIN * 2 + (rows + 1) * LINE_HEIGHT)
+        items = [(COLUMN_X[i], TOP_MARGIN, label) for i, label in enumerate(header)]
+        for row in range(rows):
+            y = TOP_MARGIN + (row + 1) * LINE_HEIGHT
+            items += [(COLUMN_X[i], y, value) for i, value in enumerate(_driver_values(rng, with_lor))]
+        pages.append((height, items))
+    return pages
+
+
+def build_scorecard_pdf(
+    drivers: int,
+    with_lor: bool = True,
+    table_pages: int = 2,
+    seed: int = 0,
+    station: str = "DSU1",
+    week: int = 12,
+) -> bytes:
+    """
+    Liefert die Bytes einer synthetischen Scorecard mit `drivers` Fahrerzeilen.
+    Gesamtseitenzahl = table_pages + 2.
+    """
+    rng = random.Random(seed)
+    pages = [_cover_page(station, week), _firm_page(rng, station)]
+    pages += _table_pages(rng, drivers, with_lor, max(1, table_pages))
+    return _write_pdf(pages)
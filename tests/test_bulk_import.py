@@ -0,0 +1,63 @@
+import dataclasses
+import io
+import os
+import tempfile
+import unittest
+
+# Eigene SQLite-Datei statt der konfigurierten Datenbank; vor den App-Importen setzen
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir.name, 'test.db')}"
+
+import pandas as pd  # noqa: E402
+
+from app.api.vehicle_cost import VEHICLE_COST_IMPORT, import_vehicle_costs_file  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import employee, shift  # noqa: E402,F401  (Mapper registrieren)
+from app.models.fleet import FleetVehicle  # noqa: E402
+from app.models.vehicle_cost import CostCategory, VehicleCost, VehicleCostDaily  # noqa: E402
+from app.services.bulk_import import import_file  # noqa: E402
+
+
+class VehicleCostFileImportTest(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        self.db = SessionLocal()
+        self.db.add(FleetVehicle(id=1, license_plate="B-AB 123"))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def assert_default_category(self, result: dict):
+        self.assertEqual(result["error_count"], 0, result["errors"])
+        self.assertEqual(result["inserted"], 1)
+        self.assertEqual(self.db.query(VehicleCost.category).scalar(), CostCategory.other)
+        self.assertEqual(self.db.query(VehicleCostDaily.category).scalar(), CostCategory.other)
+
+    def test_csv_missing_category_uses_default(self):
+        source = io.BytesIO(b"vehicle_id,date,category,amount,description\n1,2025-02-10,,20,z\n")
+        self.assert_default_category(import_vehicle_costs_file(self.db, source, "csv"))
+
+    def test_parquet_missing_category_uses_default(self):
+        source = io.BytesIO()
+        pd.DataFrame({
+            "vehicle_id": [1], "date": ["2025-02-10"], "category": [None], "amount": [20.0], "description": ["z"],
+        }).to_parquet(source)
+        source.seek(0)
+        self.assert_default_category(import_vehicle_costs_file(self.db, source, "parquet"))
+
+    def test_after_write_value_error_is_reported_per_row(self):
+        def failing_hook(db, rows):
+            raise ValueError("kaputt")
+
+        spec = dataclasses.replace(VEHICLE_COST_IMPORT, after_write=failing_hook)
+        source = io.BytesIO(b"vehicle_id,date,amount\n1,2025-02-10,20\n1,2025-02-11,30\n")
+        result = import_file(self.db, spec, source, "csv")
+        self.assertEqual(result.inserted, 0)
+        self.assertEqual([row for row, _ in result.errors], [2, 3])
+        self.assertEqual(self.db.query(VehicleCost).count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
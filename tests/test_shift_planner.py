@@ -0,0 +1,145 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+# Eigene SQLite-Datei statt der konfigurierten Datenbank; vor den App-Importen setzen
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir.name, 'test.db')}"
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import fleet, vehicle_cost  # noqa: E402,F401  (Mapper registrieren)
+from app.models.employee import Employee  # noqa: E402
+from app.models.schemas import ShiftDemand  # noqa: E402
+from app.models.shift import ShiftAssignment, ShiftType  # noqa: E402
+from app.services.holiday_calendar import holiday_calendar  # noqa: E402
+from app.services.shift_planner import load_availability, plan_range  # noqa: E402
+
+STATE = "BE"
+
+
+def _monday(weeks: int) -> datetime.date:
+    """Montag `weeks` Wochen ab heute, dessen Woche keinen Feiertag hat."""
+    today = datetime.date.today()
+    monday = today - datetime.timedelta(days=today.weekday()) + datetime.timedelta(weeks=weeks)
+    while any(holiday_calendar.is_holiday(STATE, monday + datetime.timedelta(days=i)) for i in range(7)):
+        monday += datetime.timedelta(weeks=1)
+    return monday
+
+
+class ShiftPlannerTest(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        self.db = SessionLocal()
+        self.monday = _monday(2)
+        self.sunday = self.monday + datetime.timedelta(days=6)
+
+    def tearDown(self):
+        self.db.close()
+
+    def add_employee(self, transporter_id: str, **fields) -> int:
+        values = {
+            "name": transporter_id,
+            "transporter_id": transporter_id,
+            "start_date": datetime.date(2020, 1, 1),
+            "days_per_week": 5,
+            "is_flexible": True,
+            "federal_state": STATE,
+            **fields,
+        }
+        employee = Employee(**values)
+        self.db.add(employee)
+        self.db.commit()
+        return employee.id
+
+    def weekdays(self, employee_id: int) -> list:
+        return sorted(
+            day.weekday() for (day,) in self.db.query(ShiftAssignment.date)
+            .filter(ShiftAssignment.employee_id == employee_id, ShiftAssignment.shift_type == ShiftType.work)
+        )
+
+    def test_scarce_days_are_filled_first(self):
+        # Dienstag kann nur X, Montag beide; chronologisch bekäme X den Montag und Dienstag bliebe leer
+        x = self.add_employee("X", days_per_week=1)
+        y = self.add_employee("Y", days_per_week=1, end_date=self.monday)
+        demand = ShiftDemand(weekday=[1, 1, 0, 0, 0, 0, 0])
+
+        result = plan_range(self.db, self.monday, self.monday + datetime.timedelta(days=1), demand=demand)
+
+        self.assertEqual(result.to_dict()["shortfall"], 0)
+        self.assertEqual(self.weekdays(x), [1])
+        self.assertEqual(self.weekdays(y), [0])
+
+    def test_preferred_days_come_first(self):
+        flexible = self.add_employee("F", days_per_week=2, preferred_days=[3, 4])
+        plan_range(self.db, self.monday, self.sunday)
+        self.assertEqual(self.weekdays(flexible), [3, 4])
+
+    def test_days_per_week_and_preferred_days_limit_assignments(self):
+        fixed = self.add_employee("P", is_flexible=False, preferred_days=[0, 2, 4])
+        flexible = self.add_employee("Q", days_per_week=3)
+
+        plan_range(self.db, self.monday, self.sunday)
+
+        self.assertEqual(self.weekdays(fixed), [0, 2, 4])
+        self.assertEqual(len(self.weekdays(flexible)), 3)
+
+    def test_sixth_day_only_for_employees_who_want_it(self):
+        demand = ShiftDemand(weekday=[1, 1, 1, 1, 1, 1, 0])
+        six = self.add_employee("S", prefers_six_days=True)
+
+        result = plan_range(self.db, self.monday, self.sunday, demand=demand).to_dict()
+
+        self.assertEqual(len(self.weekdays(six)), 6)
+        self.assertEqual(result["shortfall"], 0)
+
+    def test_demand_shortfall_is_reported(self):
+        demand = ShiftDemand(weekday=[2, 1, 1, 1, 1, 1, 0])
+        self.add_employee("A")
+
+        result = plan_range(self.db, self.monday, self.sunday, demand=demand).to_dict()
+
+        self.assertEqual(result["created"], 5)
+        self.assertEqual(result["shortfall"], 2)
+        self.assertEqual(result["days"][0]["shortfall"], 1)
+
+    def test_rerun_adds_nothing(self):
+        self.add_employee("A")
+        self.add_employee("B", days_per_week=3)
+
+        first = plan_range(self.db, self.monday, self.sunday)
+        second = plan_range(self.db, self.monday, self.sunday)
+
+        self.assertEqual(first.created, 8)
+        self.assertEqual(second.created, 0)
+        self.assertEqual(self.db.query(ShiftAssignment).count(), 8)
+
+    def test_employees_without_federal_state_are_skipped(self):
+        planned = self.add_employee("A")
+        stateless = self.add_employee("B", federal_state=None)
+
+        result = plan_range(self.db, self.monday, self.sunday)
+
+        self.assertEqual(result.skipped_employees, 1)
+        self.assertEqual(len(self.weekdays(planned)), 5)
+        self.assertEqual(self.weekdays(stateless), [])
+
+    def test_availability_counts_existing_shifts(self):
+        employee = self.add_employee("A", days_per_week=2)
+        tuesday = self.monday + datetime.timedelta(days=1)
+        wednesday = tuesday + datetime.timedelta(days=1)
+        self.db.add(ShiftAssignment(employee_id=employee, date=tuesday, shift_type=ShiftType.work))
+        self.db.add(ShiftAssignment(employee_id=employee, date=wednesday, shift_type=ShiftType.sick))
+        self.db.commit()
+
+        av = load_availability(self.db, self.monday, self.sunday)
+
+        self.assertEqual(av.worked[0].tolist(), [1])
+        self.assertEqual(av.headcount.tolist(), [0, 1, 0, 0, 0, 0, 0])
+        self.assertEqual(av.occupied[0].tolist(), [False, True, True, False, False, False, False])
+        self.assertEqual(plan_range(self.db, self.monday, self.sunday).created, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
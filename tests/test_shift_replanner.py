@@ -0,0 +1,142 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+# Eigene SQLite-Datei statt der konfigurierten Datenbank; vor den App-Importen setzen
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir.name, 'test.db')}"
+
+from app.api.shifts import assign_shift  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import fleet, vehicle_cost  # noqa: E402,F401  (Mapper registrieren)
+from app.models.employee import Employee  # noqa: E402
+from app.models.schemas import AbsenceCreate, ShiftAssignmentCreate  # noqa: E402
+from app.models.shift import ShiftAssignment, ShiftType  # noqa: E402
+from app.services.holiday_calendar import holiday_calendar  # noqa: E402
+from app.services.shift_replanner import replan_absence, week_states  # noqa: E402
+
+STATE = "BE"
+
+
+def _monday(weeks: int) -> datetime.date:
+    """Montag `weeks` Wochen ab heute, dessen Woche keinen Feiertag hat."""
+    today = datetime.date.today()
+    monday = today - datetime.timedelta(days=today.weekday()) + datetime.timedelta(weeks=weeks)
+    step = 1 if weeks >= 0 else -1
+    while any(holiday_calendar.is_holiday(STATE, monday + datetime.timedelta(days=i)) for i in range(7)):
+        monday += datetime.timedelta(weeks=step)
+    return monday
+
+
+class ShiftReplannerTest(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        week_states.clear()
+        self.db = SessionLocal()
+        self.monday = _monday(2)
+
+    def tearDown(self):
+        self.db.close()
+
+    def add_employee(self, transporter_id: str, work_days=(), monday=None, days_per_week: int = 5) -> int:
+        monday = monday or self.monday
+        employee = Employee(
+            name=transporter_id,
+            transporter_id=transporter_id,
+            start_date=datetime.date(2020, 1, 1),
+            days_per_week=days_per_week,
+            federal_state=STATE,
+        )
+        self.db.add(employee)
+        self.db.flush()
+        self.db.add_all(
+            ShiftAssignment(
+                employee_id=employee.id, date=monday + datetime.timedelta(days=offset), shift_type=ShiftType.work
+            )
+            for offset in work_days
+        )
+        self.db.commit()
+        return employee.id
+
+    def absence(self, employee_id: int, day: datetime.date) -> AbsenceCreate:
+        return AbsenceCreate(employee_id=employee_id, start=day, shift_type=ShiftType.sick)
+
+    def shifts(self, employee_id: int) -> dict:
+        return {
+            day: shift_type for day, shift_type in self.db.query(ShiftAssignment.date, ShiftAssignment.shift_type)
+            .filter(ShiftAssignment.employee_id == employee_id)
+        }
+
+    def test_direct_replacement(self):
+        absent = self.add_employee("A", work_days=range(5))
+        spare = self.add_employee("B", work_days=range(4))
+        friday = self.monday + datetime.timedelta(days=4)
+
+        result = replan_absence(self.db, self.absence(absent, friday))
+
+        self.assertEqual((result["replacements"], result["swaps"], result["uncovered"]), (1, 0, []))
+        self.assertEqual(self.shifts(absent)[friday], ShiftType.sick)
+        self.assertEqual(self.shifts(spare)[friday], ShiftType.work)
+
+    def test_swap_moves_shift_from_other_day(self):
+        monday, friday = self.monday, self.monday + datetime.timedelta(days=4)
+        absent = self.add_employee("A", work_days=range(5))
+        # B hat sein Wochensoll erfüllt und ist Freitag frei, C ist nur Montag frei
+        full = self.add_employee("B", work_days=(0, 1, 2, 3, 5))
+        spare = self.add_employee("C", work_days=(1, 2, 3, 4))
+
+        result = replan_absence(self.db, self.absence(absent, friday))
+
+        self.assertEqual((result["replacements"], result["swaps"]), (1, 1))
+        self.assertIn(
+            {"action": "remove", "employee_id": full, "date": monday, "shift_type": "work"}, result["changes"]
+        )
+        self.assertNotIn(monday, self.shifts(full))
+        self.assertEqual(self.shifts(full)[friday], ShiftType.work)
+        self.assertEqual(self.shifts(spare)[monday], ShiftType.work)
+
+    def test_past_days_are_not_refilled(self):
+        past_monday = _monday(-2)
+        past_friday = past_monday + datetime.timedelta(days=4)
+        absent = self.add_employee("A", work_days=range(5), monday=past_monday)
+        spare = self.add_employee("B", work_days=range(4), monday=past_monday)
+
+        result = replan_absence(self.db, self.absence(absent, past_friday))
+
+        self.assertEqual(result["replacements"], 0)
+        self.assertEqual(self.shifts(absent)[past_friday], ShiftType.sick)
+        self.assertNotIn(past_friday, self.shifts(spare))
+
+    def test_proposal_writes_nothing(self):
+        absent = self.add_employee("A", work_days=range(5))
+        self.add_employee("B", work_days=range(4))
+        friday = self.monday + datetime.timedelta(days=4)
+
+        result = replan_absence(self.db, self.absence(absent, friday), apply=False)
+
+        self.assertFalse(result["applied"])
+        self.assertEqual(result["replacements"], 1)
+        self.assertEqual(self.shifts(absent)[friday], ShiftType.work)
+        self.assertEqual(self.db.query(ShiftAssignment).count(), 9)
+
+    def test_cached_week_refreshes_after_assign_shift(self):
+        absent = self.add_employee("A", work_days=range(5))
+        busier = self.add_employee("B", work_days=range(4))
+        idle = self.add_employee("C", work_days=range(3))
+        friday = self.monday + datetime.timedelta(days=4)
+
+        first = replan_absence(self.db, self.absence(absent, friday), apply=False)
+        self.assertIn(idle, [change["employee_id"] for change in first["changes"]])
+
+        # C bekommt Freitag anderweitig eine Schicht; der zwischengespeicherte Wochenzustand ist veraltet
+        assign_shift(ShiftAssignmentCreate(employee_id=idle, date=friday, shift_type=ShiftType.work), db=self.db)
+
+        second = replan_absence(self.db, self.absence(absent, friday), apply=False)
+        replacements = [change["employee_id"] for change in second["changes"] if change["action"] == "add"]
+        self.assertEqual(replacements, [absent, busier])
+
+
+if __name__ == "__main__":
+    unittest.main()